@@ -4,128 +4,468 @@
 
 import random
 import math
+import operator
 from typing import List, Tuple, Dict, Optional, Callable
 import time
 import json
+import contextlib
 import hashlib
+import inspect
+import os
+import pickle
+import uuid
 from datetime import datetime
 import threading
 import queue
 import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import ml_engine
+from ml_dataset import ColumnarDataset
+from ml_features import FeatureTransformer, FeatureTransformSpec
+from ml_history import TrainingHistory, TrainingHistoryWriter
+from ml_inference import CompiledPredictor
+from ml_monitoring import PerformanceMonitor
+from ml_parallel import DataParallelTrainer
+from ml_statistics import StreamingMoments, evaluate_in_chunks
+from ml_storage import ColumnarFile
+from ml_synthetic import SyntheticDataGenerator
+
+# 特征工程阶段追加的交互项与平方项: x0*x1, x0*x2, x1*x2, x0^2, x1^2, x2^2
+INTERACTION_TERMS = [(0, 1), (0, 2), (1, 2), (0, 0), (1, 1), (2, 2)]
+
+
+class StageResultCache:
+    """
+    流水线阶段结果缓存 - 以阶段标识、参数和上游结果指纹的哈希为键持久化到磁盘
+    条目为 pickle 文件, 加载时会执行其中的对象构造, 因此缓存目录只能由当前用户写入:
+    cache_dir 为空时使用当前用户私有的 ~/.cache/ml_pipeline (权限 0700), 指定目录时同样检查所有者与权限
+    """
+    
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 512 * 1024 * 1024):
+        if cache_dir is None:
+            cache_root = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+            cache_dir = os.path.join(cache_root, 'ml_pipeline')
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        self._check_private(cache_dir)
+    
+    @staticmethod
+    def _check_private(cache_dir: str):
+        """拒绝使用其他用户拥有或组/其他用户可写的缓存目录"""
+        if not hasattr(os, 'getuid'):
+            return
+        status = os.stat(cache_dir)
+        if status.st_uid != os.getuid() or status.st_mode & 0o022:
+            raise ValueError(f"缓存目录 {cache_dir} 不属于当前用户或可被其他用户写入, 拒绝加载其中的条目")
+    
+    @staticmethod
+    def make_key(stage_name: str, stage_function: Callable, params: Dict,
+                 upstream_fingerprints: List[str], owner_state=None) -> str:
+        """计算内容寻址键 (包含阶段函数字节码的哈希, 修改函数实现后旧条目自动失效)"""
+        code = getattr(getattr(stage_function, '__func__', stage_function), '__code__', None)
+        identity = {
+            'stage': stage_name,
+            'function': f"{getattr(stage_function, '__module__', '')}.{getattr(stage_function, '__qualname__', repr(stage_function))}",
+            'code': StageResultCache._code_digest(code) if code is not None else None,
+            'params': params,
+            'upstream': upstream_fingerprints,
+            'owner_state': owner_state
+        }
+        payload = json.dumps(identity, sort_keys=True, default=repr).encode()
+        return hashlib.sha256(payload).hexdigest()
+    
+    @staticmethod
+    def _code_digest(code) -> str:
+        """函数字节码与常量的哈希; 嵌套的代码对象 (推导式、lambda) 递归计入, 不使用其含内存地址的 repr"""
+        digest = hashlib.sha256(code.co_code)
+        for constant in code.co_consts:
+            digest.update(StageResultCache._code_digest(constant).encode() if hasattr(constant, 'co_code')
+                          else repr(constant).encode())
+        return digest.hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+    
+    def get(self, key: str) -> Tuple[bool, object]:
+        """读取缓存条目, 返回 (是否命中, 条目)"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as handle:
+                entry = pickle.load(handle)
+        except Exception:
+            # 文件缺失或损坏、条目引用的类已改名或模块已删除、引用的数据文件已变化等: 一律视为未命中,
+            # 删除无法加载的条目, 由调用方重新计算
+            if os.path.exists(path):
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+            with self._lock:
+                self.misses += 1
+            return False, None
+        
+        with contextlib.suppress(OSError):  # 文件可能已被并发的淘汰删除
+            os.utime(path)  # 更新访问时间, 用于LRU淘汰
+        with self._lock:
+            self.hits += 1
+        return True, entry
+    
+    def put(self, key: str, entry) -> bool:
+        """写入缓存条目 (先写临时文件再原子替换); 无法序列化时返回 False"""
+        try:
+            payload = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+        
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'wb') as handle:
+                handle.write(payload)
+            os.replace(temp_path, path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+            raise
+        self._evict()
+        return True
+    
+    def _evict(self):
+        """总大小超过上限时, 按最近使用时间淘汰最旧的条目"""
+        with self._lock:
+            entries = []
+            for item in os.scandir(self.cache_dir):
+                if item.name.endswith('.pkl'):
+                    stat = item.stat()
+                    entries.append((stat.st_mtime, stat.st_size, item.path))
+            
+            total_size = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total_size <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total_size -= size
+                self.evictions += 1
+    
+    def size_bytes(self) -> int:
+        """当前缓存占用字节数"""
+        return sum(item.stat().st_size for item in os.scandir(self.cache_dir) if item.name.endswith('.pkl'))
+    
+    def statistics(self) -> Dict:
+        """缓存统计信息"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size_bytes': self.size_bytes(),
+            'max_bytes': self.max_bytes
+        }
 
 
 class AIPipelineOrchestrator:
     """AI流水线编排器 - 展示AI工程师的系统编排能力"""
     
-    def __init__(self):
+    EXECUTORS = ('serial', 'thread')
+    
+    def __init__(self, cache: Optional[StageResultCache] = None):
         self.pipeline_stages = []
+        self.stage_index = {}
         self.stage_results = {}
+        self.stage_fingerprints = {}
+        self.cache = cache
         self.execution_history = []
         self.monitoring_callbacks = []
         
-    def add_stage(self, stage_name: str, stage_function: Callable, dependencies: List[str] = None):
-        """添加流水线阶段"""
+    def add_stage(self, stage_name: str, stage_function: Callable, dependencies: List[str] = None,
+                  inputs: List[str] = None, params: Optional[Dict] = None, cacheable: bool = False,
+                  optional_inputs: List[str] = None):
+        """
+        添加流水线阶段
+        inputs 声明阶段函数的位置参数: 上游阶段名 (取其结果) 或执行上下文中的对象名
+        (如 'ml_system'); 未声明时依次传入各依赖阶段的结果
+        上游阶段失败时依赖它的阶段随之失败; optional_inputs 中的上游阶段失败时改为传入空字典
+        params 作为关键字参数传入阶段函数, 同时参与缓存键计算
+        cacheable=True 且编排器配置了缓存时, 输入未变化的阶段直接从磁盘加载结果
+        (阶段函数接受 seed 参数时须在 params 中指定 seed, 否则不缓存)
+        """
+        if stage_name in self.stage_index:
+            raise ValueError(f"阶段 '{stage_name}' 已存在")
+        
         stage = {
             'name': stage_name,
             'function': stage_function,
             'dependencies': dependencies or [],
+            'inputs': list(inputs) if inputs is not None else list(dependencies or []),
+            'optional_inputs': set(optional_inputs or []),
+            'params': dict(params or {}),
+            'cacheable': cacheable,
             'executed': False,
             'result': None,
             'execution_time': 0
         }
         self.pipeline_stages.append(stage)
+        self.stage_index[stage_name] = stage
         
-    def execute_pipeline(self, ml_system, ethics_governance) -> Dict:
-        """执行AI流水线"""
-        print("[PIPELINE] 开始执行AI流水线...")
+    def set_stage_params(self, stage_name: str, **params):
+        """更新阶段参数 (配合 execute_pipeline(from_stage=...) 做增量调参)"""
+        if stage_name not in self.stage_index:
+            raise ValueError(f"阶段 '{stage_name}' 不存在")
+        self.stage_index[stage_name]['params'].update(params)
+    
+    def execute_pipeline(self, ml_system, ethics_governance,
+                         executor: str = 'serial', max_workers: Optional[int] = None,
+                         context: Optional[Dict] = None,
+                         from_stage: Optional[str] = None) -> Dict:
+        """
+        执行AI流水线
+        executor='thread' 时, 同一层级中相互独立的阶段在线程池中并发执行
+        context 可提供额外的具名对象, 供阶段的 inputs 引用
+        from_stage 指定时只重新执行该阶段及其所有下游阶段, 上游阶段复用上次的结果
+        """
+        if executor not in self.EXECUTORS:
+            raise ValueError(f"不支持的执行器: {executor}, 可选: {', '.join(self.EXECUTORS)}")
+        context = {'ml_system': ml_system, 'ethics_governance': ethics_governance, **(context or {})}
+        self._validate_stage_inputs(context)
+        
+        execution_levels = self._determine_execution_levels()
+        reused_stages = []
+        if from_stage is not None:
+            invalidated = self._invalidate_from(from_stage)
+            reused_stages = [s['name'] for s in self.pipeline_stages if s['name'] not in invalidated]
+            execution_levels = [[name for name in level if name in invalidated] for level in execution_levels]
+            execution_levels = [level for level in execution_levels if level]
+            print(f"[PIPELINE] 增量执行: 从阶段 {from_stage} 开始, 复用 {len(reused_stages)} 个上游阶段结果")
+        print(f"[PIPELINE] 开始执行AI流水线... (执行器: {executor})")
         
         start_time = time.time()
-        execution_order = self._determine_execution_order()
-        
-        for stage_name in execution_order:
-            stage = next(s for s in self.pipeline_stages if s['name'] == stage_name)
-            print(f"[PIPELINE] 执行阶段: {stage_name}")
-            
-            stage_start = time.time()
-            try:
-                # 根据阶段函数的参数需求来调用
-                if stage_name == 'data_ingestion':
-                    result = stage['function']()
-                elif stage_name == 'feature_engineering':
-                    input_data = self.stage_results.get('data_ingestion')
-                    if input_data is None:
-                        raise ValueError(f"依赖阶段 'data_ingestion' 未执行或失败")
-                    result = stage['function'](input_data)
-                elif stage_name == 'data_preprocessing':
-                    input_data = self.stage_results.get('feature_engineering')
-                    if input_data is None:
-                        raise ValueError(f"依赖阶段 'feature_engineering' 未执行或失败")
-                    result = stage['function'](input_data)
-                elif stage_name == 'model_training':
-                    input_data = self.stage_results.get('data_preprocessing')
-                    if input_data is None:
-                        raise ValueError(f"依赖阶段 'data_preprocessing' 未执行或失败")
-                    result = stage['function'](input_data)
-                elif stage_name == 'model_evaluation':
-                    # 对于评估阶段，使用预处理后的数据的一部分作为测试数据
-                    processed_data = self.stage_results.get('data_preprocessing')
-                    if processed_data is None:
-                        raise ValueError(f"依赖阶段 'data_preprocessing' 未执行或失败")
-                    result = stage['function'](processed_data)
-                elif stage_name == 'fairness_analysis':
-                    # 公平性分析需要模型和原始数据
-                    input_data = self.stage_results.get('data_ingestion')
-                    if input_data is None:
-                        raise ValueError(f"依赖阶段 'data_ingestion' 未执行或失败")
-                    result = stage['function'](ml_system, input_data)
-                elif stage_name == 'privacy_analysis':
-                    # 隐私分析需要模型和原始数据
-                    input_data = self.stage_results.get('data_ingestion')
-                    if input_data is None:
-                        raise ValueError(f"依赖阶段 'data_ingestion' 未执行或失败")
-                    result = stage['function'](ml_system, input_data)
-                elif stage_name == 'audit_compliance':
-                    # 审计合规需要模型和评估结果
-                    eval_results = self.stage_results.get('model_evaluation', {})
-                    result = stage['function'](ml_system, eval_results)
+        stage_timings = {}
+        cache_before = (self.cache.hits, self.cache.misses, self.cache.evictions) if self.cache else None
+        
+        pool = ThreadPoolExecutor(max_workers=max_workers) if executor == 'thread' else None
+        try:
+            for level in execution_levels:
+                stages = [self.stage_index[name] for name in level]
+                if pool is not None and len(stages) > 1:
+                    print(f"[PIPELINE] 并发执行阶段: {', '.join(level)}")
+                    futures = [pool.submit(self._run_stage, stage, context, start_time) for stage in stages]
+                    outcomes = [future.result() for future in futures]
                 else:
-                    result = stage['function'](self.stage_results)
-                
-                execution_time = time.time() - stage_start
-                
-                stage['result'] = result
-                stage['execution_time'] = execution_time
-                stage['executed'] = True
-                self.stage_results[stage_name] = result
+                    outcomes = [self._run_stage(stage, context, start_time) for stage in stages]
                 
-                print(f"[PIPELINE] 阶段 {stage_name} 完成, 用时: {execution_time:.2f}s")
-                
-            except Exception as e:
-                print(f"[PIPELINE] 阶段 {stage_name} 失败: {str(e)}")
-                stage['result'] = {'error': str(e)}
-                stage['executed'] = False
+                for stage, (result, error, timing) in zip(stages, outcomes):
+                    stage_timings[stage['name']] = timing
+                    stage['execution_time'] = timing['duration']
+                    if error is None:
+                        stage['result'] = result
+                        stage['executed'] = True
+                        self.stage_results[stage['name']] = result
+                        source = '缓存命中' if timing.get('cached') else '完成'
+                        print(f"[PIPELINE] 阶段 {stage['name']} {source}, 用时: {timing['duration']:.2f}s")
+                    else:
+                        print(f"[PIPELINE] 阶段 {stage['name']} 失败: {error}")
+                        stage['result'] = {'error': error}
+                        stage['executed'] = False
+        finally:
+            if pool is not None:
+                pool.shutdown()
         
         total_time = time.time() - start_time
+        critical_path, critical_path_length = self._critical_path(stage_timings)
         self.execution_history.append({
             'execution_time': total_time,
             'completed_at': time.time(),
-            'stages_executed': len([s for s in self.pipeline_stages if s['executed']])
+            'stages_executed': len([s for s in self.pipeline_stages if s['executed']]),
+            'executor': executor,
+            'from_stage': from_stage,
+            'stage_timings': stage_timings,
+            'critical_path': critical_path,
+            'critical_path_length': critical_path_length
         })
         
-        print(f"[PIPELINE] 流水线执行完成, 总用时: {total_time:.2f}s")
+        print(f"[PIPELINE] 流水线执行完成, 总用时: {total_time:.2f}s, 关键路径: {critical_path_length:.2f}s")
         
-        return {
+        pipeline_result = {
             'total_execution_time': total_time,
             'stages_completed': len([s for s in self.pipeline_stages if s['executed']]),
             'stages_failed': len([s for s in self.pipeline_stages if not s['executed']]),
-            'stage_results': self.stage_results
+            'stage_results': self.stage_results,
+            'stage_timings': stage_timings,
+            'critical_path_length': critical_path_length,
+            'stages_reused': reused_stages
         }
+        if self.cache is not None:
+            cache_statistics = self.cache.statistics()
+            cache_statistics['hits'] -= cache_before[0]
+            cache_statistics['misses'] -= cache_before[1]
+            cache_statistics['evictions'] -= cache_before[2]
+            pipeline_result['cache_statistics'] = cache_statistics
+            print(f"[PIPELINE] 缓存命中: {cache_statistics['hits']}, 未命中: {cache_statistics['misses']}")
+        
+        return pipeline_result
     
-    def _determine_execution_order(self) -> List[str]:
-        """确定执行顺序"""
+    def _invalidate_from(self, from_stage: str) -> set:
+        """使指定阶段及其传递下游失效, 返回需要重新执行的阶段集合"""
+        if from_stage not in self.stage_index:
+            raise ValueError(f"阶段 '{from_stage}' 不存在")
+        
+        dependents = {}
+        for stage in self.pipeline_stages:
+            for dep in stage['dependencies']:
+                dependents.setdefault(dep, []).append(stage['name'])
+        
+        invalidated = {from_stage}
+        frontier = [from_stage]
+        while frontier:
+            for child in dependents.get(frontier.pop(), []):
+                if child not in invalidated:
+                    invalidated.add(child)
+                    frontier.append(child)
+        
+        for stage in self.pipeline_stages:
+            if stage['name'] not in invalidated and stage['name'] not in self.stage_results:
+                raise ValueError(f"上游阶段 '{stage['name']}' 没有可复用的结果, 请先完整执行流水线")
+        
+        for stage_name in invalidated:
+            stage = self.stage_index[stage_name]
+            # 阶段所属对象上由该阶段产生的状态 (如训练得到的权重) 一并重置, 重新执行的结果不受上一次执行影响
+            owner = getattr(stage['function'], '__self__', None)
+            if hasattr(owner, 'reset_stage_state'):
+                owner.reset_stage_state(stage['function'].__name__)
+            stage['executed'] = False
+            stage['result'] = None
+            self.stage_results.pop(stage_name, None)
+            self.stage_fingerprints.pop(stage_name, None)
+        return invalidated
+    
+    def _validate_stage_inputs(self, context: Dict):
+        """检查各阶段声明的输入均可解析, 且引用的上游阶段已列为依赖"""
+        for stage in self.pipeline_stages:
+            for name in stage['inputs']:
+                if name in self.stage_index:
+                    if name not in stage['dependencies']:
+                        raise ValueError(f"阶段 '{stage['name']}' 使用了 '{name}' 的结果, 但未将其声明为依赖")
+                elif name not in context:
+                    raise ValueError(f"阶段 '{stage['name']}' 的输入 '{name}' 既不是阶段也不在执行上下文中")
+    
+    def _resolve_input(self, stage: Dict, name: str, context: Dict):
+        """解析阶段输入: 上游阶段结果优先, 其次为执行上下文对象"""
+        if name in self.stage_index:
+            result = self.stage_results.get(name)
+            if result is None and name in stage['optional_inputs']:
+                print(f"[PIPELINE] 依赖阶段 '{name}' 未执行或失败, 以空结果传入 {stage['name']}")
+                return {}
+            if result is None:
+                raise ValueError(f"依赖阶段 '{name}' 未执行或失败")
+            return result
+        return context[name]
+    
+    def _run_stage(self, stage: Dict, context: Dict, pipeline_start: float) -> Tuple:
+        """执行单个阶段, 返回 (结果, 错误信息, 计时)"""
+        print(f"[PIPELINE] 执行阶段: {stage['name']}")
+        
+        stage_start = time.time()
+        result, error, cached = None, None, False
+        try:
+            args = [self._resolve_input(stage, name, context) for name in stage['inputs']]
+            owner = getattr(stage['function'], '__self__', None)
+            use_cache = self.cache is not None and stage['cacheable'] and self._is_reproducible(stage)
+            
+            if use_cache:
+                owner_state = owner.export_stage_state() if hasattr(owner, 'export_stage_state') else None
+                upstream = [self.stage_fingerprints.get(dep, '') for dep in stage['dependencies']]
+                key = StageResultCache.make_key(stage['name'], stage['function'], stage['params'],
+                                                upstream, owner_state)
+                cached, entry = self.cache.get(key)
+            
+            if cached:
+                result = entry['result']
+                if entry['owner_state'] is not None and hasattr(owner, 'restore_stage_state'):
+                    owner.restore_stage_state(entry['owner_state'])
+                self.stage_fingerprints[stage['name']] = key
+            else:
+                result = stage['function'](*args, **stage['params'])
+                if use_cache:
+                    # 内容寻址: 缓存阶段的输出由其键唯一确定, 直接以键作为结果指纹
+                    new_state = owner.export_stage_state() if hasattr(owner, 'export_stage_state') else None
+                    try:
+                        self.cache.put(key, {'result': result, 'owner_state': new_state})
+                    except OSError as e:  # 写缓存失败 (如磁盘已满) 不影响阶段结果
+                        print(f"[PIPELINE] 阶段 {stage['name']} 结果写入缓存失败: {e}")
+                    self.stage_fingerprints[stage['name']] = key
+                elif self._feeds_cacheable_stage(stage):
+                    self.stage_fingerprints[stage['name']] = self._fingerprint(result)
+        except Exception as e:
+            error = str(e)
+        
+        stage_end = time.time()
+        timing = {
+            'start': stage_start - pipeline_start,
+            'end': stage_end - pipeline_start,
+            'duration': stage_end - stage_start,
+            'cached': cached
+        }
+        return result, error, timing
+    
+    @staticmethod
+    def _is_reproducible(stage: Dict) -> bool:
+        """接受 seed 参数的阶段只有在 seed 确定时才可缓存, 否则会把一次随机结果固定在缓存中"""
+        try:
+            seed_parameter = inspect.signature(stage['function']).parameters.get('seed')
+        except (TypeError, ValueError):
+            return True
+        if seed_parameter is None:
+            return True
+        return stage['params'].get('seed', seed_parameter.default) not in (None, inspect.Parameter.empty)
+    
+    def _feeds_cacheable_stage(self, stage: Dict) -> bool:
+        """是否有可缓存的下游阶段依赖该阶段 (只有此时才需要计算结果指纹)"""
+        return self.cache is not None and any(
+            other['cacheable'] and stage['name'] in other['dependencies'] for other in self.pipeline_stages
+        )
+    
+    @staticmethod
+    def _fingerprint(result) -> str:
+        """计算阶段结果指纹; 无法序列化的结果使用随机指纹 (下游不会命中缓存)"""
+        try:
+            return hashlib.sha256(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return uuid.uuid4().hex
+    
+    def _critical_path(self, stage_timings: Dict) -> Tuple[List[str], float]:
+        """按各阶段实际用时计算依赖图上的关键路径 (最长加权路径)"""
+        path_length = {}
+        predecessor = {}
+        for level in self._determine_execution_levels():
+            for stage_name in level:
+                stage = self.stage_index[stage_name]
+                best_dep = max(stage['dependencies'], key=lambda d: path_length[d], default=None)
+                upstream = path_length[best_dep] if best_dep is not None else 0.0
+                path_length[stage_name] = upstream + stage_timings.get(stage_name, {}).get('duration', 0.0)
+                predecessor[stage_name] = best_dep
+        
+        if not path_length:
+            return [], 0.0
+        
+        node = max(path_length, key=path_length.get)
+        length = path_length[node]
+        path = []
+        while node is not None:
+            path.append(node)
+            node = predecessor[node]
+        return path[::-1], length
+    
+    def _determine_execution_levels(self) -> List[List[str]]:
+        """确定分层执行顺序: 同一层级中的阶段之间没有依赖关系"""
         executed = set()
         remaining = set(stage['name'] for stage in self.pipeline_stages)
-        execution_order = []
+        execution_levels = []
         
         while remaining:
             ready_stages = []
@@ -137,30 +477,43 @@ class AIPipelineOrchestrator:
                 raise Exception("无法解析依赖关系")
             
             for stage_name in ready_stages:
-                execution_order.append(stage_name)
                 executed.add(stage_name)
                 remaining.remove(stage_name)
+            execution_levels.append(ready_stages)
         
-        return execution_order
+        return execution_levels
+    
+    def _determine_execution_order(self) -> List[str]:
+        """确定执行顺序"""
+        return [stage_name for level in self._determine_execution_levels() for stage_name in level]
 
 
 class AdvancedMLSystem:
     """高级机器学习系统 - 展示AI工程师的模型工程能力"""
     
-    def __init__(self, n_features: int = 3):
+    # 会修改模型参数的阶段, 流水线使其失效时需要重置训练状态
+    TRAINING_STAGES = ('model_training_stage', 'streaming_training_stage')
+    
+    def __init__(self, n_features: int = 3, solver: str = 'gd', monitoring_capacity: int = 4096,
+                 n_workers: int = 1, history_path: Optional[str] = None, snapshot_every: int = 10):
+        ml_engine.validate_solver(solver)
+        if n_workers < 1:
+            raise ValueError("工作进程数必须为正整数")
         self.n_features = n_features
+        self.solver = solver
+        self.n_workers = n_workers
         self.weights = [random.uniform(-0.01, 0.01) for _ in range(n_features)]
         self.bias = 0.0
         self.feature_scalers = [{'mean': 0.0, 'std': 1.0} for _ in range(n_features)]
         self.is_trained = False
         self.training_history = []
+        # 指定 history_path 时梯度下降训练逐轮写入二进制训练历史, 训练后 training_history 为其只读映射
+        self.history_path = history_path
+        self.snapshot_every = snapshot_every
         self.validation_results = {}
         self.model_id = self._generate_model_id()
-        self.performance_monitoring = {
-            'latency_samples': [],
-            'throughput_samples': [],
-            'accuracy_samples': []
-        }
+        self.performance_monitoring = PerformanceMonitor(monitoring_capacity)
+        self.feature_transformer: Optional[FeatureTransformer] = None
         
     def _generate_model_id(self) -> str:
         """生成唯一模型ID"""
@@ -168,85 +521,94 @@ class AdvancedMLSystem:
         hash_input = f"{timestamp}_{self.n_features}".encode()
         return f"sys_model_{hashlib.md5(hash_input).hexdigest()[:12]}"
     
-    def data_ingestion_stage(self) -> Tuple[List[List[float]], List[float]]:
-        """数据摄取阶段"""
+    def export_stage_state(self) -> Dict:
+        """导出阶段执行会修改的状态 (供流水线缓存命中时恢复)"""
+        return {
+            'n_features': self.n_features,
+            'feature_scalers': [dict(scaler) for scaler in self.feature_scalers],
+            'feature_transformer': self.feature_transformer.to_dict() if self.feature_transformer else None
+        }
+    
+    def restore_stage_state(self, state: Dict):
+        """恢复阶段状态"""
+        self.n_features = state['n_features']
+        self.feature_scalers = [dict(scaler) for scaler in state['feature_scalers']]
+        transformer_state = state.get('feature_transformer')
+        self.feature_transformer = FeatureTransformer.from_dict(transformer_state) if transformer_state else None
+    
+    def reset_stage_state(self, stage_function_name: str):
+        """流水线使训练阶段失效时调用: 丢弃已训练的参数, 重新执行时从新的初始权重开始训练"""
+        if stage_function_name not in self.TRAINING_STAGES:
+            return
+        self.weights = [random.uniform(-0.01, 0.01) for _ in range(self.n_features)]
+        self.bias = 0.0
+        self.is_trained = False
+        if hasattr(self, 'optimizer'):
+            self.optimizer = None
+    
+    def data_ingestion_stage(self, n_samples: int = 2000, seed: Optional[int] = None,
+                             source: Optional[str] = None) -> Tuple:
+        """
+        数据摄取阶段 (目标为线性 + 交互项关系加噪声, 模拟真实世界数据; 指定 seed 时结果可复现)
+        source 为列式数据文件路径时改为内存映射读取, 特征为文件上的零拷贝视图
+        """
         print(f"[ML-SYSTEM] 执行数据摄取...")
         
-        n_samples = 2000
-        features = []
-        targets = []
+        if source is not None:
+            data_file = ColumnarFile(source)
+            if data_file.n_columns - 1 != self.n_features:
+                raise ValueError(f"数据文件特征数 {data_file.n_columns - 1} 与模型特征数 {self.n_features} 不一致")
+            print(f"[ML-SYSTEM] 数据摄取完成: {data_file.n_rows} 样本, {self.n_features} 特征 (映射自 {source})")
+            return data_file.features, data_file.targets
         
-        for i in range(n_samples):
-            row = [random.gauss(0, 1) for _ in range(self.n_features)]
-            features.append(row)
-            
-            # 复杂的目标生成 (模拟真实世界关系)
-            target = (3 * row[0] + 2 * row[1] - row[2] + 
-                     0.5 * row[0] * row[1] +  # 交互项
-                     0.1 * random.gauss(0, 1))  # 噪声
-            targets.append(target)
+        generator = SyntheticDataGenerator(n_samples, self.n_features, 'interaction', seed=seed)
+        features, targets = generator.to_dataset()
         
         print(f"[ML-SYSTEM] 数据摄取完成: {n_samples} 样本, {self.n_features} 特征")
-        return features, targets
+        return features.tolist(), targets.tolist()
     
-    def feature_engineering_stage(self, raw_data: Tuple) -> Tuple[List[List[float]], List[float]]:
-        """特征工程阶段"""
+    def feature_engineering_stage(self, raw_data: Tuple) -> Tuple[ColumnarDataset, List[float]]:
+        """特征工程阶段 (拟合后的变换器保存在 self.feature_transformer, 推理时对原始特征做同样的展开)"""
         print(f"[ML-SYSTEM] 执行特征工程...")
         
         features, targets = raw_data
         
-        # 特征变换：添加多项式特征
-        enhanced_features = []
-        for row in features:
-            enhanced_row = row[:]  # 原始特征
-            
-            # 添加交互特征
-            enhanced_row.extend([
-                row[0] * row[1],  # 特征交互
-                row[0] * row[2],
-                row[1] * row[2],
-                row[0] ** 2,      # 多项式特征
-                row[1] ** 2,
-                row[2] ** 2
-            ])
-            enhanced_features.append(enhanced_row)
+        # 特征变换：添加交互特征与多项式特征
+        self.feature_transformer = FeatureTransformer(FeatureTransformSpec(product_terms=INTERACTION_TERMS))
+        enhanced_features = self.feature_transformer.fit_transform(features)
         
         # 更新特征数量
-        self.n_features = len(enhanced_features[0])
+        self.n_features = enhanced_features.n_columns
         self.feature_scalers = [{'mean': 0.0, 'std': 1.0} for _ in range(self.n_features)]
         
         print(f"[ML-SYSTEM] 特征工程完成: {len(enhanced_features)} 样本, {self.n_features} 增强特征")
         return enhanced_features, targets
     
-    def data_preprocessing_stage(self, features_targets: Tuple) -> Tuple[List[List[float]], List[float]]:
-        """数据预处理阶段"""
+    def data_preprocessing_stage(self, features_targets: Tuple) -> Tuple[ColumnarDataset, List[float]]:
+        """数据预处理阶段 (输出列式数据集, 按列计算缩放参数并原地缩放)"""
         print(f"[ML-SYSTEM] 执行数据预处理...")
         
         features, targets = features_targets
+        scaled_features = ColumnarDataset.from_rows(features, self.n_features)
         
-        # 计算缩放参数
-        for j in range(self.n_features):
-            col_values = [features[i][j] for i in range(len(features))]
-            mean_val = sum(col_values) / len(col_values)
-            variance = sum((x - mean_val)**2 for x in col_values) / len(col_values)
-            std_val = math.sqrt(max(variance, 1e-8))
-            
+        # 单遍计算缩放参数
+        moments = StreamingMoments.from_data(scaled_features)
+        for j, (mean_val, variance) in enumerate(zip(moments.mean, moments.variance())):
             self.feature_scalers[j]['mean'] = mean_val
-            self.feature_scalers[j]['std'] = std_val
+            self.feature_scalers[j]['std'] = math.sqrt(max(variance, 1e-8))
         
         # 应用缩放
-        scaled_features = []
-        for i in range(len(features)):
-            row = [(features[i][j] - self.feature_scalers[j]['mean']) / self.feature_scalers[j]['std'] 
-                   for j in range(self.n_features)]
-            scaled_features.append(row)
+        scaled_features.standardize([scaler['mean'] for scaler in self.feature_scalers],
+                                    [scaler['std'] for scaler in self.feature_scalers])
         
         print(f"[ML-SYSTEM] 数据预处理完成")
         return scaled_features, targets
     
-    def model_training_stage(self, processed_data: Tuple) -> Dict:
-        """模型训练阶段"""
-        print(f"[ML-SYSTEM] 执行模型训练...")
+    def model_training_stage(self, processed_data: Tuple, solver: Optional[str] = None) -> Dict:
+        """模型训练阶段 (solver 未指定时使用构造时的求解器)"""
+        solver = solver or self.solver
+        ml_engine.validate_solver(solver)
+        print(f"[ML-SYSTEM] 执行模型训练... (求解器: {solver})")
         
         features, targets = processed_data
         
@@ -261,6 +623,13 @@ class AdvancedMLSystem:
         val_features = features[split_idx:]
         val_targets = targets[split_idx:]
         
+        if solver != 'gd':
+            return self._closed_form_training(train_features, train_targets,
+                                              val_features, val_targets, solver)
+        if self.n_workers > 1:
+            return self._data_parallel_training(train_features, train_targets,
+                                                val_features, val_targets)
+        
         # 使用更复杂的优化算法
         learning_rate = 0.01
         epochs = 300
@@ -269,49 +638,49 @@ class AdvancedMLSystem:
         patience_counter = 0
         
         start_time = time.time()
-        
-        for epoch in range(epochs):
-            # 前向传播
-            predictions = []
-            for row in train_features:
-                pred = sum(self.weights[i] * row[i] for i in range(len(row))) + self.bias
-                predictions.append(pred)
-            
-            # 计算梯度
-            n_samples = len(train_features)
-            weight_gradients = [0.0] * self.n_features
-            bias_gradient = 0.0
-            
-            for i in range(n_samples):
-                error = predictions[i] - train_targets[i]
-                for j in range(self.n_features):
-                    weight_gradients[j] += error * train_features[i][j]
-                bias_gradient += error
-            
-            # 更新参数
-            for j in range(self.n_features):
-                self.weights[j] -= learning_rate * weight_gradients[j] / n_samples
-            self.bias -= learning_rate * bias_gradient / n_samples
-            
-            # 验证损失
-            val_predictions = [sum(self.weights[i] * row[i] for i in range(len(row))) + self.bias 
-                              for row in val_features]
-            val_loss = sum((val_predictions[i] - val_targets[i])**2 for i in range(len(val_targets))) / len(val_targets)
-            
-            # 早停
-            if val_loss < best_val_loss:
-                best_val_loss = val_loss
-                patience_counter = 0
-            else:
-                patience_counter += 1
-            
-            if patience_counter >= patience:
-                print(f"[ML-SYSTEM] 早停触发，最佳验证损失: {best_val_loss:.6f}")
-                break
-            
-            if epoch % 50 == 0:
-                train_loss = sum((predictions[i] - train_targets[i])**2 for i in range(len(train_targets))) / len(train_targets)
-                print(f"[ML-SYSTEM] Epoch {epoch}: Train Loss = {train_loss:.6f}, Val Loss = {val_loss:.6f}")
+        history = self._open_training_history()
+        
+        # 按列计算: 每列是连续的 float64 缓冲区
+        if not isinstance(train_features, ColumnarDataset):
+            train_features = ColumnarDataset.from_rows(train_features, self.n_features)
+            val_features = ColumnarDataset.from_rows(val_features, self.n_features)
+        train_columns = train_features.columns()
+        n_samples = len(train_features)
+        
+        try:
+            for epoch in range(epochs):
+                # 前向传播
+                predictions = train_features.dot(self.weights, self.bias)
+                
+                # 计算梯度并更新参数
+                errors = list(map(operator.sub, predictions, train_targets))
+                for j, column in enumerate(train_columns):
+                    self.weights[j] -= learning_rate * sum(map(operator.mul, errors, column)) / n_samples
+                self.bias -= learning_rate * sum(errors) / n_samples
+                
+                # 验证损失
+                val_predictions = val_features.dot(self.weights, self.bias)
+                val_loss = sum((val_predictions[i] - val_targets[i])**2 for i in range(len(val_targets))) / len(val_targets)
+                
+                # 早停
+                if val_loss < best_val_loss:
+                    best_val_loss = val_loss
+                    patience_counter = 0
+                else:
+                    patience_counter += 1
+                
+                if patience_counter >= patience:
+                    print(f"[ML-SYSTEM] 早停触发，最佳验证损失: {best_val_loss:.6f}")
+                    break
+                
+                if history is not None or epoch % 50 == 0:
+                    train_loss = sum(map(operator.mul, errors, errors)) / n_samples
+                    if history is not None:
+                        history.record(epoch, train_loss, val_loss, self.weights, bias=self.bias)
+                    if epoch % 50 == 0:
+                        print(f"[ML-SYSTEM] Epoch {epoch}: Train Loss = {train_loss:.6f}, Val Loss = {val_loss:.6f}")
+        finally:
+            self._close_training_history(history)
         
         training_time = time.time() - start_time
         self.is_trained = True
@@ -324,11 +693,113 @@ class AdvancedMLSystem:
             'final_weights': self.weights[:],
             'final_bias': self.bias,
             'epochs_run': epoch + 1,
-            'best_validation_loss': best_val_loss
+            'best_validation_loss': best_val_loss,
+            'solver': solver
+        }
+    
+    def streaming_training_stage(self, batch_source, epochs: int = 1,
+                                 learning_rate: float = 0.01, algorithm: str = 'sgd') -> Dict:
+        """流式训练阶段 - 逐批增量更新权重 (批次需已完成特征工程与缩放)"""
+        print(f"[ML-SYSTEM] 执行流式模型训练...")
+        
+        start_time = time.time()
+        trainer = ml_engine.StreamingLinearTrainer(
+            self.weights if len(self.weights) == self.n_features else None, self.bias,
+            learning_rate=learning_rate, algorithm=algorithm)
+        summary = trainer.fit(batch_source, epochs=epochs)
+        
+        self.weights = trainer.weights
+        self.bias = trainer.bias
+        self.n_features = len(self.weights)
+        self.is_trained = True
+        training_time = time.time() - start_time
+        
+        print(f"[ML-SYSTEM] 流式训练完成! 用时: {training_time:.2f}s, 样本数: {summary['samples_seen']}")
+        
+        return {
+            'training_time': training_time,
+            'final_weights': self.weights[:],
+            'final_bias': self.bias,
+            'epochs_run': summary['epochs_run'],
+            'batches_processed': summary['steps'],
+            'samples_seen': summary['samples_seen'],
+            'final_training_loss': summary['epoch_losses'][-1]
         }
     
-    def model_evaluation_stage(self, processed_data: Tuple) -> Dict:
-        """模型评估阶段"""
+    def _open_training_history(self) -> Optional[TrainingHistoryWriter]:
+        if self.history_path is None:
+            return None
+        return TrainingHistoryWriter(self.history_path, self.n_features + 1, self.snapshot_every)
+    
+    def _close_training_history(self, history: Optional[TrainingHistoryWriter]):
+        if history is not None:
+            history.close()
+            self.training_history = TrainingHistory(history.path)
+    
+    def _data_parallel_training(self, train_features, train_targets,
+                                val_features, val_targets) -> Dict:
+        """数据并行全量梯度下降 (超参数与单进程训练一致, 结果相同)"""
+        def log_epoch(epoch, train_loss, val_loss):
+            if epoch % 50 == 0:
+                print(f"[ML-SYSTEM] Epoch {epoch}: Train Loss = {train_loss:.6f}, Val Loss = {val_loss:.6f}")
+        
+        start_time = time.time()
+        history = self._open_training_history()
+        try:
+            with DataParallelTrainer(train_features, train_targets, n_workers=self.n_workers) as trainer:
+                outcome = trainer.train(self.weights, self.bias, val_features, val_targets,
+                                        algorithm='sgd', learning_rate=0.01, epochs=300,
+                                        early_stopping_patience=20, on_epoch=log_epoch, history=history)
+        finally:
+            self._close_training_history(history)
+        training_time = time.time() - start_time
+        
+        self.weights = outcome['weights']
+        self.bias = outcome['bias']
+        self.is_trained = True
+        if outcome['early_stopped']:
+            print(f"[ML-SYSTEM] 早停触发，最佳验证损失: {outcome['best_validation_loss']:.6f}")
+        print(f"[ML-SYSTEM] 模型训练完成 (数据并行, {self.n_workers} 进程)! 用时: {training_time:.2f}s")
+        print(f"[ML-SYSTEM] 最终权重: {[round(w, 4) for w in self.weights[:5]]}...")
+        
+        return {
+            'training_time': training_time,
+            'final_weights': self.weights[:],
+            'final_bias': self.bias,
+            'epochs_run': outcome['epochs_run'],
+            'best_validation_loss': outcome['best_validation_loss'],
+            'solver': 'gd',
+            'n_workers': self.n_workers
+        }
+    
+    def _closed_form_training(self, train_features, train_targets,
+                              val_features, val_targets, solver: str) -> Dict:
+        """闭式求解训练 (一次求得最小二乘解)"""
+        start_time = time.time()
+        
+        self.weights, self.bias = ml_engine.solve_least_squares(train_features, train_targets, method=solver)
+        
+        val_predictions = [sum(self.weights[i] * row[i] for i in range(len(row))) + self.bias 
+                          for row in val_features]
+        val_loss = sum((val_predictions[i] - val_targets[i])**2 for i in range(len(val_targets))) / len(val_targets)
+        
+        training_time = time.time() - start_time
+        self.is_trained = True
+        
+        print(f"[ML-SYSTEM] 模型训练完成 (闭式解: {solver})! 用时: {training_time:.2f}s, 验证损失: {val_loss:.6f}")
+        print(f"[ML-SYSTEM] 最终权重: {[round(w, 4) for w in self.weights[:5]]}...")
+        
+        return {
+            'training_time': training_time,
+            'final_weights': self.weights[:],
+            'final_bias': self.bias,
+            'epochs_run': 1,
+            'best_validation_loss': val_loss,
+            'solver': solver
+        }
+    
+    def model_evaluation_stage(self, processed_data: Tuple, chunk_size: int = 65536) -> Dict:
+        """模型评估阶段 (按 chunk_size 分块预测)"""
         print(f"[ML-SYSTEM] 执行模型评估...")
         
         # 从处理后的数据中分离出测试集
@@ -349,34 +820,12 @@ class AdvancedMLSystem:
             test_features = features[-test_size:]
             test_targets = targets[-test_size:]
         
-        predictions = self.predict_batch(test_features)
-        
-        n = len(test_targets)
-        
-        # 计算评估指标
-        mse = sum((predictions[i] - test_targets[i])**2 for i in range(n)) / n
-        rmse = math.sqrt(mse)
-        mae = sum(abs(predictions[i] - test_targets[i]) for i in range(n)) / n
-        
-        mean_target = sum(test_targets) / n
-        ss_tot = sum((test_targets[i] - mean_target)**2 for i in range(n))
-        ss_res = sum((test_targets[i] - predictions[i])**2 for i in range(n))
-        r2 = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0
-        
-        # 计算其他统计指标
-        residuals = [predictions[i] - test_targets[i] for i in range(n)]
-        residual_mean = sum(residuals) / n
-        residual_std = math.sqrt(sum((r - residual_mean)**2 for r in residuals) / n)
-        
-        evaluation_metrics = {
-            'mse': mse,
-            'rmse': rmse,
-            'mae': mae,
-            'r2': r2,
-            'residual_mean': residual_mean,
-            'residual_std': residual_std,
-            'n_samples': n
-        }
+        # 按块预测并单遍累计指标, 不保留完整的预测列表
+        metrics = evaluate_in_chunks(self.predict_batch, test_features, test_targets, chunk_size).result()
+        mse, rmse, mae, r2, n = (metrics[key] for key in ('mse', 'rmse', 'mae', 'r2', 'n_samples'))
+        
+        evaluation_metrics = {key: metrics[key] for key in
+                              ('mse', 'rmse', 'mae', 'r2', 'residual_mean', 'residual_std', 'n_samples')}
         
         print(f"[ML-SYSTEM] 评估结果:")
         print(f"  MSE: {mse:.6f}")
@@ -392,19 +841,17 @@ class AdvancedMLSystem:
         if not self.is_trained:
             raise ValueError("模型未训练，请先调用训练方法")
         
-        start_time = time.time()
-        predictions = []
-        
-        for row in features:
-            pred = sum(self.weights[i] * row[i] for i in range(len(row))) + self.bias
-            predictions.append(pred)
-        
-        latency = time.time() - start_time
-        throughput = len(features) / latency if latency > 0 else float('inf')
+        start_time = time.perf_counter()
+        if isinstance(features, ColumnarDataset):
+            predictions = features.dot(self.weights, self.bias)
+        else:
+            predictions = []
+            for row in features:
+                pred = sum(self.weights[i] * row[i] for i in range(len(row))) + self.bias
+                predictions.append(pred)
         
-        # 记录性能指标
-        self.performance_monitoring['latency_samples'].append(latency)
-        self.performance_monitoring['throughput_samples'].append(throughput)
+        # 记录性能指标 (固定内存的环形缓冲区与直方图)
+        self.performance_monitoring.record_batch(time.perf_counter() - start_time, len(features))
         
         return predictions
     
@@ -415,6 +862,29 @@ class AdvancedMLSystem:
         
         prediction = sum(self.weights[i] * features[i] for i in range(len(features))) + self.bias
         return prediction
+    
+    def predict_raw(self, raw_features) -> List[float]:
+        """对原始特征预测: 先按训练时拟合的特征变换器展开, 再按预处理缩放参数缩放"""
+        if self.feature_transformer is None:
+            raise ValueError("模型没有特征变换器, 请直接使用 predict_batch")
+        features = self.feature_transformer.transform(raw_features)
+        features.standardize([scaler['mean'] for scaler in self.feature_scalers],
+                             [scaler['std'] for scaler in self.feature_scalers])
+        return self.predict_batch(features)
+    
+    def compile_predictor(self, fold_scaler: bool = True) -> CompiledPredictor:
+        """
+        生成冻结的推理对象
+        fold_scaler=True 时把预处理阶段的缩放参数折叠进权重, 预测器直接接收未缩放的特征
+        """
+        if not self.is_trained:
+            raise ValueError("模型未训练，请先调用训练方法")
+        
+        if not fold_scaler:
+            return CompiledPredictor(self.weights, self.bias)
+        return CompiledPredictor(self.weights, self.bias,
+                                 [scaler['mean'] for scaler in self.feature_scalers],
+                                 [scaler['std'] for scaler in self.feature_scalers])
 
 
 class AIEthicsAndGovernance:
@@ -429,13 +899,20 @@ class AIEthicsAndGovernance:
             'AI_ACT': False,
             'ISO_23053': False
         }
+    
+    @staticmethod
+    def _predict(model: AdvancedMLSystem, features) -> List[float]:
+        """对摄取阶段的数据预测; 列式原始特征 (如映射自数据文件) 先按模型的特征变换与缩放参数展开"""
+        if isinstance(features, ColumnarDataset) and features.n_columns != model.n_features:
+            return model.predict_raw(features)
+        return model.predict_batch(features)
         
     def fairness_analysis_stage(self, model: AdvancedMLSystem, test_data: Tuple) -> Dict:
         """公平性分析"""
         print(f"[ETHICS] 执行公平性分析...")
         
         features, targets = test_data
-        predictions = model.predict_batch(features)
+        predictions = self._predict(model, features)
         
         # 模拟敏感属性分析 (假设第0个特征为敏感属性)
         protected_groups = {}
@@ -489,7 +966,7 @@ class AIEthicsAndGovernance:
         
         # 简单的成员推理攻击风险评估
         # 检查模型在训练数据上的表现是否显著优于测试数据
-        train_predictions = model.predict_batch(features[:200])  # 用部分训练数据
+        train_predictions = self._predict(model, features[:200])  # 用部分训练数据
         train_targets_subset = targets[:200]
         
         # 计算训练数据上的误差
@@ -546,22 +1023,27 @@ def main():
     print("="*80)
     
     # 创建系统组件
-    orchestrator = AIPipelineOrchestrator()
+    orchestrator = AIPipelineOrchestrator(cache=StageResultCache())
     ml_system = AdvancedMLSystem(n_features=3)
     ethics_governance = AIEthicsAndGovernance()
     
-    # 构建AI流水线
-    orchestrator.add_stage('data_ingestion', ml_system.data_ingestion_stage)
-    orchestrator.add_stage('feature_engineering', ml_system.feature_engineering_stage, ['data_ingestion'])
-    orchestrator.add_stage('data_preprocessing', ml_system.data_preprocessing_stage, ['feature_engineering'])
+    # 构建AI流水线 (数据准备阶段的结果可缓存复用)
+    orchestrator.add_stage('data_ingestion', ml_system.data_ingestion_stage, params={'seed': 42}, cacheable=True)
+    orchestrator.add_stage('feature_engineering', ml_system.feature_engineering_stage, ['data_ingestion'], cacheable=True)
+    orchestrator.add_stage('data_preprocessing', ml_system.data_preprocessing_stage, ['feature_engineering'], cacheable=True)
     orchestrator.add_stage('model_training', ml_system.model_training_stage, ['data_preprocessing'])
-    orchestrator.add_stage('model_evaluation', ml_system.model_evaluation_stage, ['data_preprocessing'])  # 评估依赖于预处理数据
-    orchestrator.add_stage('fairness_analysis', ethics_governance.fairness_analysis_stage, ['data_ingestion', 'model_training'])  # 需要模型训练完成后
-    orchestrator.add_stage('privacy_analysis', ethics_governance.privacy_analysis_stage, ['data_ingestion', 'model_training'])  # 需要模型训练完成后
-    orchestrator.add_stage('audit_compliance', ethics_governance.audit_and_compliance_stage, ['model_evaluation'])
+    orchestrator.add_stage('model_evaluation', ml_system.model_evaluation_stage, ['data_preprocessing', 'model_training'],
+                           inputs=['data_preprocessing'])  # 评估需要预处理数据和训练好的模型
+    orchestrator.add_stage('fairness_analysis', ethics_governance.fairness_analysis_stage, ['data_ingestion', 'model_training'],
+                           inputs=['ml_system', 'data_ingestion'])  # 需要模型训练完成后
+    orchestrator.add_stage('privacy_analysis', ethics_governance.privacy_analysis_stage, ['data_ingestion', 'model_training'],
+                           inputs=['ml_system', 'data_ingestion'])  # 需要模型训练完成后
+    orchestrator.add_stage('audit_compliance', ethics_governance.audit_and_compliance_stage, ['model_evaluation'],
+                           inputs=['ml_system', 'model_evaluation'],
+                           optional_inputs=['model_evaluation'])  # 评估失败时仍出具审计记录
     
     # 执行流水线
-    pipeline_results = orchestrator.execute_pipeline(ml_system, ethics_governance)
+    pipeline_results = orchestrator.execute_pipeline(ml_system, ethics_governance, executor='thread')
     
     # 提取关键结果
     eval_results = pipeline_results['stage_results'].get('model_evaluation', {})
@@ -575,6 +1057,7 @@ def main():
     print("="*80)
     print(f"模型ID: {ml_system.model_id}")
     print(f"流水线总执行时间: {pipeline_results['total_execution_time']:.2f}s")
+    print(f"关键路径长度: {pipeline_results['critical_path_length']:.2f}s")
     print(f"成功执行阶段数: {pipeline_results['stages_completed']}")
     print(f"失败阶段数: {pipeline_results['stages_failed']}")
     print()
@@ -582,6 +1065,8 @@ def main():
     print(f"  R² 得分: {eval_results.get('r2', 0):.4f}")
     print(f"  RMSE: {eval_results.get('rmse', 0):.4f}")
     print(f"  MAE: {eval_results.get('mae', 0):.4f}")
+    latency = ml_system.performance_monitoring.latency_percentiles()
+    print(f"  预测延迟 p50/p95/p99: {latency['p50'] * 1000:.3f}/{latency['p95'] * 1000:.3f}/{latency['p99'] * 1000:.3f} ms")
     print()
     print("公平性指标:")
     print(f"  预测差异: {fairness_results.get('prediction_disparity', 0):.4f}")
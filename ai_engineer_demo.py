@@ -11,6 +11,20 @@ import json
 import hashlib
 from datetime import datetime
 
+import ml_engine
+from ml_artifacts import artifact_signature, write_model_artifact
+from ml_dataset import ColumnarDataset
+from ml_explain import global_feature_importance, iter_explanations, write_explanations
+from ml_fairness import grouped_fairness_statistics
+from ml_features import FeatureTransformer, FeatureTransformSpec
+from ml_history import TrainingHistory, TrainingHistoryWriter
+from ml_optimizers import optimizer_for_training, optimizer_from_state
+from ml_parallel import DataParallelTrainer
+from ml_registry import ModelRegistry
+from ml_statistics import StreamingMoments, evaluate_in_chunks
+from ml_storage import ColumnarFile, write_dataset
+from ml_synthetic import SyntheticDataGenerator
+
 
 class AICapabilityFramework:
     """AI能力框架 - 统一展示AI工程师的各项技能"""
@@ -92,151 +106,82 @@ class DataEngineeringSuite:
         self.etl_pipelines = []
         self.data_quality_checks = []
         self.feature_store = {}
+        self.feature_transformer = None
+        self.data_sources = {}  # 路径 -> 已映射的列式数据文件
         
     def create_synthetic_dataset(self, 
                                n_samples: int = 10000, 
                                n_features: int = 20,
-                               complexity_level: str = 'high') -> Tuple[List[List[float]], List[float]]:
-        """创建复杂合成数据集"""
+                               complexity_level: str = 'high',
+                               seed: Optional[int] = None) -> Tuple[List[List[float]], List[float]]:
+        """
+        创建复杂合成数据集 (分块向量化生成, 指定 seed 时结果可复现)
+        complexity_level: 'high' 非线性关系与特征交互 / 'medium' / 其他取值为低复杂度线性关系
+        超大数据集请直接使用 ml_synthetic.SyntheticDataGenerator 逐块生成或写入文件
+        """
         print(f"[DATA-ENGINEERING] 生成 {n_samples} 样本 x {n_features} 特征的合成数据集...")
         
-        features = []
-        targets = []
-        
-        # 定义复杂的数据生成模式
-        for i in range(n_samples):
-            # 基础特征
-            base_features = [random.gauss(0, 1) for _ in range(n_features)]
-            
-            # 根据复杂程度应用不同的变换
-            if complexity_level == 'high':
-                # 高复杂度：非线性关系、特征交互、噪声
-                target = (
-                    2.5 * base_features[0] + 
-                    1.8 * base_features[1] * base_features[2] +  # 交互项
-                    0.9 * base_features[3]**2 +  # 二次项
-                    -0.7 * base_features[4] +
-                    0.4 * base_features[5] * base_features[6] +
-                    0.2 * base_features[7] * base_features[8] * base_features[9] +  # 三阶交互
-                    0.3 * math.sin(base_features[10]) +  # 非线性变换
-                    0.2 * math.cos(base_features[11]) +
-                    -0.5 * base_features[12] +
-                    0.1 * base_features[13] +
-                    0.25 * base_features[14] +
-                    -0.3 * base_features[15] +
-                    0.15 * base_features[16] +
-                    0.1 * base_features[17] +
-                    -0.2 * base_features[18] +
-                    0.05 * base_features[19] +
-                    0.15 * random.gauss(0, 1)  # 添加噪声
-                )
-            elif complexity_level == 'medium':
-                # 中等复杂度
-                target = (
-                    2 * base_features[0] + 
-                    1.5 * base_features[1] * base_features[2] +
-                    0.8 * base_features[3]**2 +
-                    -0.5 * base_features[4] +
-                    0.3 * base_features[5] * base_features[6] +
-                    0.1 * base_features[7] +
-                    0.2 * base_features[8] +
-                    -0.4 * base_features[9] +
-                    0.2 * random.gauss(0, 1)
-                )
-            else:
-                # 低复杂度
-                target = (
-                    2 * base_features[0] + 
-                    1.5 * base_features[1] +
-                    -0.5 * base_features[2] +
-                    0.8 * base_features[3] +
-                    0.3 * random.gauss(0, 1)
-                )
-            
-            features.append(base_features)
-            targets.append(target)
+        complexity = complexity_level if complexity_level in ('high', 'medium') else 'low'
+        generator = SyntheticDataGenerator(n_samples, n_features, complexity, seed=seed)
+        features, targets = generator.to_dataset()
         
         print(f"[DATA-ENGINEERING] 数据集生成完成: {n_samples} 样本, {n_features} 特征")
-        return features, targets
+        return features.tolist(), targets.tolist()
     
-    def advanced_feature_engineering(self, features: List[List[float]]) -> List[List[float]]:
-        """高级特征工程"""
+    def save_dataset(self, path: str, features, targets,
+                     column_names: Optional[List[str]] = None) -> Dict:
+        """把数据集写入列式数据文件 (头部含各列统计量), 返回文件头部"""
+        header = write_dataset(path, features, targets, column_names)
+        print(f"[DATA-ENGINEERING] 数据集已保存: {path} ({header['n_rows']} 样本, {header['n_columns'] - 1} 特征)")
+        return header
+    
+    def load_dataset(self, path: str) -> Tuple[ColumnarDataset, List[float]]:
+        """
+        以内存映射方式打开列式数据文件, 返回 (特征的零拷贝视图, 目标)
+        文件按需分页读取; 特征视图可直接用于特征工程、质量评估与训练, 传给其他进程时只传递文件路径
+        """
+        data_file = ColumnarFile(path)
+        self.data_sources[path] = data_file
+        print(f"[DATA-ENGINEERING] 已映射数据集: {path} ({data_file.n_rows} 样本, {data_file.n_columns - 1} 特征)")
+        return data_file.features, data_file.targets
+    
+    def advanced_feature_engineering(self, features: List[List[float]],
+                                     spec: Optional[FeatureTransformSpec] = None,
+                                     chunk_size: Optional[int] = None) -> ColumnarDataset:
+        """
+        高级特征工程 (标准化 + 二次项 + 三角函数 + 行统计)
+        spec 为空时使用默认特征集合; 拟合后的变换器保存在 self.feature_transformer, 用于以相同的统计量变换新数据
+        """
         print(f"[FEATURE-ENGINEERING] 执行高级特征工程...")
         
         n_original_features = len(features[0])
+        spec = spec or FeatureTransformSpec.advanced_default()
+        dataset = ColumnarDataset.from_rows(features, n_original_features)
+        self.feature_transformer = FeatureTransformer(spec).fit(dataset)
+        enhanced_features = self.feature_transformer.transform(dataset, chunk_size=chunk_size)
         
-        # 特征标准化
-        means = [0.0] * n_original_features
-        stds = [0.0] * n_original_features
-        
-        for j in range(n_original_features):
-            col_sum = sum(features[i][j] for i in range(len(features)))
-            means[j] = col_sum / len(features)
-        
-        for j in range(n_original_features):
-            col_var = sum((features[i][j] - means[j])**2 for i in range(len(features))) / len(features)
-            stds[j] = math.sqrt(col_var) if col_var > 0 else 1
-        
-        standardized_features = []
-        for i in range(len(features)):
-            row = [(features[i][j] - means[j]) / stds[j] for j in range(n_original_features)]
-            standardized_features.append(row)
-        
-        # 高级特征构造
-        enhanced_features = []
-        for row in standardized_features:
-            enhanced_row = row[:]  # 原始特征
-            
-            # 多项式特征 (二次)
-            for j1 in range(min(5, len(row))):  # 限制数量以控制维度
-                for j2 in range(j1, min(5, len(row))):
-                    enhanced_row.append(row[j1] * row[j2])
-            
-            # 三角函数特征
-            enhanced_row.extend([
-                math.sin(row[0]), math.cos(row[0]),
-                math.sin(row[1]), math.cos(row[1]),
-                math.tanh(row[2])
-            ])
-            
-            # 统计特征
-            enhanced_row.extend([
-                sum(row[:5]) / 5,  # 前5个特征的均值
-                max(row[:5]),       # 前5个特征的最大值
-                min(row[:5]),       # 前5个特征的最小值
-                math.sqrt(sum(x**2 for x in row[:5]) / 5)  # RMS
-            ])
-            
-            enhanced_features.append(enhanced_row)
-        
-        n_enhanced_features = len(enhanced_features[0])
+        n_enhanced_features = enhanced_features.n_columns
         print(f"[FEATURE-ENGINEERING] 特征增强完成: 从 {n_original_features} 个特征扩展到 {n_enhanced_features} 个特征")
         return enhanced_features
     
-    def data_quality_assessment(self, features: List[List[float]], targets: List[float]) -> Dict:
-        """数据质量评估"""
+    def data_quality_assessment(self, features: List[List[float]], targets: List[float],
+                                chunk_size: Optional[int] = None) -> Dict:
+        """数据质量评估 (指定 chunk_size 时分块统计, 适用于超出内存的数据)"""
         print(f"[DATA-QUALITY] 执行数据质量评估...")
         
         n_samples = len(features)
         n_features = len(features[0]) if features else 0
         
-        # 缺失值检查
-        missing_values = 0
-        for row in features:
-            for val in row:
-                if math.isnan(val) or math.isinf(val):
-                    missing_values += 1
+        # 单遍流式统计: 缺失值 (NaN/Inf) 计数与各特征矩统计同时完成
+        moments = StreamingMoments.from_data(features, chunk_size=chunk_size)
+        missing_values = moments.total_nonfinite
+        feature_means = moments.mean
+        feature_stds = moments.std()
         
         # 目标变量统计
-        target_mean = sum(targets) / len(targets) if targets else 0
-        target_std = math.sqrt(sum((t - target_mean)**2 for t in targets) / len(targets)) if targets else 0
-        
-        # 特征统计
-        feature_means = [sum(features[i][j] for i in range(n_samples)) / n_samples for j in range(n_features)] if n_features > 0 else []
-        feature_stds = []
-        for j in range(n_features):
-            var = sum((features[i][j] - feature_means[j])**2 for i in range(n_samples)) / n_samples
-            feature_stds.append(math.sqrt(var))
+        target_moments = StreamingMoments.from_values(targets) if targets else None
+        target_mean = target_moments.mean[0] if targets else 0
+        target_std = target_moments.std()[0] if targets else 0
         
         quality_metrics = {
             'n_samples': n_samples,
@@ -246,8 +191,8 @@ class DataEngineeringSuite:
             'target_statistics': {
                 'mean': target_mean,
                 'std': target_std,
-                'min': min(targets) if targets else 0,
-                'max': max(targets) if targets else 0
+                'min': target_moments.min[0] if targets else 0,
+                'max': target_moments.max[0] if targets else 0
             },
             'feature_statistics': {
                 'mean_range': (min(feature_means) if feature_means else 0, max(feature_means) if feature_means else 0),
@@ -273,6 +218,8 @@ class MachineLearningWorkbench:
         self.model_id = self._generate_unique_id("model")
         self.optimization_config = {}
         self.explainability_tools = []
+        self.optimizer = None
+        self.feature_transformer = None  # 原始特征 -> 模型输入特征的变换, 随模型制品一起打包
         
     def _generate_unique_id(self, prefix: str) -> str:
         """生成唯一ID"""
@@ -288,10 +235,26 @@ class MachineLearningWorkbench:
                                  epochs: int = 500,
                                  batch_size: int = 32,
                                  early_stopping_patience: int = 20,
-                                 l2_regularization: float = 0.01) -> Dict:
-        """高级训练程序"""
+                                 l2_regularization: float = 0.01,
+                                 solver: str = 'gd',
+                                 engine: str = 'python',
+                                 shuffle: bool = False,
+                                 seed: Optional[int] = None,
+                                 resume: bool = False,
+                                 history_path: Optional[str] = None,
+                                 snapshot_every: int = 10) -> Dict:
+        """
+        高级训练程序 (solver 为 'normal' / 'cholesky' / 'qr' 时闭式求解岭回归)
+        algorithm 可选 'sgd' / 'momentum' / 'adam' / 'adamw'; engine='numpy' 使用向量化小批量优化器
+        shuffle=True 时每轮按 seed 打乱训练样本顺序; resume=True 时沿用当前权重与优化器状态继续训练
+        指定 history_path 时逐轮把损失追加写入紧凑的二进制训练历史, 每 snapshot_every 轮保存一次参数快照
+        """
+        ml_engine.validate_solver(solver)
+        if engine not in ('python', 'numpy'):
+            raise ValueError(f"不支持的训练引擎: {engine}")
         print(f"[ML-WORKBENCH] 执行高级训练程序...")
-        print(f"[ML-WORKBENCH] 算法: {algorithm}, 学习率: {learning_rate}, 批大小: {batch_size}")
+        if solver == 'gd':
+            print(f"[ML-WORKBENCH] 算法: {algorithm}, 学习率: {learning_rate}, 批大小: {batch_size}, 引擎: {engine}")
         
         train_features, train_targets = train_data
         val_features, val_targets = val_data
@@ -301,108 +264,121 @@ class MachineLearningWorkbench:
             self.weights = [random.uniform(-0.01, 0.01) for _ in range(len(train_features[0]))]
             self.n_features = len(train_features[0])
         
-        # 初始化优化器参数（如果是Adam）
-        if algorithm.lower() == "adam":
-            m_weights = [0.0] * self.n_features  # 一阶矩估计
-            v_weights = [0.0] * self.n_features  # 二阶矩估计
-            m_bias = 0.0
-            v_bias = 0.0
-            beta1, beta2 = 0.9, 0.999
-            epsilon = 1e-8
+        if solver != 'gd':
+            # 小批量训练在每个批次的梯度上加 l2 * w 再除以批大小,
+            # 其驻点等价于全量数据上正则化系数为 l2 * n / batch_size 的岭回归
+            ridge_penalty = l2_regularization * len(train_features) / batch_size
+            return self._closed_form_training(train_data, val_data, solver, ridge_penalty)
+        
+        optimizer = self._prepare_optimizer(algorithm, learning_rate, l2_regularization, resume)
+        history = self._open_training_history(history_path, snapshot_every, resume)
+        
+        if engine == 'numpy':
+            try:
+                return self._vectorized_training(train_data, val_data, algorithm, learning_rate, epochs,
+                                                 batch_size, early_stopping_patience, l2_regularization,
+                                                 shuffle, seed, history)
+            finally:
+                self._close_training_history(history)
+        
+        # AdamW 的权重衰减由优化器解耦处理, 其余算法把 L2 项加在梯度上
+        gradient_l2 = 0.0 if optimizer.decoupled_weight_decay else l2_regularization
+        
+        # 纯 Python 引擎按行索引, 列式数据集先展开为行列表
+        if isinstance(train_features, ColumnarDataset):
+            train_features = train_features.tolist()
+        if isinstance(val_features, ColumnarDataset):
+            val_features = val_features.tolist()
         
         start_time = time.time()
         
         best_val_loss = float('inf')
         patience_counter = 0
-        
-        for epoch in range(epochs):
-            # 分批处理
-            n_batches = (len(train_features) + batch_size - 1) // batch_size
-            
-            total_train_loss = 0
-            for batch_idx in range(n_batches):
-                start_idx = batch_idx * batch_size
-                end_idx = min(start_idx + batch_size, len(train_features))
-                
-                batch_features = train_features[start_idx:end_idx]
-                batch_targets = train_targets[start_idx:end_idx]
-                
-                # 前向传播
-                batch_predictions = []
-                for row in batch_features:
-                    pred = sum(self.weights[i] * row[i] for i in range(len(row))) + self.bias
-                    batch_predictions.append(pred)
+        epoch_throughput = []
+        rng = random.Random(seed)
+        epoch_features, epoch_targets = train_features, train_targets
+        
+        try:
+            for epoch in range(epochs):
+                epoch_start = time.perf_counter()
+                if shuffle:
+                    order = list(range(len(train_features)))
+                    rng.shuffle(order)
+                    epoch_features = [train_features[i] for i in order]
+                    epoch_targets = [train_targets[i] for i in order]
                 
-                # 计算梯度
-                weight_gradients = [0.0] * self.n_features
-                bias_gradient = 0.0
+                # 分批处理
+                n_batches = (len(train_features) + batch_size - 1) // batch_size
                 
-                for i in range(len(batch_features)):
-                    error = batch_predictions[i] - batch_targets[i]
+                total_train_loss = 0
+                for batch_idx in range(n_batches):
+                    start_idx = batch_idx * batch_size
+                    end_idx = min(start_idx + batch_size, len(train_features))
                     
-                    # 计算权重梯度（包括L2正则化）
-                    for j in range(self.n_features):
-                        weight_gradients[j] += error * batch_features[i][j]
+                    batch_features = epoch_features[start_idx:end_idx]
+                    batch_targets = epoch_targets[start_idx:end_idx]
                     
-                    bias_gradient += error
-                
-                # 应用L2正则化到梯度
-                for j in range(self.n_features):
-                    weight_gradients[j] += l2_regularization * self.weights[j]
-                
-                # Adam优化器更新（简化版）
-                if algorithm.lower() == "adam":
-                    # 更新一阶和二阶矩估计
-                    for j in range(self.n_features):
-                        m_weights[j] = beta1 * m_weights[j] + (1 - beta1) * (weight_gradients[j] / len(batch_features))
-                        v_weights[j] = beta2 * v_weights[j] + (1 - beta2) * ((weight_gradients[j] / len(batch_features)) ** 2)
+                    # 前向传播
+                    batch_predictions = []
+                    for row in batch_features:
+                        pred = sum(self.weights[i] * row[i] for i in range(len(row))) + self.bias
+                        batch_predictions.append(pred)
+                    
+                    # 计算梯度
+                    weight_gradients = [0.0] * self.n_features
+                    bias_gradient = 0.0
+                    
+                    for i in range(len(batch_features)):
+                        error = batch_predictions[i] - batch_targets[i]
                         
-                        # 偏差修正
-                        m_hat_w = m_weights[j] / (1 - beta1 ** (epoch + 1))
-                        v_hat_w = v_weights[j] / (1 - beta2 ** (epoch + 1))
+                        # 计算权重梯度（包括L2正则化）
+                        for j in range(self.n_features):
+                            weight_gradients[j] += error * batch_features[i][j]
                         
-                        # 更新权重
-                        self.weights[j] -= learning_rate * m_hat_w / (math.sqrt(v_hat_w) + epsilon)
+                        bias_gradient += error
                     
-                    # 对偏置也做同样处理
-                    m_bias = beta1 * m_bias + (1 - beta1) * (bias_gradient / len(batch_features))
-                    v_bias = beta2 * v_bias + (1 - beta2) * ((bias_gradient / len(batch_features)) ** 2)
+                    # 应用L2正则化到梯度
+                    for j in range(self.n_features):
+                        weight_gradients[j] += gradient_l2 * self.weights[j]
                     
-                    m_hat_b = m_bias / (1 - beta1 ** (epoch + 1))
-                    v_hat_b = v_bias / (1 - beta2 ** (epoch + 1))
+                    # 优化器更新 (偏差修正按全局步数计)
+                    params = self.weights + [self.bias]
+                    gradients = [g / len(batch_features) for g in weight_gradients]
+                    gradients.append(bias_gradient / len(batch_features))
+                    optimizer.step(params, gradients)
+                    self.weights = params[:-1]
+                    self.bias = params[-1]
                     
-                    self.bias -= learning_rate * m_hat_b / (math.sqrt(v_hat_b) + epsilon)
+                    # 计算批次损失
+                    batch_loss = sum((batch_predictions[i] - batch_targets[i])**2 for i in range(len(batch_targets))) / len(batch_targets)
+                    total_train_loss += batch_loss
+                
+                avg_train_loss = total_train_loss / n_batches
+                epoch_throughput.append(len(train_features) / max(time.perf_counter() - epoch_start, 1e-12))
+                
+                # 验证损失
+                val_predictions = [sum(self.weights[i] * row[i] for i in range(len(row))) + self.bias 
+                                  for row in val_features]
+                val_loss = sum((val_predictions[i] - val_targets[i])**2 for i in range(len(val_targets))) / len(val_targets)
+                
+                # 早停逻辑
+                if val_loss < best_val_loss:
+                    best_val_loss = val_loss
+                    patience_counter = 0
                 else:
-                    # SGD更新
-                    for j in range(self.n_features):
-                        self.weights[j] -= learning_rate * weight_gradients[j] / len(batch_features)
-                    self.bias -= learning_rate * bias_gradient / len(batch_features)
+                    patience_counter += 1
                 
-                # 计算批次损失
-                batch_loss = sum((batch_predictions[i] - batch_targets[i])**2 for i in range(len(batch_targets))) / len(batch_targets)
-                total_train_loss += batch_loss
-            
-            avg_train_loss = total_train_loss / n_batches
-            
-            # 验证损失
-            val_predictions = [sum(self.weights[i] * row[i] for i in range(len(row))) + self.bias 
-                              for row in val_features]
-            val_loss = sum((val_predictions[i] - val_targets[i])**2 for i in range(len(val_targets))) / len(val_targets)
-            
-            # 早停逻辑
-            if val_loss < best_val_loss:
-                best_val_loss = val_loss
-                patience_counter = 0
-            else:
-                patience_counter += 1
-            
-            if patience_counter >= early_stopping_patience:
-                print(f"[ML-WORKBENCH] 早停触发，最佳验证损失: {best_val_loss:.6f}")
-                break
-            
-            # 记录训练历史
-            if epoch % 50 == 0:
-                print(f"[ML-WORKBENCH] Epoch {epoch}: Train Loss = {avg_train_loss:.6f}, Val Loss = {val_loss:.6f}")
+                if patience_counter >= early_stopping_patience:
+                    print(f"[ML-WORKBENCH] 早停触发，最佳验证损失: {best_val_loss:.6f}")
+                    break
+                
+                # 记录训练历史
+                if history is not None:
+                    history.record(epoch, avg_train_loss, val_loss, self.weights, bias=self.bias)
+                if epoch % 50 == 0:
+                    print(f"[ML-WORKBENCH] Epoch {epoch}: Train Loss = {avg_train_loss:.6f}, Val Loss = {val_loss:.6f}")
+        finally:
+            self._close_training_history(history)
         
         training_time = time.time() - start_time
         self.is_trained = True
@@ -417,122 +393,313 @@ class MachineLearningWorkbench:
             'epochs_run': epoch + 1,
             'final_training_loss': avg_train_loss,
             'best_validation_loss': best_val_loss,
-            'early_stopped': patience_counter >= early_stopping_patience
+            'early_stopped': patience_counter >= early_stopping_patience,
+            'epoch_throughput': epoch_throughput,
+            'avg_throughput': sum(epoch_throughput) / len(epoch_throughput),
+            'optimizer_state': optimizer.state_dict()
+        }
+    
+    def _open_training_history(self, history_path: Optional[str], snapshot_every: int,
+                               resume: bool) -> Optional[TrainingHistoryWriter]:
+        """创建训练历史写入器 (resume=True 时续写已有文件)"""
+        if history_path is None:
+            return None
+        return TrainingHistoryWriter(history_path, self.n_features + 1, snapshot_every, resume=resume)
+    
+    def _close_training_history(self, history: Optional[TrainingHistoryWriter]):
+        """写完训练历史, self.training_history 改为映射该文件的只读视图"""
+        if history is None:
+            return
+        history.close()
+        self.training_history = TrainingHistory(history.path)
+    
+    def load_training_history(self, path: str) -> TrainingHistory:
+        """映射训练历史文件; 有参数快照时把权重与偏置恢复为最近的快照, 之后可以 resume=True 续训"""
+        self.training_history = TrainingHistory(path)
+        snapshot = self.training_history.latest_snapshot()
+        if snapshot is not None:
+            epoch, self.weights, self.bias = snapshot
+            self.n_features = len(self.weights)
+            print(f"[ML-WORKBENCH] 已从训练历史恢复第 {epoch} 轮的参数: {path}")
+        return self.training_history
+    
+    def _prepare_optimizer(self, algorithm: str, learning_rate: float,
+                           l2_regularization: float, resume: bool):
+        """
+        创建优化器; resume=True 时沿用现有优化器的状态 (矩估计与全局步数)
+        现有优化器与算法或参数数量不一致时无法续训, 抛出 ValueError 而不是静默丢弃检查点中的状态
+        """
+        current = self.optimizer
+        if resume and current is not None:
+            if current.name != algorithm.lower() or current.n_params != self.n_features + 1:
+                raise ValueError(f"无法续训: 现有优化器为 {current.name} ({current.n_params} 个参数), "
+                                 f"请求的是 {algorithm} ({self.n_features + 1} 个参数)")
+            current.learning_rate = learning_rate
+            return current
+        self.optimizer = optimizer_for_training(algorithm, self.n_features + 1,
+                                                learning_rate, l2_regularization)
+        return self.optimizer
+    
+    def save_training_checkpoint(self, path: str):
+        """保存权重、偏置与优化器状态, 供 load_training_checkpoint 恢复后以 resume=True 继续训练"""
+        checkpoint = {
+            'model_id': self.model_id,
+            'n_features': self.n_features,
+            'weights': self.weights,
+            'bias': self.bias,
+            'optimizer': self.optimizer.state_dict() if self.optimizer is not None else None
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        print(f"[ML-WORKBENCH] 训练检查点已保存: {path}")
+    
+    def load_training_checkpoint(self, path: str):
+        """加载训练检查点"""
+        with open(path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        self.n_features = checkpoint['n_features']
+        self.weights = checkpoint['weights']
+        self.bias = checkpoint['bias']
+        state = checkpoint['optimizer']
+        if state is not None:
+            self.optimizer = optimizer_from_state(state)
+        print(f"[ML-WORKBENCH] 训练检查点已加载: {path} (优化器步数: {state['step_count'] if state else 0})")
+    
+    def _vectorized_training(self, train_data: Tuple, val_data: Tuple, algorithm: str,
+                             learning_rate: float, epochs: int, batch_size: int,
+                             early_stopping_patience: int, l2_regularization: float,
+                             shuffle: bool, seed: Optional[int],
+                             history: Optional[TrainingHistoryWriter] = None) -> Dict:
+        """向量化小批量训练 (numpy 引擎)"""
+        start_time = time.time()
+        outcome = ml_engine.minibatch_train(
+            train_data[0], train_data[1], val_data[0], val_data[1], self.weights, self.bias,
+            algorithm=algorithm, learning_rate=learning_rate, epochs=epochs, batch_size=batch_size,
+            early_stopping_patience=early_stopping_patience, l2_regularization=l2_regularization,
+            shuffle=shuffle, seed=seed, on_epoch=self._log_epoch, optimizer=self.optimizer, history=history)
+        return self._finish_training(outcome, time.time() - start_time)
+    
+    def data_parallel_training(self,
+                               train_data: Tuple,
+                               val_data: Tuple,
+                               n_workers: Optional[int] = None,
+                               algorithm: str = "adam",
+                               learning_rate: float = 0.001,
+                               epochs: int = 500,
+                               batch_size: Optional[int] = None,
+                               early_stopping_patience: int = 20,
+                               l2_regularization: float = 0.01,
+                               shuffle: bool = False,
+                               seed: Optional[int] = None,
+                               resume: bool = False,
+                               history_path: Optional[str] = None,
+                               snapshot_every: int = 10) -> Dict:
+        """
+        数据并行训练 - 训练集放入共享内存, 由 n_workers 个常驻进程计算部分梯度, 主进程汇总后更新
+        batch_size=None 时为全量梯度下降; 批次越大, 进程间通信开销占比越低
+        history_path / snapshot_every 与 advanced_training_procedure 相同
+        """
+        train_features, train_targets = train_data
+        print(f"[ML-WORKBENCH] 执行数据并行训练...")
+        print(f"[ML-WORKBENCH] 算法: {algorithm}, 学习率: {learning_rate}, 批大小: {batch_size or '全量'}, 进程数: {n_workers or '全部核心'}")
+        
+        if len(self.weights) != len(train_features[0]):
+            self.weights = [random.uniform(-0.01, 0.01) for _ in range(len(train_features[0]))]
+            self.n_features = len(train_features[0])
+        optimizer = self._prepare_optimizer(algorithm, learning_rate, l2_regularization, resume)
+        
+        history = self._open_training_history(history_path, snapshot_every, resume)
+        
+        start_time = time.time()
+        try:
+            with DataParallelTrainer(train_features, train_targets, n_workers=n_workers) as trainer:
+                outcome = trainer.train(
+                    self.weights, self.bias, val_data[0], val_data[1], algorithm=algorithm,
+                    learning_rate=learning_rate, epochs=epochs, batch_size=batch_size,
+                    early_stopping_patience=early_stopping_patience, l2_regularization=l2_regularization,
+                    shuffle=shuffle, seed=seed, on_epoch=self._log_epoch, optimizer=optimizer,
+                    history=history)
+        finally:
+            self._close_training_history(history)
+        results = self._finish_training(outcome, time.time() - start_time)
+        results['n_workers'] = outcome['n_workers']
+        return results
+    
+    @staticmethod
+    def _log_epoch(epoch: int, train_loss: float, val_loss: float):
+        """训练日志回调"""
+        if epoch % 50 == 0:
+            print(f"[ML-WORKBENCH] Epoch {epoch}: Train Loss = {train_loss:.6f}, Val Loss = {val_loss:.6f}")
+    
+    def _finish_training(self, outcome: Dict, training_time: float) -> Dict:
+        """采用训练结果并生成汇总"""
+        self.weights = outcome['weights']
+        self.bias = outcome['bias']
+        self.is_trained = True
+        
+        if outcome['early_stopped']:
+            print(f"[ML-WORKBENCH] 早停触发，最佳验证损失: {outcome['best_validation_loss']:.6f}")
+        throughput = outcome['epoch_throughput']
+        print(f"[ML-WORKBENCH] 模型训练完成! 用时: {training_time:.2f}s, 平均吞吐量: {sum(throughput) / len(throughput):.0f} 样本/秒")
+        print(f"[ML-WORKBENCH] 最终权重范数: {math.sqrt(sum(w**2 for w in self.weights)):.4f}")
+        
+        return {
+            'training_time': training_time,
+            'final_weights': self.weights[:],
+            'final_bias': self.bias,
+            'epochs_run': outcome['epochs_run'],
+            'final_training_loss': outcome['final_training_loss'],
+            'best_validation_loss': outcome['best_validation_loss'],
+            'early_stopped': outcome['early_stopped'],
+            'epoch_throughput': throughput,
+            'avg_throughput': sum(throughput) / len(throughput),
+            'optimizer_state': self.optimizer.state_dict()
+        }
+    
+    def streaming_training_procedure(self,
+                                     batch_source,
+                                     val_data: Tuple = None,
+                                     algorithm: str = "adam",
+                                     learning_rate: float = 0.001,
+                                     epochs: int = 1,
+                                     l2_regularization: float = 0.01) -> Dict:
+        """流式训练程序 - 从批次迭代器增量训练, 适用于无法整体载入内存的数据集"""
+        print(f"[ML-WORKBENCH] 执行流式训练程序...")
+        print(f"[ML-WORKBENCH] 算法: {algorithm}, 学习率: {learning_rate}, 轮数: {epochs}")
+        
+        start_time = time.time()
+        trainer = ml_engine.StreamingLinearTrainer(
+            self.weights if self.is_trained else None, self.bias,
+            learning_rate=learning_rate, algorithm=algorithm.lower(),
+            l2_regularization=l2_regularization)
+        summary = trainer.fit(batch_source, epochs=epochs)
+        
+        self.weights = trainer.weights
+        self.bias = trainer.bias
+        self.n_features = len(self.weights)
+        self.is_trained = True
+        
+        val_loss = None
+        if val_data is not None:
+            val_features, val_targets = val_data
+            val_predictions = [sum(self.weights[i] * row[i] for i in range(len(row))) + self.bias 
+                              for row in val_features]
+            val_loss = sum((val_predictions[i] - val_targets[i])**2 for i in range(len(val_targets))) / len(val_targets)
+        
+        training_time = time.time() - start_time
+        print(f"[ML-WORKBENCH] 流式训练完成! 用时: {training_time:.2f}s, 样本数: {summary['samples_seen']}")
+        
+        return {
+            'training_time': training_time,
+            'final_weights': self.weights[:],
+            'final_bias': self.bias,
+            'epochs_run': summary['epochs_run'],
+            'batches_processed': summary['steps'],
+            'samples_seen': summary['samples_seen'],
+            'final_training_loss': summary['epoch_losses'][-1],
+            'validation_loss': val_loss
+        }
+    
+    def _closed_form_training(self, train_data: Tuple, val_data: Tuple,
+                              solver: str, ridge_penalty: float) -> Dict:
+        """闭式求解训练"""
+        print(f"[ML-WORKBENCH] 闭式求解: {solver}, 岭系数: {ridge_penalty:.6f}")
+        
+        train_features, train_targets = train_data
+        val_features, val_targets = val_data
+        start_time = time.time()
+        
+        self.weights, self.bias = ml_engine.solve_least_squares(
+            train_features, train_targets, l2_regularization=ridge_penalty, method=solver)
+        
+        train_predictions = [sum(self.weights[i] * row[i] for i in range(len(row))) + self.bias 
+                            for row in train_features]
+        train_loss = sum((train_predictions[i] - train_targets[i])**2 for i in range(len(train_targets))) / len(train_targets)
+        val_predictions = [sum(self.weights[i] * row[i] for i in range(len(row))) + self.bias 
+                          for row in val_features]
+        val_loss = sum((val_predictions[i] - val_targets[i])**2 for i in range(len(val_targets))) / len(val_targets)
+        
+        training_time = time.time() - start_time
+        self.is_trained = True
+        
+        print(f"[ML-WORKBENCH] 模型训练完成! 用时: {training_time:.2f}s, 验证损失: {val_loss:.6f}")
+        print(f"[ML-WORKBENCH] 最终权重范数: {math.sqrt(sum(w**2 for w in self.weights)):.4f}")
+        
+        return {
+            'training_time': training_time,
+            'final_weights': self.weights[:],
+            'final_bias': self.bias,
+            'epochs_run': 1,
+            'final_training_loss': train_loss,
+            'best_validation_loss': val_loss,
+            'early_stopped': False,
+            'solver': solver
         }
     
     def model_evaluation(self, test_features: List[List[float]], 
-                        test_targets: List[float]) -> Dict:
-        """模型评估"""
+                        test_targets: List[float], chunk_size: int = 65536) -> Dict:
+        """模型评估 (按 chunk_size 分块预测)"""
         print(f"[ML-WORKBENCH] 执行全面模型评估...")
         
         if not self.is_trained:
             raise ValueError("模型未训练，请先调用训练方法")
         
-        predictions = [sum(self.weights[i] * row[i] for i in range(len(row))) + self.bias 
-                      for row in test_features]
-        
-        n = len(test_targets)
-        
-        # 计算多种评估指标
-        mse = sum((predictions[i] - test_targets[i])**2 for i in range(n)) / n
-        rmse = math.sqrt(mse)
-        mae = sum(abs(predictions[i] - test_targets[i]) for i in range(n)) / n
-        
-        mean_target = sum(test_targets) / n
-        ss_tot = sum((test_targets[i] - mean_target)**2 for i in range(n))
-        ss_res = sum((test_targets[i] - predictions[i])**2 for i in range(n))
-        r2 = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0
-        
-        # 调整R²
-        adj_r2 = 1 - (1 - r2) * (n - 1) / (n - self.n_features - 1) if (n - self.n_features - 1) > 0 else r2
-        
-        # 计算MAPE
-        mape = sum(abs((test_targets[i] - predictions[i]) / test_targets[i]) 
-                  for i in range(n) if test_targets[i] != 0) / n * 100
-        
-        # 残差分析
-        residuals = [predictions[i] - test_targets[i] for i in range(n)]
-        residual_mean = sum(residuals) / n
-        residual_std = math.sqrt(sum((r - residual_mean)**2 for r in residuals) / n) if n > 1 else 0
-        
-        # 异常值检测 (使用IQR方法)
-        sorted_abs_residuals = sorted(abs(r) for r in residuals)
-        q1_idx = n // 4
-        q3_idx = 3 * n // 4
-        q1 = sorted_abs_residuals[q1_idx] if sorted_abs_residuals else 0
-        q3 = sorted_abs_residuals[q3_idx] if len(sorted_abs_residuals) > q3_idx else 0
-        iqr = q3 - q1
-        outlier_threshold = q3 + 1.5 * iqr if iqr > 0 else float('inf')
-        n_outliers = sum(1 for r in residuals if abs(r) > outlier_threshold)
-        
-        evaluation_metrics = {
-            'mse': mse,
-            'rmse': rmse,
-            'mae': mae,
-            'r2': r2,
-            'adjusted_r2': adj_r2,
-            'mape': mape,
-            'residual_mean': residual_mean,
-            'residual_std': residual_std,
-            'outliers_count': n_outliers,
-            'outlier_percentage': n_outliers / n * 100 if n > 0 else 0,
-            'n_samples': n,
-            'model_complexity_penalty': adj_r2 < r2  # 如果调整R²小于R²，说明复杂度惩罚生效
-        }
+        # 按块预测并单遍累计全部指标 (IQR 异常值检测所需的分位数在样本过多时改用对数直方图近似)
+        metrics = evaluate_in_chunks(self._predict_chunk, test_features, test_targets, chunk_size)
+        evaluation_metrics = metrics.result(n_features=self.n_features)
+        evaluation_metrics.pop('exact_quantiles')
+        r2, adj_r2 = evaluation_metrics['r2'], evaluation_metrics['adjusted_r2']
+        evaluation_metrics['model_complexity_penalty'] = adj_r2 < r2  # 如果调整R²小于R²，说明复杂度惩罚生效
         
         self.performance_metrics = evaluation_metrics
         
         print(f"[ML-WORKBENCH] 评估结果:")
         print(f"  R²: {r2:.4f} (Adjusted: {adj_r2:.4f})")
-        print(f"  RMSE: {rmse:.4f}")
-        print(f"  MAE: {mae:.4f}")
-        print(f"  MAPE: {mape:.2f}%")
+        print(f"  RMSE: {evaluation_metrics['rmse']:.4f}")
+        print(f"  MAE: {evaluation_metrics['mae']:.4f}")
+        print(f"  MAPE: {evaluation_metrics['mape']:.2f}%")
         print(f"  异常值比例: {evaluation_metrics['outlier_percentage']:.2f}%")
         
         return evaluation_metrics
     
+    def _predict_chunk(self, features) -> List[float]:
+        """线性模型对一个特征块的预测"""
+        if ml_engine.HAS_NUMPY:
+            return ml_engine.to_array(features) @ ml_engine.np.asarray(self.weights) + self.bias
+        return [sum(w * x for w, x in zip(self.weights, row)) + self.bias for row in features]
+    
     def generate_model_explanation(self, sample_features: List[List[float]], 
-                                  sample_targets: List[float] = None) -> Dict:
-        """生成模型解释"""
+                                  sample_targets: List[float] = None,
+                                  max_samples: Optional[int] = 5, top_k: int = 5,
+                                  output_path: Optional[str] = None, chunk_size: int = 65536) -> Dict:
+        """
+        生成模型解释 - 按块计算贡献矩阵, 每个样本取贡献绝对值最大的 top_k 个特征
+        max_samples 为 None 时解释全部样本; 指定 output_path 时逐行以 JSON Lines 写入文件而不保留在内存中
+        """
         print(f"[ML-WORKBENCH] 生成模型解释...")
         
         if not self.is_trained:
             raise ValueError("模型未训练，请先调用训练方法")
         
+        if max_samples is not None:
+            sample_features = sample_features[:max_samples]
+        
         explanations = []
-        for i, row in enumerate(sample_features[:5]):  # 解释前5个样本
-            # 计算每个特征的贡献
-            feature_contributions = []
-            total_contribution = 0
-            
-            for j, (feature_val, weight) in enumerate(zip(row, self.weights)):
-                contribution = feature_val * weight
-                feature_contributions.append({
-                    'feature_index': j,
-                    'feature_value': feature_val,
-                    'weight': weight,
-                    'contribution': contribution
-                })
-                total_contribution += contribution
-            
-            bias_contribution = self.bias
-            predicted_value = total_contribution + self.bias
-            
-            explanation = {
-                'sample_index': i,
-                'feature_contributions': sorted(feature_contributions, key=lambda x: abs(x['contribution']), reverse=True)[:5],  # 前5个最重要的特征
-                'bias_contribution': bias_contribution,
-                'predicted_value': predicted_value,
-                'actual_value': sample_targets[i] if sample_targets and i < len(sample_targets) else None,
-                'prediction_error': abs(predicted_value - sample_targets[i]) if sample_targets and i < len(sample_targets) else None
-            }
-            
-            explanations.append(explanation)
+        if output_path is not None:
+            n_explained = write_explanations(output_path, sample_features, self.weights, self.bias,
+                                             sample_targets, top_k, chunk_size)
+            print(f"[ML-WORKBENCH] 生成了 {n_explained} 个样本的解释 -> {output_path}")
+        else:
+            explanations = list(iter_explanations(sample_features, self.weights, self.bias,
+                                                  sample_targets, top_k, chunk_size))
+            n_explained = len(explanations)
+            print(f"[ML-WORKBENCH] 生成了 {n_explained} 个样本的解释")
         
-        print(f"[ML-WORKBENCH] 生成了 {len(explanations)} 个样本的解释")
         return {
             'sample_explanations': explanations,
-            'global_feature_importance': sorted([(abs(w), i) for i, w in enumerate(self.weights)], reverse=True)[:10],  # 前10个重要特征
+            'n_explained': n_explained,
+            'output_path': output_path,
+            'global_feature_importance': global_feature_importance(self.weights, 10),  # 前10个重要特征
             'model_intercept': self.bias
         }
 
@@ -549,8 +716,13 @@ class AIEthicsAndCompliance:
     def comprehensive_fairness_analysis(self, 
                                       model: MachineLearningWorkbench, 
                                       test_data: Tuple,
-                                      sensitive_attribute_indices: List[int] = [0]) -> Dict:
-        """综合公平性分析"""
+                                      sensitive_attribute_indices: List[int] = [0],
+                                      binning: str = 'auto', n_bins: int = 4) -> Dict:
+        """
+        综合公平性分析
+        敏感属性为离散值时按值分组, 为连续值时按分位数分为 n_bins 组 (binning 可选 'auto' / 'exact' /
+        'quantile' / 'uniform'); 各组指标在一遍扫描中完成
+        """
         print(f"[ETHICS] 执行综合公平性分析...")
         
         features, targets = test_data
@@ -564,28 +736,14 @@ class AIEthicsAndCompliance:
             if attr_idx >= len(features[0]):
                 continue
                 
-            # 根据敏感属性值分组
-            attr_values = [row[attr_idx] for row in features]
-            unique_values = sorted(list(set(attr_values)))
+            # 根据敏感属性值分组 (单遍哈希分组, 跳过样本数少于 10 的组)
+            if isinstance(features, ColumnarDataset):
+                attr_values = features.column(attr_idx)
+            else:
+                attr_values = [row[attr_idx] for row in features]
+            group_stats = grouped_fairness_statistics(attr_values, predictions, targets,
+                                                      binning=binning, n_bins=n_bins, min_group_size=10)
             
-            group_stats = {}
-            for val in unique_values:
-                group_indices = [i for i, row in enumerate(features) if row[attr_idx] == val]
-                
-                if len(group_indices) < 10:  # 跳过样本数太少的组
-                    continue
-                    
-                group_predictions = [predictions[i] for i in group_indices]
-                group_targets = [targets[i] for i in group_indices]
-                
-                group_stats[val] = {
-                    'count': len(group_indices),
-                    'avg_prediction': sum(group_predictions) / len(group_predictions),
-                    'avg_target': sum(group_targets) / len(group_targets),
-                    'demographic_parity_ratio': self._calculate_demographic_parity(group_predictions),
-                    'equal_opportunity_ratio': self._calculate_equal_opportunity(group_predictions, group_targets)
-                }
-        
             # 计算公平性指标
             if len(group_stats) > 1:
                 avg_predictions = [stats['avg_prediction'] for stats in group_stats.values()]
@@ -703,18 +861,6 @@ class AIEthicsAndCompliance:
         print(f"[ETHICS] 审计完成: 合规状态 {audit_results['risk_assessment']['compliance_status']}")
         return audit_results
     
-    def _calculate_demographic_parity(self, predictions):
-        """计算人口统计学平等"""
-        positive_predictions = sum(1 for p in predictions if p > 0)
-        total_predictions = len(predictions)
-        return positive_predictions / total_predictions if total_predictions > 0 else 0
-    
-    def _calculate_equal_opportunity(self, predictions, targets):
-        """计算机会均等"""
-        true_positives = sum(1 for i, p in enumerate(predictions) if p > 0 and targets[i] > 0)
-        actual_positives = sum(1 for t in targets if t > 0)
-        return true_positives / actual_positives if actual_positives > 0 else 0
-    
     def _check_equalized_odds(self, group_stats):
         """检查等化赔率"""
         if len(group_stats) < 2:
@@ -727,9 +873,11 @@ class AIEthicsAndCompliance:
 class MLOpsOrchestration:
     """MLOps编排 - 展示AI工程师的DevOps能力"""
     
-    def __init__(self):
+    def __init__(self, registry_path: Optional[str] = None):
         self.pipeline_templates = {}
-        self.model_registry = {}
+        # 模型注册表: 指定 registry_path 时持久化到 SQLite 文件, 可被其他进程 (如推理服务) 并发查询
+        self.model_registry = ModelRegistry(registry_path)
+        self.validation_results = {}
         self.monitoring_dashboard = {}
         self.deployment_configs = {}
         
@@ -808,13 +956,15 @@ class MLOpsOrchestration:
             if not passes:
                 validation_results['overall_pass'] = False
         
+        self.validation_results[model.model_id] = validation_results
         print(f"[MLOPS] 验证完成: {'通过' if validation_results['overall_pass'] else '失败'}")
         return validation_results
     
     def model_packaging_and_signing(self, model: MachineLearningWorkbench, 
                                    model_name: str, 
-                                   version: str = "1.0.0") -> Dict:
-        """模型打包与签名"""
+                                   version: str = "1.0.0",
+                                   output_path: Optional[str] = None) -> Dict:
+        """模型打包与签名 (指定 output_path 时同时写出可直接映射加载的二进制制品)"""
         print(f"[MLOPS] 执行模型打包与签名...")
         
         # 序列化模型参数
@@ -841,26 +991,30 @@ class MLOpsOrchestration:
                 'training_data_size': getattr(model, 'training_samples', 0),
                 'final_training_loss': getattr(model, 'final_loss', 0)
             },
-            'artifact_signature': hashlib.sha256(
-                json.dumps({
-                    'weights': model.weights,
-                    'bias': model.bias,
-                    'n_features': model.n_features
-                }, sort_keys=True).encode()
-            ).hexdigest()
         }
         
-        # 注册模型
-        self.model_registry[model.model_id] = {
+        # 特征变换状态随制品保存, 在线推理可直接接收原始特征
+        if getattr(model, 'feature_transformer', None) is not None:
+            model_artifact['feature_transform'] = model.feature_transformer.to_dict()
+        model_artifact['artifact_signature'] = artifact_signature(
+            model.weights, model.bias, model.n_features, model_artifact.get('feature_transform'))
+        
+        if output_path is not None:
+            write_model_artifact(output_path, model_artifact)
+        
+        # 注册模型 (单个事务写入注册表, 验证状态取自验证网关的结果, 未经验证的模型不会被视为可上线版本)
+        validation = self.validation_results.get(model.model_id, {})
+        self.model_registry.register({
             'artifact': model_artifact,
+            'artifact_path': output_path,
             'status': 'registered',
             'registered_at': time.time(),
             'provenance': {
                 'developer': 'AI_Engineer_Agent',
                 'pipeline_used': 'default_training_pipeline',
-                'validation_passed': True
+                'validation_passed': validation.get('overall_pass', False)
             }
-        }
+        }, metrics=getattr(model, 'performance_metrics', None))
         
         print(f"[MLOPS] 模型打包完成: {model_name} v{version}, 签名: {model_artifact['artifact_signature'][:16]}")
         return model_artifact
@@ -999,6 +1153,7 @@ def main():
     # 3. 模型开发与训练
     print("\n[3] 机器学习工程能力演示...")
     ml_workbench = MachineLearningWorkbench(n_features=len(enhanced_features[0]))
+    ml_workbench.feature_transformer = data_suite.feature_transformer
     
     # 分割数据
     split_idx1 = int(0.6 * len(enhanced_features))
@@ -1018,7 +1173,8 @@ def main():
         learning_rate=0.001,
         epochs=300,
         batch_size=64,
-        l2_regularization=0.001
+        l2_regularization=0.001,
+        engine='numpy' if ml_engine.HAS_NUMPY else 'python'
     )
     
     eval_results = ml_workbench.model_evaluation(test_features, test_targets)
@@ -1033,13 +1189,13 @@ def main():
         "training_time": train_results['training_time'],
         "r2_score": eval_results['r2'],
         "rmse": eval_results['rmse'],
-        "explanations_generated": len(explanations['sample_explanations'])
+        "explanations_generated": explanations['n_explained']
     })
     
     print(f"  训练时间: {train_results['training_time']:.2f}s")
     print(f"  R² 得分: {eval_results['r2']:.4f}")
     print(f"  RMSE: {eval_results['rmse']:.4f}")
-    print(f"  解释样本数: {len(explanations['sample_explanations'])}")
+    print(f"  解释样本数: {explanations['n_explained']}")
     
     # 4. 伦理与合规
     print("\n[4] AI伦理与治理能力演示...")
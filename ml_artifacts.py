@@ -0,0 +1,215 @@
+"""
+二进制模型制品 - 头部 JSON 元数据 + 原始 float64 参数, 可直接 mmap 加载
+文件布局: 魔数 (8 字节) | 头部长度 (8 字节, 小端) | SHA-256 摘要 (32 字节) | JSON 头部 | 数据区
+权重、偏置与特征变换统计量以 float64 原样存放在 64 字节对齐的数据区, 加载时为映射页面上的零拷贝视图,
+无需解析文本浮点数; 摘要覆盖头部与数据区, 加载时按块流式计算校验
+"""
+
+import hashlib
+import json
+import mmap
+import struct
+from array import array
+from typing import Dict, Optional, Sequence
+
+from ml_inference import CompiledPredictor
+
+MAGIC = b'MLMODEL\x01'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_FLOAT_BYTES = 8
+_PREAMBLE = struct.Struct('<8sQ32s')
+_HASH_BLOCK_SIZE = 1 << 20
+
+# 以原始 float64 存放的制品字段: 数组名 -> 在 model_packaging_and_signing 制品字典中的路径
+ARRAY_FIELDS = {
+    'weights': ('model_parameters', 'weights'),
+    'bias': ('model_parameters', 'bias'),
+    'transform_means': ('feature_transform', 'means'),
+    'transform_stds': ('feature_transform', 'stds')
+}
+
+
+def artifact_signature(weights: Sequence[float], bias: float, n_features: int,
+                       feature_transform: Optional[Dict] = None) -> str:
+    """制品签名: 权重、偏置、特征数 (及特征变换状态) 的规范 JSON 的 SHA-256"""
+    signed_payload = {
+        'weights': list(weights),
+        'bias': bias,
+        'n_features': n_features
+    }
+    if feature_transform is not None:
+        signed_payload['feature_transform'] = feature_transform
+    return hashlib.sha256(json.dumps(signed_payload, sort_keys=True).encode()).hexdigest()
+
+
+def _align(size: int, alignment: int = ALIGNMENT) -> int:
+    return (size + alignment - 1) // alignment * alignment
+
+
+def _encode_header(header: Dict) -> bytes:
+    return json.dumps(header, ensure_ascii=False, sort_keys=True).encode('utf-8')
+
+
+def _digest(buffer) -> bytes:
+    """按块流式计算 SHA-256, 不复制整个缓冲区"""
+    digest = hashlib.sha256()
+    view = memoryview(buffer)
+    for start in range(0, len(view), _HASH_BLOCK_SIZE):
+        digest.update(view[start:start + _HASH_BLOCK_SIZE])
+    return digest.digest()
+
+
+def write_model_artifact(path: str, model_artifact: Dict) -> Dict:
+    """
+    把 model_packaging_and_signing 生成的制品字典写为二进制制品
+    ARRAY_FIELDS 中的字段移入数据区, 其余字段 (含原签名 artifact_signature) 保存在头部; 返回头部
+    """
+    metadata = {key: dict(value) if isinstance(value, dict) else value for key, value in model_artifact.items()}
+    arrays, layout, offset = [], {}, 0
+    for name, (section, field) in ARRAY_FIELDS.items():
+        values = (metadata.get(section) or {}).get(field)
+        if values is None:
+            continue
+        del metadata[section][field]
+        scalar = not hasattr(values, '__len__')
+        data = array('d', [values] if scalar else values)
+        layout[name] = {'offset': offset, 'length': len(data), 'scalar': scalar}
+        arrays.append((offset, data))
+        offset = _align(offset + len(data) * _FLOAT_BYTES)
+
+    header = {
+        'format_version': FORMAT_VERSION,
+        'dtype': '<f8',
+        'arrays': layout,
+        'data_offset': 0,
+        'data_size': offset,
+        'metadata': metadata
+    }
+    # data_offset 的位数会影响头部长度, 预留少量空间后再确定
+    header['data_offset'] = _align(_PREAMBLE.size + len(_encode_header(header)) + 32)
+    header_bytes = _encode_header(header)
+    if _PREAMBLE.size + len(header_bytes) > header['data_offset']:
+        raise ValueError(f"头部 ({len(header_bytes)} 字节) 超出预留空间")
+
+    body = bytearray(header['data_offset'] - _PREAMBLE.size + offset)
+    body[:len(header_bytes)] = header_bytes
+    data_start = header['data_offset'] - _PREAMBLE.size
+    for array_offset, data in arrays:
+        start = data_start + array_offset
+        body[start:start + len(data) * _FLOAT_BYTES] = data.tobytes()
+
+    with open(path, 'wb') as handle:
+        handle.write(_PREAMBLE.pack(MAGIC, len(header_bytes), _digest(body)))
+        handle.write(body)
+    return header
+
+
+def is_model_artifact_file(path: str) -> bool:
+    """文件是否为二进制模型制品 (按魔数判断)"""
+    with open(path, 'rb') as handle:
+        return handle.read(len(MAGIC)) == MAGIC
+
+
+class ModelArtifactFile:
+    """
+    映射到内存的二进制模型制品
+    verify=True 时加载即校验摘要; weights 等参数为映射页面上的只读 float64 视图
+    """
+
+    def __init__(self, path: str, verify: bool = True):
+        self.path = path
+        with open(path, 'rb') as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.header = self._read_header(verify)
+        except Exception:
+            self._mmap.close()
+            raise
+        self._data = memoryview(self._mmap)[self.header['data_offset']:]
+
+    def _read_header(self, verify: bool) -> Dict:
+        if len(self._mmap) < _PREAMBLE.size:
+            raise ValueError(f"{self.path} 不是模型制品: 文件过短")
+        magic, header_length, digest = _PREAMBLE.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} 不是模型制品: 魔数不匹配")
+        if verify and _digest(memoryview(self._mmap)[_PREAMBLE.size:]) != digest:
+            raise ValueError(f"模型制品 {self.path} 摘要校验失败")
+        header = json.loads(self._mmap[_PREAMBLE.size:_PREAMBLE.size + header_length].decode('utf-8'))
+        if header.get('format_version') != FORMAT_VERSION or header.get('dtype') != '<f8':
+            raise ValueError(f"不支持的模型制品版本或数据类型: {header.get('format_version')}, {header.get('dtype')}")
+        if len(self._mmap) < header['data_offset'] + header['data_size']:
+            raise ValueError(f"{self.path} 数据区不完整")
+        return header
+
+    @property
+    def metadata(self) -> Dict:
+        """除数组字段外的制品内容 (model_id、版本、训练元数据、原签名等)"""
+        return self.header['metadata']
+
+    @property
+    def n_features(self) -> int:
+        return self.metadata['model_specification']['n_features']
+
+    def array(self, name: str) -> Optional[memoryview]:
+        """按名称取参数数组的零拷贝只读视图, 制品中没有该数组时返回 None"""
+        entry = self.header['arrays'].get(name)
+        if entry is None:
+            return None
+        start = entry['offset']
+        return self._data[start:start + entry['length'] * _FLOAT_BYTES].cast('d')
+
+    @property
+    def weights(self) -> memoryview:
+        return self.array('weights')
+
+    @property
+    def bias(self) -> float:
+        return self.array('bias')[0]
+
+    @property
+    def feature_transform(self) -> Optional[Dict]:
+        """特征变换状态 (与 FeatureTransformer.to_dict 格式一致; 未做标准化时 means/stds 保持为 None)"""
+        state = self.metadata.get('feature_transform')
+        if state is None:
+            return None
+        state = dict(state)
+        for field, name in (('means', 'transform_means'), ('stds', 'transform_stds')):
+            values = self.array(name)
+            if values is not None:
+                state[field] = values.tolist()
+        return state
+
+    def to_artifact(self) -> Dict:
+        """还原为 model_packaging_and_signing 格式的制品字典 (数组字段转为列表)"""
+        artifact = {key: dict(value) if isinstance(value, dict) else value for key, value in self.metadata.items()}
+        for name, entry in self.header['arrays'].items():
+            section, field = ARRAY_FIELDS[name]
+            values = self.array(name)
+            artifact.setdefault(section, {})[field] = values[0] if entry['scalar'] else values.tolist()
+        return artifact
+
+    def compile_predictor(self) -> CompiledPredictor:
+        """直接由映射的参数构建冻结的预测器 (作用于特征变换之后的模型输入)"""
+        return CompiledPredictor(self.weights, self.bias)
+
+    def close(self):
+        """解除映射; 仍有外部视图引用参数数组时, 映射在最后一个视图释放后由解释器回收"""
+        if self._mmap is None:
+            return
+        self._data = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+        self._mmap = None
+
+    def __enter__(self) -> 'ModelArtifactFile':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"ModelArtifactFile({self.path!r}, model_id={self.metadata.get('model_id')!r})"
@@ -0,0 +1,192 @@
+"""
+性能基准测试 - 对比纯Python实现与向量化引擎
+用法: python ml_benchmarks.py [train|inference|parallel] [--epochs N] [--sizes 10000,100000,1000000]
+      [--workers 1,2,4]
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import random
+import time
+from typing import Dict, List, Optional
+
+import ml_engine
+from advanced_ai_model import AdvancedMLSystem
+from ai_engineer_demo import DataEngineeringSuite
+from ml_parallel import DataParallelTrainer
+from ml_synthetic import SyntheticDataGenerator
+from simple_ml_model import SimpleMLModel
+
+
+def _generate_linear_data(n_samples: int, n_features: int = 3, seed: Optional[int] = None):
+    """生成与 SimpleMLModel 相同分布的基准数据"""
+    features, targets = SyntheticDataGenerator(n_samples, n_features, 'linear', seed=seed).to_dataset()
+    return features.tolist(), targets.tolist()
+
+
+def _timed_train(X, y, engine: str, epochs: int, seed: int):
+    """以固定随机种子训练并计时 (屏蔽训练日志)"""
+    model = SimpleMLModel()
+    random.seed(seed)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.train_model(X, y, epochs=epochs, engine=engine)
+    return time.perf_counter() - start, model
+
+
+def benchmark_simple_train_engines(sample_sizes: List[int] = (10_000, 100_000, 1_000_000),
+                                   epochs: int = 5, seed: int = 42) -> List[Dict]:
+    """对比 SimpleMLModel.train_model 的 python 与 numpy 引擎"""
+    ml_engine.require_numpy("训练引擎基准测试")
+    results = []
+
+    print(f"[BENCHMARK] SimpleMLModel.train_model, 每组 {epochs} 轮")
+    print(f"{'样本数':>10} {'python(s/轮)':>14} {'numpy(s/轮)':>14} {'加速比':>8} {'最大权重差':>12}")
+
+    for n_samples in sample_sizes:
+        X, y = _generate_linear_data(n_samples, seed=seed)
+        python_time, python_model = _timed_train(X, y, 'python', epochs, seed)
+        numpy_time, numpy_model = _timed_train(X, y, 'numpy', epochs, seed)
+
+        max_weight_diff = max(abs(a - b) for a, b in
+                              zip(python_model.weights + [python_model.bias],
+                                  numpy_model.weights + [numpy_model.bias]))
+        result = {
+            'n_samples': n_samples,
+            'epochs': epochs,
+            'python_seconds_per_epoch': python_time / epochs,
+            'numpy_seconds_per_epoch': numpy_time / epochs,
+            'speedup': python_time / numpy_time if numpy_time > 0 else float('inf'),
+            'max_weight_diff': max_weight_diff
+        }
+        results.append(result)
+
+        print(f"{n_samples:>10} {result['python_seconds_per_epoch']:>14.5f} "
+              f"{result['numpy_seconds_per_epoch']:>14.5f} {result['speedup']:>7.1f}x "
+              f"{max_weight_diff:>12.2e}")
+
+    return results
+
+
+def _time_per_call(func, repeats: int) -> float:
+    """多次调用取最快一轮的平均耗时 (秒)"""
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            func()
+        best = min(best, (time.perf_counter() - start) / repeats)
+    return best
+
+
+def benchmark_inference(n_features: int = 9, batch_sizes: List[int] = (1, 100, 10_000),
+                        seed: int = 42) -> List[Dict]:
+    """对比 AdvancedMLSystem 的缩放+预测流程与 CompiledPredictor (折叠缩放参数)"""
+    rng = random.Random(seed)
+    ml_system = AdvancedMLSystem(n_features=n_features)
+    ml_system.weights = [rng.gauss(0, 1) for _ in range(n_features)]
+    ml_system.bias = rng.gauss(0, 1)
+    ml_system.feature_scalers = [{'mean': rng.gauss(0, 1), 'std': rng.uniform(0.5, 2.0)}
+                                 for _ in range(n_features)]
+    ml_system.is_trained = True
+    predictor = ml_system.compile_predictor()
+    scalers = ml_system.feature_scalers
+
+    def scale(row):
+        return [(row[j] - scalers[j]['mean']) / scalers[j]['std'] for j in range(n_features)]
+
+    results = []
+    print(f"[BENCHMARK] 推理延迟, {n_features} 个特征 (原始未缩放输入)")
+    print(f"{'批大小':>8} {'原实现(us)':>12} {'编译后(us)':>12} {'加速比':>8}")
+
+    for batch_size in batch_sizes:
+        rows = [[rng.gauss(0, 1) for _ in range(n_features)] for _ in range(batch_size)]
+        repeats = max(1, 20_000 // batch_size)
+
+        if batch_size == 1:
+            row = rows[0]
+            baseline = _time_per_call(lambda: ml_system.predict_single(scale(row)), repeats)
+            compiled = _time_per_call(lambda: predictor.predict_single(row), repeats)
+        else:
+            matrix = ml_engine.to_array(rows) if ml_engine.HAS_NUMPY else rows
+            out = ml_engine.np.empty(batch_size) if ml_engine.HAS_NUMPY else None
+            baseline = _time_per_call(lambda: ml_system.predict_batch([scale(r) for r in rows]), repeats)
+            compiled = _time_per_call(lambda: predictor.predict_batch(matrix, out=out), repeats)
+
+        result = {
+            'batch_size': batch_size,
+            'baseline_us': baseline * 1e6,
+            'compiled_us': compiled * 1e6,
+            'speedup': baseline / compiled if compiled > 0 else float('inf')
+        }
+        results.append(result)
+        print(f"{batch_size:>8} {result['baseline_us']:>12.2f} {result['compiled_us']:>12.2f} "
+              f"{result['speedup']:>7.1f}x")
+
+    return results
+
+
+def benchmark_data_parallel(n_samples: int = 200_000, n_features: int = 20,
+                            worker_counts: Optional[List[int]] = None, epochs: int = 5,
+                            batch_size: Optional[int] = None, seed: int = 42) -> List[Dict]:
+    """数据并行训练的扩展性: 1 到 N 个工作进程在同一合成数据集上的每轮耗时 (默认全量梯度)"""
+    worker_counts = worker_counts or sorted({1, 2, 4, multiprocessing.cpu_count()})
+    with contextlib.redirect_stdout(io.StringIO()):
+        features, targets = DataEngineeringSuite().create_synthetic_dataset(
+            n_samples=n_samples, n_features=n_features, seed=seed)
+
+    results = []
+    print(f"[BENCHMARK] 数据并行训练, {n_samples} 样本 x {n_features} 特征, 每组 {epochs} 轮, "
+          f"批大小: {batch_size or '全量'}, CPU 核心数: {multiprocessing.cpu_count()}")
+    print(f"{'进程数':>6} {'s/轮':>10} {'样本/秒':>12} {'加速比':>8} {'并行效率':>8}")
+
+    baseline = None
+    for n_workers in worker_counts:
+        with DataParallelTrainer(features, targets, n_workers=n_workers) as trainer:
+            outcome = trainer.train([0.0] * n_features, 0.0, algorithm='sgd', learning_rate=0.01,
+                                    epochs=epochs, batch_size=batch_size)
+        seconds_per_epoch = sum(n_samples / t for t in outcome['epoch_throughput']) / epochs
+        baseline = baseline or seconds_per_epoch
+        speedup = baseline / seconds_per_epoch
+        result = {
+            'n_workers': n_workers,
+            'seconds_per_epoch': seconds_per_epoch,
+            'samples_per_second': n_samples / seconds_per_epoch,
+            'speedup': speedup,
+            'efficiency': speedup / n_workers
+        }
+        results.append(result)
+        print(f"{n_workers:>6} {seconds_per_epoch:>10.4f} {result['samples_per_second']:>12.0f} "
+              f"{speedup:>7.2f}x {result['efficiency']:>8.0%}")
+
+    return results
+
+
+def main():
+    """运行基准测试"""
+    parser = argparse.ArgumentParser(description="机器学习引擎性能基准测试")
+    parser.add_argument('suite', nargs='?', default='train', choices=['train', 'inference', 'parallel'],
+                        help="要运行的基准测试")
+    parser.add_argument('--epochs', type=int, default=5, help="每组测试的训练轮数")
+    parser.add_argument('--sizes', type=str, default=None,
+                        help="逗号分隔的样本数 (train 默认 10000,100000,1000000; parallel 默认 200000)")
+    parser.add_argument('--workers', type=str, default=None, help="逗号分隔的工作进程数 (parallel)")
+    args = parser.parse_args()
+    sample_sizes = [int(size) for size in args.sizes.split(',')] if args.sizes else None
+
+    if args.suite == 'inference':
+        if sample_sizes is not None:
+            parser.error("inference 基准测试不接受 --sizes")
+        benchmark_inference()
+    elif args.suite == 'parallel':
+        worker_counts = [int(n) for n in args.workers.split(',')] if args.workers else None
+        for n_samples in sample_sizes or [200_000]:
+            benchmark_data_parallel(n_samples=n_samples, worker_counts=worker_counts, epochs=args.epochs)
+    else:
+        benchmark_simple_train_engines(sample_sizes or (10_000, 100_000, 1_000_000), epochs=args.epochs)
+
+
+if __name__ == "__main__":
+    main()
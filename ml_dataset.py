@@ -0,0 +1,313 @@
+"""
+列式数据集 - 连续 float64 存储, 替代 List[List[float]]
+数据按列连续存放 (array / memoryview / 共享内存 / 内存映射文件), 行切片与列访问均为零拷贝视图;
+实现序列协议, 现有按行遍历、row[i] 索引的代码无需修改即可使用
+"""
+
+import operator
+import os
+from array import array
+from collections.abc import Sequence
+from multiprocessing import shared_memory
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from ml_engine import HAS_NUMPY, np
+
+_FLOAT_BYTES = 8
+
+
+def _as_float_view(buffer) -> memoryview:
+    """把任意可写缓冲区转换为一维 float64 memoryview"""
+    return memoryview(buffer).cast('B').cast('d')
+
+
+class RowView(Sequence):
+    """数据集中一行的只读视图 (不复制数据); 切片返回列表"""
+
+    __slots__ = ('_dataset', '_index')
+
+    def __init__(self, dataset: 'ColumnarDataset', index: int):
+        self._dataset = dataset
+        self._index = index
+
+    def __len__(self) -> int:
+        return self._dataset.n_columns
+
+    def __getitem__(self, j):
+        if j.__class__ is slice:
+            columns = self._dataset._column_views()
+            return [columns[k][self._index] for k in range(*j.indices(len(columns)))]
+        return self._dataset._column_views()[j][self._index]
+
+    def __iter__(self) -> Iterator[float]:
+        index = self._index
+        for column in self._dataset._column_views():
+            yield column[index]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (RowView, list, tuple)):
+            return self.tolist() == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def tolist(self) -> List[float]:
+        return list(self)
+
+    def __repr__(self) -> str:
+        return f"RowView({self.tolist()})"
+
+
+class ColumnarDataset(Sequence):
+    """
+    列主序 float64 数据集
+    第 j 列第 i 行位于底层缓冲区的 j * stride + offset + i; 行切片共享底层缓冲区, 只调整 offset 与行数
+    """
+
+    def __init__(self, buffer, n_rows: int, n_columns: int,
+                 column_stride: Optional[int] = None, row_offset: int = 0,
+                 shm: Optional[shared_memory.SharedMemory] = None, owns_shm: bool = False,
+                 base: Optional['ColumnarDataset'] = None, mapped_file: Optional[Tuple] = None):
+        data = buffer if isinstance(buffer, memoryview) and buffer.format == 'd' else _as_float_view(buffer)
+        stride = n_rows if column_stride is None else column_stride
+        if n_columns and len(data) < (n_columns - 1) * stride + row_offset + n_rows:
+            raise ValueError("缓冲区大小与数据集形状不匹配")
+        self._data = data
+        self._stride = stride
+        self._offset = row_offset
+        self.n_rows = n_rows
+        self.n_columns = n_columns
+        self._shm = shm
+        self._owns_shm = owns_shm
+        # 视图持有底层数据集的引用, 保证缓冲区在视图存活期间有效
+        self._base = base
+        # 内存映射文件的 (路径, 大小, 修改时间); 序列化时只传递路径, 接收方映射同一文件
+        self._mapped_file = mapped_file
+        self._columns: Optional[List[memoryview]] = None
+
+    # ---- 构造 ----
+
+    @classmethod
+    def empty(cls, n_rows: int, n_columns: int, shared: bool = False) -> 'ColumnarDataset':
+        """创建全零数据集 (shared=True 时分配在共享内存中)"""
+        if shared:
+            shm = shared_memory.SharedMemory(create=True, size=max(1, n_rows * n_columns) * _FLOAT_BYTES)
+            return cls(shm.buf[:n_rows * n_columns * _FLOAT_BYTES], n_rows, n_columns,
+                       shm=shm, owns_shm=True)
+        return cls(array('d', bytes(n_rows * n_columns * _FLOAT_BYTES)), n_rows, n_columns)
+
+    @classmethod
+    def from_rows(cls, rows, n_columns: Optional[int] = None) -> 'ColumnarDataset':
+        """从按行组织的数据 (列表的列表或二维数组) 构建"""
+        if isinstance(rows, ColumnarDataset):
+            return rows.copy()
+        n_rows = len(rows)
+        if HAS_NUMPY and n_rows:
+            matrix = np.asarray(rows, dtype=np.float64)
+            if matrix.ndim != 2:
+                raise ValueError(f"期望 2 维数据, 实际为 {matrix.ndim} 维")
+            return cls(np.ravel(matrix, order='F').copy(), matrix.shape[0], matrix.shape[1])
+        if n_columns is None:
+            n_columns = len(rows[0]) if n_rows else 0
+        data = array('d')
+        for j in range(n_columns):
+            data.extend(map(operator.itemgetter(j), rows))
+        return cls(data, n_rows, n_columns)
+
+    @classmethod
+    def from_columns(cls, columns: Iterable[Iterable[float]]) -> 'ColumnarDataset':
+        """从按列组织的数据构建"""
+        data = array('d')
+        n_columns = 0
+        for column in columns:
+            data.extend(column)
+            n_columns += 1
+        n_rows = len(data) // n_columns if n_columns else 0
+        if n_rows * n_columns != len(data):
+            raise ValueError("各列长度不一致")
+        return cls(data, n_rows, n_columns)
+
+    @classmethod
+    def attach(cls, name: str, n_rows: int, n_columns: int,
+               column_stride: Optional[int] = None, row_offset: int = 0) -> 'ColumnarDataset':
+        """挂载其他进程创建的共享内存数据集 (零拷贝, 不负责释放共享内存)"""
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm.buf, n_rows, n_columns, column_stride, row_offset, shm=shm)
+
+    def to_shared(self) -> 'ColumnarDataset':
+        """复制到共享内存; 返回的数据集可直接传给进程池 (序列化时只传递共享内存名称)"""
+        shared = ColumnarDataset.empty(self.n_rows, self.n_columns, shared=True)
+        for j in range(self.n_columns):
+            shared.column(j)[:] = self.column(j)
+        return shared
+
+    def copy(self) -> 'ColumnarDataset':
+        """复制为独立的连续数据集"""
+        data = array('d')
+        for j in range(self.n_columns):
+            data.frombytes(self.column(j).cast('B'))
+        return ColumnarDataset(data, self.n_rows, self.n_columns)
+
+    # ---- 访问 ----
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.n_rows, self.n_columns
+
+    @property
+    def nbytes(self) -> int:
+        """数据占用的字节数"""
+        return self.n_rows * self.n_columns * _FLOAT_BYTES
+
+    @property
+    def shm_name(self) -> Optional[str]:
+        return self._shm.name if self._shm is not None else None
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def __getitem__(self, index):
+        if index.__class__ is int:
+            return RowView(self, self._normalize_row(index))
+        if isinstance(index, tuple):
+            i, j = index
+            return self.column(j)[self._normalize_row(i)]
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.n_rows)
+            if step != 1:
+                return [RowView(self, i) for i in range(start, stop, step)]
+            return ColumnarDataset(self._data, max(0, stop - start), self.n_columns, self._stride,
+                                   self._offset + start, shm=self._shm, base=self._base or self,
+                                   mapped_file=self._mapped_file)
+        return RowView(self, self._normalize_row(index))
+
+    def _normalize_row(self, i: int) -> int:
+        if i < 0:
+            i += self.n_rows
+        if not 0 <= i < self.n_rows:
+            raise IndexError("行索引越界")
+        return i
+
+    def __iter__(self) -> Iterator[RowView]:
+        """按行遍历, 每行为 RowView (与 dataset[i] 相同); 需要更快的逐行遍历时使用 iter_rows()"""
+        for i in range(self.n_rows):
+            yield RowView(self, i)
+
+    def _column_views(self) -> List[memoryview]:
+        if self._columns is None:
+            self._columns = self.columns()
+        return self._columns
+
+    def column(self, j: int) -> memoryview:
+        """第 j 列的零拷贝 float64 视图 (可写)"""
+        if not 0 <= j < self.n_columns:
+            raise IndexError("列索引越界")
+        start = j * self._stride + self._offset
+        return self._data[start:start + self.n_rows]
+
+    def columns(self) -> List[memoryview]:
+        return [self.column(j) for j in range(self.n_columns)]
+
+    def iter_rows(self) -> Iterator[Tuple[float, ...]]:
+        """按行快速遍历 (每行为元组)"""
+        return zip(*self._column_views())
+
+    def tolist(self) -> List[List[float]]:
+        """转换为列表的列表"""
+        return [list(row) for row in self.iter_rows()]
+
+    def to_numpy(self):
+        """返回 (n_rows, n_columns) 的零拷贝 numpy 视图 (Fortran 序, 可写)"""
+        if not HAS_NUMPY:
+            raise ImportError("to_numpy 需要安装 numpy (pip install numpy)")
+        return np.ndarray((self.n_rows, self.n_columns), dtype=np.float64, buffer=self._data,
+                          offset=self._offset * _FLOAT_BYTES,
+                          strides=(_FLOAT_BYTES, self._stride * _FLOAT_BYTES))
+
+    def __array__(self, dtype=None, copy=None):
+        matrix = self.to_numpy()
+        if dtype is not None and dtype != matrix.dtype:
+            return matrix.astype(dtype)
+        return matrix.copy() if copy else matrix
+
+    def standardize(self, means: List[float], stds: List[float]):
+        """原地按列标准化: (x - mean) / std"""
+        if len(means) != self.n_columns or len(stds) != self.n_columns:
+            raise ValueError("缩放参数长度与列数不一致")
+        for j in range(self.n_columns):
+            column = self.column(j)
+            if HAS_NUMPY:
+                values = np.frombuffer(column, dtype=np.float64)
+                values -= means[j]
+                values /= stds[j]
+            else:
+                mean, std = means[j], stds[j]
+                column[:] = array('d', [(x - mean) / std for x in column])
+
+    def dot(self, weights: List[float], bias: float = 0.0) -> List[float]:
+        """逐列累加计算 X @ w + b"""
+        if len(weights) != self.n_columns:
+            raise ValueError(f"特征数不匹配: 期望 {self.n_columns}, 实际 {len(weights)}")
+        if HAS_NUMPY:
+            return (self.to_numpy() @ np.asarray(weights, dtype=np.float64) + bias).tolist()
+        result = [bias] * self.n_rows
+        for w, column in zip(weights, self.columns()):
+            result = [r + w * x for r, x in zip(result, column)]
+        return result
+
+    # ---- 生命周期与序列化 ----
+
+    def close(self):
+        """释放对共享内存的映射 (创建者同时删除共享内存); 之后本数据集及其视图不可再访问"""
+        if self._shm is None or self._base is not None:
+            return
+        self._columns = None
+        self._data.release()
+        self._shm.close()
+        if self._owns_shm:
+            self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self) -> 'ColumnarDataset':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __reduce__(self):
+        # 共享内存与内存映射文件数据集只序列化名称与布局, 接收方挂载同一块内存; 其余情况复制数据
+        if self._shm is not None:
+            return (ColumnarDataset.attach,
+                    (self._shm.name, self.n_rows, self.n_columns, self._stride, self._offset))
+        if self._mapped_file is not None:
+            return (ColumnarDataset._attach_file,
+                    (self._mapped_file, self.n_rows, self.n_columns, self._stride, self._offset))
+        return (ColumnarDataset._from_bytes, (self.copy()._data.tobytes(), self.n_rows, self.n_columns))
+
+    @staticmethod
+    def _attach_file(mapped_file: Tuple, n_rows: int, n_columns: int,
+                     column_stride: int, row_offset: int) -> 'ColumnarDataset':
+        """以只读方式重新映射列式数据文件 (文件在序列化之后被修改时报错)"""
+        from ml_storage import ColumnarFile
+
+        path, size, mtime_ns = mapped_file
+        stat = os.stat(path)
+        if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+            raise ValueError(f"列式数据文件 {path} 已被修改")
+        data = ColumnarFile(path).dataset._data
+        return ColumnarDataset(data, n_rows, n_columns, column_stride, row_offset, mapped_file=mapped_file)
+
+    @staticmethod
+    def _from_bytes(payload: bytes, n_rows: int, n_columns: int) -> 'ColumnarDataset':
+        data = array('d')
+        data.frombytes(payload)
+        return ColumnarDataset(data, n_rows, n_columns)
+
+    def __repr__(self) -> str:
+        if self._shm is not None:
+            storage = f"shm={self._shm.name}"
+        elif self._mapped_file is not None:
+            storage = f"file={self._mapped_file[0]}"
+        else:
+            storage = "local"
+        return f"ColumnarDataset(rows={self.n_rows}, columns={self.n_columns}, {storage})"
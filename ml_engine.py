@@ -0,0 +1,404 @@
+"""
+线性模型数值计算引擎 - 基于数组的向量化训练内核
+numpy 为可选依赖，未安装时各模型继续使用纯 Python 实现
+"""
+
+import csv
+import random
+import time
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from ml_optimizers import OPTIMIZERS, Optimizer, optimizer_for_training
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:  # numpy 为可选依赖
+    np = None
+    HAS_NUMPY = False
+
+
+def require_numpy(feature: str):
+    """检查 numpy 是否可用"""
+    if not HAS_NUMPY:
+        raise ImportError(f"{feature} 需要安装 numpy (pip install numpy)")
+
+
+def to_array(data, ndim: int = 2):
+    """
+    将数据转换为 float64 数组
+    已是数组且某一维步长为单个元素 (如 ColumnarDataset、内存映射文件的列主序视图) 时不复制, 可直接用于矩阵运算
+    """
+    require_numpy("向量化计算")
+    array = np.asarray(data, dtype=np.float64)
+    if array.ndim != ndim:
+        raise ValueError(f"期望 {ndim} 维数据, 实际为 {array.ndim} 维")
+    if not _has_unit_stride(array):
+        array = np.ascontiguousarray(array)
+    return array
+
+
+def _has_unit_stride(array) -> bool:
+    """数组是否行连续或列连续 (允许另一维带填充的步长)"""
+    if array.flags.c_contiguous or array.flags.f_contiguous:
+        return True
+    if array.ndim != 2:
+        return False
+    item = array.itemsize
+    rows, columns = array.strides
+    return ((rows == item and columns % item == 0 and columns >= item * array.shape[0]) or
+            (columns == item and rows % item == 0 and rows >= item * array.shape[1]))
+
+
+def batch_gradient_descent(X, y, weights: List[float], bias: float,
+                           learning_rate: float = 0.01,
+                           epochs: int = 1000) -> Tuple[List[float], float]:
+    """全批量梯度下降 (矩阵运算完成前向传播、梯度计算与参数更新)"""
+    X = to_array(X)
+    y = to_array(y, ndim=1)
+    w = np.array(weights, dtype=np.float64)
+    b = float(bias)
+    n_samples = X.shape[0]
+    step = learning_rate / n_samples
+
+    for _ in range(epochs):
+        errors = X @ w
+        errors += b - y
+        w -= step * (X.T @ errors)
+        b -= step * float(errors.sum())
+
+    return w.tolist(), b
+
+
+SOLVERS = ('gd', 'normal', 'cholesky', 'qr')
+
+
+def validate_solver(solver: str):
+    """检查求解器名称"""
+    if solver not in SOLVERS:
+        raise ValueError(f"不支持的求解器: {solver}, 可选: {', '.join(SOLVERS)}")
+
+
+def solve_least_squares(X, y, l2_regularization: float = 0.0,
+                        method: str = 'cholesky') -> Tuple[List[float], float]:
+    """
+    闭式求解带截距的(岭)最小二乘: min ||Xw + b - y||^2 + l2_regularization * ||w||^2
+    截距不参与正则化; method 可选 'normal' / 'cholesky' / 'qr'
+    """
+    if method not in SOLVERS[1:]:
+        raise ValueError(f"不支持的闭式求解方法: {method}")
+    if not HAS_NUMPY:
+        if method == 'qr':
+            require_numpy("QR 求解器")
+        return _python_normal_equation(X, y, l2_regularization)
+
+    X = to_array(X)
+    y = to_array(y, ndim=1)
+    n_samples, n_features = X.shape
+    design = np.empty((n_samples, n_features + 1))
+    design[:, :n_features] = X
+    design[:, n_features] = 1.0
+    penalty = np.full(n_features + 1, float(l2_regularization))
+    penalty[n_features] = 0.0  # 截距不参与正则化
+
+    if method == 'qr':
+        if l2_regularization > 0:
+            # 岭回归等价于在设计矩阵下方追加 sqrt(lambda) * I 的增广最小二乘
+            design = np.vstack([design, np.diag(np.sqrt(penalty))])
+            y = np.concatenate([y, np.zeros(n_features + 1)])
+        q, r = np.linalg.qr(design)
+        theta = np.linalg.solve(r, q.T @ y)
+    else:
+        gram = design.T @ design
+        gram[np.diag_indices_from(gram)] += penalty
+        moment = design.T @ y
+        if method == 'normal':
+            theta = np.linalg.solve(gram, moment)
+        else:
+            lower = np.linalg.cholesky(gram)
+            theta = np.linalg.solve(lower.T, np.linalg.solve(lower, moment))
+
+    return theta[:n_features].tolist(), float(theta[n_features])
+
+
+def _python_normal_equation(X, y, l2_regularization: float) -> Tuple[List[float], float]:
+    """纯Python正规方程: 单遍累积 A^T A 与 A^T y, 再用 Cholesky 分解求解"""
+    n_features = len(X[0])
+    size = n_features + 1
+    gram = [[0.0] * size for _ in range(size)]
+    moment = [0.0] * size
+
+    for row, target in zip(X, y):
+        augmented = list(row) + [1.0]
+        for a in range(size):
+            value = augmented[a]
+            moment[a] += value * target
+            gram_row = gram[a]
+            for b in range(a + 1):
+                gram_row[b] += value * augmented[b]
+
+    for j in range(n_features):
+        gram[j][j] += l2_regularization
+
+    # Cholesky 分解 (仅使用下三角)
+    lower = [[0.0] * size for _ in range(size)]
+    for a in range(size):
+        for b in range(a + 1):
+            partial = gram[a][b] - sum(lower[a][k] * lower[b][k] for k in range(b))
+            if a == b:
+                if partial <= 0:
+                    raise ValueError("正规方程矩阵非正定, 请检查特征是否共线或增大正则化系数")
+                lower[a][a] = partial ** 0.5
+            else:
+                lower[a][b] = partial / lower[b][b]
+
+    # 前代求解 L z = A^T y, 回代求解 L^T theta = z
+    z = [0.0] * size
+    for a in range(size):
+        z[a] = (moment[a] - sum(lower[a][k] * z[k] for k in range(a))) / lower[a][a]
+    theta = [0.0] * size
+    for a in reversed(range(size)):
+        theta[a] = (z[a] - sum(lower[k][a] * theta[k] for k in range(a + 1, size))) / lower[a][a]
+
+    return theta[:n_features], theta[n_features]
+
+
+BatchSource = Union[Iterable[Tuple], Callable[[], Iterable[Tuple]]]
+
+
+def iter_csv_batches(path: str, batch_size: int = 1024, target_column: int = -1,
+                     has_header: bool = True) -> Iterator[Tuple[List[List[float]], List[float]]]:
+    """按批读取 CSV 文件, 每批返回 (特征, 目标), 内存占用只与批大小有关"""
+    with open(path, newline='') as handle:
+        reader = csv.reader(handle)
+        if has_header:
+            next(reader, None)
+        features, targets = [], []
+        for record in reader:
+            if not record:
+                continue
+            values = [float(value) for value in record]
+            targets.append(values.pop(target_column))
+            features.append(values)
+            if len(features) == batch_size:
+                yield features, targets
+                features, targets = [], []
+        if features:
+            yield features, targets
+
+
+def write_binary_batches(path: str, batches: Iterable[Tuple]) -> int:
+    """将 (特征, 目标) 批次写入二进制分块文件: 每行为 n_features 个特征加 1 个目标的 float64"""
+    n_rows = 0
+    with open(path, 'wb') as handle:
+        for features, targets in batches:
+            buffer = array('d')
+            for row, target in zip(features, targets):
+                buffer.extend(row)
+                buffer.append(target)
+            buffer.tofile(handle)
+            n_rows += len(targets)
+    return n_rows
+
+
+def iter_binary_batches(path: str, n_features: int, batch_size: int = 1024,
+                        as_arrays: bool = False) -> Iterator[Tuple]:
+    """按批读取二进制分块文件; as_arrays=True 时返回 numpy 数组 (需安装numpy)"""
+    if as_arrays:
+        require_numpy("数组形式的二进制批读取")
+    row_width = n_features + 1
+    chunk_bytes = batch_size * row_width * 8
+    with open(path, 'rb') as handle:
+        while True:
+            chunk = handle.read(chunk_bytes)
+            if not chunk:
+                break
+            if len(chunk) % (row_width * 8):
+                raise ValueError(f"二进制文件 {path} 长度与特征数 {n_features} 不匹配")
+            if as_arrays:
+                block = np.frombuffer(chunk, dtype=np.float64).reshape(-1, row_width)
+                yield block[:, :n_features], block[:, n_features]
+            else:
+                values = array('d')
+                values.frombytes(chunk)
+                features = [values[i:i + n_features].tolist()
+                            for i in range(0, len(values), row_width)]
+                targets = values[n_features::row_width].tolist()
+                yield features, targets
+
+
+class StreamingLinearTrainer:
+    """增量线性回归训练器 - 逐批更新权重, 峰值内存由批大小而非数据集大小决定"""
+
+    def __init__(self, weights: Optional[List[float]] = None, bias: float = 0.0,
+                 learning_rate: float = 0.01, algorithm: str = 'sgd',
+                 l2_regularization: float = 0.0, optimizer: Optional[Optimizer] = None):
+        if algorithm.lower() not in OPTIMIZERS:
+            raise ValueError(f"不支持的优化算法: {algorithm}")
+        self.weights = list(weights) if weights is not None else None
+        self.bias = bias
+        self.learning_rate = learning_rate
+        self.algorithm = algorithm
+        self.l2_regularization = l2_regularization
+        self.samples_seen = 0
+        self.steps = 0
+        # 优化器在首个批次确定特征数后创建 (或沿用传入的检查点状态)
+        self.optimizer = optimizer
+
+    def partial_fit(self, X_batch, y_batch) -> float:
+        """使用一个批次更新参数, 返回该批次更新前的均方误差"""
+        n_batch = len(y_batch)
+        if n_batch == 0:
+            return 0.0
+        if self.weights is None:
+            self.weights = [random.uniform(-0.01, 0.01) for _ in range(len(X_batch[0]))]
+        if self.optimizer is None:
+            self.optimizer = optimizer_for_training(self.algorithm, len(self.weights) + 1,
+                                                    self.learning_rate, self.l2_regularization)
+
+        if HAS_NUMPY:
+            X = to_array(X_batch)
+            errors = X @ np.asarray(self.weights) + self.bias - to_array(y_batch, ndim=1)
+            weight_gradients = (X.T @ errors).tolist()
+            bias_gradient = float(errors.sum())
+            batch_loss = float(errors @ errors) / n_batch
+        else:
+            weight_gradients = [0.0] * len(self.weights)
+            bias_gradient = 0.0
+            batch_loss = 0.0
+            for row, target in zip(X_batch, y_batch):
+                error = sum(w * x for w, x in zip(self.weights, row)) + self.bias - target
+                for j, x in enumerate(row):
+                    weight_gradients[j] += error * x
+                bias_gradient += error
+                batch_loss += error * error
+            batch_loss /= n_batch
+
+        # 与工作台一致: 梯度加 L2 项后取批均值 (AdamW 的权重衰减由优化器解耦处理)
+        l2 = 0.0 if self.optimizer.decoupled_weight_decay else self.l2_regularization
+        gradients = [(g + l2 * w) / n_batch for g, w in zip(weight_gradients, self.weights)]
+        gradients.append(bias_gradient / n_batch)
+        params = self.weights + [self.bias]
+        self.optimizer.step(params, gradients)
+        self.weights = params[:-1]
+        self.bias = params[-1]
+        self.steps += 1
+        self.samples_seen += n_batch
+        return batch_loss
+
+    def fit(self, batch_source: BatchSource, epochs: int = 1) -> Dict:
+        """
+        在批次数据源上训练 epochs 轮
+        多轮训练时 batch_source 须为返回新迭代器的可调用对象 (例如 lambda: iter_csv_batches(path))
+        """
+        if epochs > 1 and not callable(batch_source):
+            raise ValueError("多轮流式训练需要可重复创建迭代器的数据源 (传入可调用对象)")
+
+        epoch_losses = []
+        for _ in range(epochs):
+            batches = batch_source() if callable(batch_source) else batch_source
+            total_loss, total_samples = 0.0, 0
+            for X_batch, y_batch in batches:
+                batch_loss = self.partial_fit(X_batch, y_batch)
+                total_loss += batch_loss * len(y_batch)
+                total_samples += len(y_batch)
+            if total_samples == 0:
+                raise ValueError("数据源未产生任何批次")
+            epoch_losses.append(total_loss / total_samples)
+
+        return {
+            'epochs_run': epochs,
+            'steps': self.steps,
+            'samples_seen': self.samples_seen,
+            'epoch_losses': epoch_losses
+        }
+
+
+def minibatch_train(X, y, X_val, y_val, weights: List[float], bias: float,
+                    algorithm: str = 'adam', learning_rate: float = 0.001, epochs: int = 500,
+                    batch_size: int = 32, early_stopping_patience: int = 20,
+                    l2_regularization: float = 0.01, shuffle: bool = False, seed: Optional[int] = None,
+                    on_epoch: Optional[Callable[[int, float, float], None]] = None,
+                    optimizer: Optional[Optimizer] = None, history=None) -> Dict:
+    """
+    向量化小批量训练 (SGD / 动量SGD / Adam / AdamW, 含 L2 正则与早停)
+    每个批次的前向传播、梯度、正则项和参数更新均为数组运算; on_epoch(epoch, train_loss, val_loss) 用于日志回调
+    传入已有的 optimizer 时沿用其矩估计与全局步数继续训练; history 为 TrainingHistoryWriter 时逐轮记录损失与参数快照
+    """
+    X = to_array(X)
+    y = to_array(y, ndim=1)
+    X_val = to_array(X_val)
+    y_val = to_array(y_val, ndim=1)
+    n_samples, n_features = X.shape
+    rng = np.random.default_rng(seed)
+
+    if optimizer is None:
+        optimizer = optimizer_for_training(algorithm, n_features + 1, learning_rate, l2_regularization)
+    # 解耦权重衰减由优化器处理, 不再叠加到梯度上
+    gradient_l2 = 0.0 if optimizer.decoupled_weight_decay else l2_regularization
+
+    # 参数与梯度各占一段连续内存: [w_1, ..., w_n, b]
+    params = np.empty(n_features + 1)
+    params[:n_features] = weights
+    params[n_features] = bias
+    w = params[:n_features]
+    grads = np.empty(n_features + 1)
+    n_batches = (n_samples + batch_size - 1) // batch_size
+
+    best_val_loss = float('inf')
+    patience_counter = 0
+    epoch_throughput = []
+
+    for epoch in range(epochs):
+        epoch_start = time.perf_counter()
+        if shuffle:
+            order = rng.permutation(n_samples)
+            X_epoch, y_epoch = X[order], y[order]
+        else:
+            X_epoch, y_epoch = X, y
+
+        total_train_loss = 0.0
+        for start in range(0, n_samples, batch_size):
+            X_batch = X_epoch[start:start + batch_size]
+            errors = X_batch @ w + params[n_features] - y_epoch[start:start + batch_size]
+            n_batch = errors.shape[0]
+
+            np.matmul(X_batch.T, errors, out=grads[:n_features])
+            grads[:n_features] += gradient_l2 * w
+            grads[n_features] = errors.sum()
+            grads /= n_batch
+            optimizer.step(params, grads)
+
+            total_train_loss += float(errors @ errors) / n_batch
+
+        avg_train_loss = total_train_loss / n_batches
+        epoch_throughput.append(n_samples / max(time.perf_counter() - epoch_start, 1e-12))
+
+        val_errors = X_val @ w + params[n_features] - y_val
+        val_loss = float(val_errors @ val_errors) / val_errors.shape[0]
+
+        if val_loss < best_val_loss:
+            best_val_loss = val_loss
+            patience_counter = 0
+        else:
+            patience_counter += 1
+
+        if patience_counter >= early_stopping_patience:
+            break
+
+        if on_epoch is not None:
+            on_epoch(epoch, avg_train_loss, val_loss)
+        if history is not None:
+            history.record(epoch, avg_train_loss, val_loss, params)
+
+    return {
+        'weights': w.tolist(),
+        'bias': float(params[n_features]),
+        'epochs_run': epoch + 1,
+        'final_training_loss': avg_train_loss,
+        'best_validation_loss': best_val_loss,
+        'early_stopped': patience_counter >= early_stopping_patience,
+        'epoch_throughput': epoch_throughput,
+        'optimizer': optimizer
+    }
@@ -0,0 +1,119 @@
+"""
+批量模型解释 - 线性模型的逐特征贡献分解
+一个数据块的贡献矩阵 (样本 x 特征, 即特征值逐元素乘以权重) 一次计算完成, 每行的前 k 个特征
+用部分选择 (argpartition / heapq) 取出而非全排序; 结果可按块以 JSON Lines 流式写入磁盘, 内存只与块大小有关
+"""
+
+import heapq
+import json
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from ml_engine import HAS_NUMPY, np, to_array
+
+
+def contribution_matrix(features, weights: Sequence[float]):
+    """贡献矩阵: contributions[i][j] = features[i][j] * weights[j] (numpy 可用时为二维数组)"""
+    if HAS_NUMPY:
+        return to_array(features) * np.asarray(weights, dtype=np.float64)
+    return [[x * w for x, w in zip(row, weights)] for row in features]
+
+
+def top_k_indices(contributions, k: int):
+    """
+    每行按贡献绝对值从大到小取前 k 个特征下标; 绝对值相同时下标小者在前 (与稳定排序结果一致)
+    numpy 路径返回 (n, k) 整数数组, 纯 Python 路径返回列表的列表
+    """
+    if HAS_NUMPY:
+        magnitudes = np.abs(contributions)
+        n_features = magnitudes.shape[1]
+        k = min(k, n_features)
+        if k <= 0:
+            return np.empty((magnitudes.shape[0], 0), dtype=np.intp)
+        if k < n_features:
+            # 第 k 大的值用部分选择求出; 严格大于它的全部入选, 与它相等的按下标从小到大补足 k 个
+            # (argpartition 在边界处的并列值中任意取舍, 不能直接使用其下标)
+            kth = -np.partition(-magnitudes, k - 1, axis=1)[:, k - 1:k]
+            above = magnitudes > kth
+            tied = magnitudes == kth
+            needed = k - above.sum(axis=1, keepdims=True)
+            selected = above | (tied & (np.cumsum(tied, axis=1) <= needed))
+            candidates = np.nonzero(selected)[1].reshape(-1, k)
+        else:
+            candidates = np.broadcast_to(np.arange(n_features), magnitudes.shape)
+        order = np.argsort(-np.take_along_axis(magnitudes, candidates, axis=1), axis=1, kind='stable')
+        return np.take_along_axis(candidates, order, axis=1)
+    return [heapq.nlargest(k, range(len(row)), key=lambda j: abs(row[j])) for row in contributions]
+
+
+def explain_batch(features, weights: Sequence[float], bias: float, top_k: int = 5) -> Dict:
+    """
+    解释一个数据块: 返回贡献矩阵、预测值以及每行前 top_k 个特征的下标与贡献
+    numpy 可用时各项均为数组, 适合直接做进一步的向量化分析
+    """
+    contributions = contribution_matrix(features, weights)
+    indices = top_k_indices(contributions, top_k)
+    if HAS_NUMPY:
+        predictions = contributions.sum(axis=1) + bias
+        top_contributions = np.take_along_axis(contributions, indices, axis=1)
+    else:
+        predictions = [sum(row) + bias for row in contributions]
+        top_contributions = [[row[j] for j in row_indices] for row, row_indices in zip(contributions, indices)]
+    return {
+        'contributions': contributions,
+        'predictions': predictions,
+        'top_indices': indices,
+        'top_contributions': top_contributions
+    }
+
+
+def iter_explanations(features, weights: Sequence[float], bias: float, targets=None,
+                      top_k: int = 5, chunk_size: int = 65536,
+                      start_index: int = 0) -> Iterator[Dict]:
+    """按块计算并逐行生成解释字典 (格式与 MachineLearningWorkbench.generate_model_explanation 一致)"""
+    weights = [float(w) for w in weights]
+    for start in range(0, len(features), chunk_size):
+        chunk = features[start:start + chunk_size]
+        batch = explain_batch(chunk, weights, bias, top_k)
+        if HAS_NUMPY:
+            values = to_array(chunk)
+            rows = zip(values.tolist(), batch['top_indices'].tolist(),
+                       batch['top_contributions'].tolist(), batch['predictions'].tolist())
+        else:
+            rows = zip(chunk, batch['top_indices'], batch['top_contributions'], batch['predictions'])
+        for offset, (row, indices, contributions, predicted_value) in enumerate(rows):
+            i = start + offset
+            actual_value = float(targets[i]) if targets is not None and i < len(targets) else None
+            yield {
+                'sample_index': start_index + i,
+                'feature_contributions': [
+                    {'feature_index': j, 'feature_value': row[j], 'weight': weights[j], 'contribution': contribution}
+                    for j, contribution in zip(indices, contributions)
+                ],
+                'bias_contribution': bias,
+                'predicted_value': predicted_value,
+                'actual_value': actual_value,
+                'prediction_error': abs(predicted_value - actual_value) if actual_value is not None else None
+            }
+
+
+def write_explanations(path: str, features, weights: Sequence[float], bias: float, targets=None,
+                       top_k: int = 5, chunk_size: int = 65536) -> int:
+    """把每行的解释以 JSON Lines 格式流式写入 path, 返回写入的行数"""
+    n_written = 0
+    with open(path, 'w', encoding='utf-8') as handle:
+        lines: List[str] = []
+        for explanation in iter_explanations(features, weights, bias, targets, top_k, chunk_size):
+            lines.append(json.dumps(explanation, ensure_ascii=False))
+            if len(lines) >= chunk_size:
+                handle.write('\n'.join(lines) + '\n')
+                n_written += len(lines)
+                lines = []
+        if lines:
+            handle.write('\n'.join(lines) + '\n')
+            n_written += len(lines)
+    return n_written
+
+
+def global_feature_importance(weights: Sequence[float], k: int = 10) -> List[Tuple[float, int]]:
+    """按权重绝对值取前 k 个特征, 返回 (|权重|, 特征下标) 列表"""
+    return heapq.nlargest(k, ((abs(w), j) for j, w in enumerate(weights)))
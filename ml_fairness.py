@@ -0,0 +1,140 @@
+"""
+公平性分组统计 - 单遍哈希分组替代逐组重复扫描
+敏感属性先映射为组编号 (离散值精确分组, 连续值按分位数或等宽分箱), 再在同一遍中累计
+各组的样本数、预测与目标之和、正预测数、真正例数与实际正例数, 由此得到人口统计平等与机会均等指标
+"""
+
+import bisect
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ml_engine import HAS_NUMPY, np
+
+BINNING_METHODS = ('auto', 'exact', 'quantile', 'uniform')
+
+
+def _quantile(sorted_values: Sequence[float], q: float) -> float:
+    """线性插值分位数 (与 numpy.quantile 默认方法一致)"""
+    position = q * (len(sorted_values) - 1)
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _bin_edges(values, binning: str, n_bins: int) -> Tuple[List[float], float, float]:
+    """计算内部分箱边界 (去重后升序) 以及数据的最小、最大值"""
+    if HAS_NUMPY:
+        low, high = float(values.min()), float(values.max())
+        if binning == 'quantile':
+            edges = np.quantile(values, np.arange(1, n_bins) / n_bins)
+        else:
+            edges = np.linspace(low, high, n_bins + 1)[1:-1]
+        return sorted(set(edges.tolist())), low, high
+    ordered = sorted(values)
+    low, high = ordered[0], ordered[-1]
+    if binning == 'quantile':
+        edges = [_quantile(ordered, k / n_bins) for k in range(1, n_bins)]
+    else:
+        edges = [low + (high - low) * k / n_bins for k in range(1, n_bins)]
+    return sorted(set(edges)), low, high
+
+
+def bucket_attribute(values, binning: str = 'auto', n_bins: int = 4,
+                     max_exact_groups: int = 32) -> Tuple[List[int], List, List[Optional[Tuple[float, float]]]]:
+    """
+    把敏感属性映射为组编号
+    返回 (每个样本的组编号, 各组标签, 各组取值范围); binning='auto' 时不同取值不超过 max_exact_groups
+    按值精确分组, 否则按分位数分箱. 精确分组的标签为属性值本身, 分箱的标签为区间字符串
+    """
+    if binning not in BINNING_METHODS:
+        raise ValueError(f"不支持的分组方式: {binning}, 可选: {', '.join(BINNING_METHODS)}")
+    if n_bins < 1:
+        raise ValueError("分箱数必须为正整数")
+    if HAS_NUMPY:
+        values = np.asarray(values, dtype=np.float64)
+
+    if binning in ('auto', 'exact'):
+        if HAS_NUMPY:
+            labels, codes = np.unique(values, return_inverse=True)
+            labels = labels.tolist()
+        else:
+            index = {}
+            codes = [index.setdefault(value, len(index)) for value in values]
+            # 组标签按属性值升序排列
+            labels = sorted(index)
+            remap = [0] * len(index)
+            for position, label in enumerate(labels):
+                remap[index[label]] = position
+            codes = [remap[code] for code in codes]
+        if binning == 'exact' or len(labels) <= max_exact_groups:
+            return codes, labels, [None] * len(labels)
+        binning = 'quantile'
+
+    if not len(values):
+        return [], [], []
+    edges, low, high = _bin_edges(values, binning, n_bins)
+    if HAS_NUMPY:
+        codes = np.searchsorted(np.asarray(edges), values, side='right')
+    else:
+        codes = [bisect.bisect_right(edges, value) for value in values]
+    bounds = [low] + edges + [high]
+    ranges = [(bounds[k], bounds[k + 1]) for k in range(len(edges) + 1)]
+    labels = [f"[{lo:.4g}, {hi:.4g}{']' if k == len(edges) else ')'}" for k, (lo, hi) in enumerate(ranges)]
+    return codes, labels, ranges
+
+
+def grouped_fairness_statistics(attribute_values, predictions, targets, binning: str = 'auto',
+                                n_bins: int = 4, min_group_size: int = 10,
+                                max_exact_groups: int = 32) -> Dict:
+    """
+    按敏感属性分组, 单遍计算各组的平均预测/目标、人口统计平等比率 (正预测占比)
+    与机会均等比率 (实际正例中被预测为正的比例); 样本数少于 min_group_size 的组被跳过
+    """
+    codes, labels, ranges = bucket_attribute(attribute_values, binning, n_bins, max_exact_groups)
+    n_groups = len(labels)
+    if HAS_NUMPY:
+        codes = np.asarray(codes, dtype=np.intp)
+        predictions = np.asarray(predictions, dtype=np.float64)
+        targets = np.asarray(targets, dtype=np.float64)
+        predicted_positive = predictions > 0
+        actual_positive = targets > 0
+        counts = np.bincount(codes, minlength=n_groups).tolist()
+        prediction_sums = np.bincount(codes, weights=predictions, minlength=n_groups).tolist()
+        target_sums = np.bincount(codes, weights=targets, minlength=n_groups).tolist()
+        positive_predictions = np.bincount(codes, weights=predicted_positive, minlength=n_groups).tolist()
+        true_positives = np.bincount(codes, weights=predicted_positive & actual_positive, minlength=n_groups).tolist()
+        actual_positives = np.bincount(codes, weights=actual_positive, minlength=n_groups).tolist()
+    else:
+        counts = [0] * n_groups
+        prediction_sums = [0.0] * n_groups
+        target_sums = [0.0] * n_groups
+        positive_predictions = [0] * n_groups
+        true_positives = [0] * n_groups
+        actual_positives = [0] * n_groups
+        for code, prediction, target in zip(codes, predictions, targets):
+            counts[code] += 1
+            prediction_sums[code] += prediction
+            target_sums[code] += target
+            if prediction > 0:
+                positive_predictions[code] += 1
+                if target > 0:
+                    true_positives[code] += 1
+            if target > 0:
+                actual_positives[code] += 1
+
+    group_stats = {}
+    for k in range(n_groups):
+        count = counts[k]
+        if count < min_group_size:  # 跳过样本数太少的组
+            continue
+        stats = {
+            'count': int(count),
+            'avg_prediction': prediction_sums[k] / count,
+            'avg_target': target_sums[k] / count,
+            'demographic_parity_ratio': positive_predictions[k] / count,
+            'equal_opportunity_ratio': true_positives[k] / actual_positives[k] if actual_positives[k] > 0 else 0
+        }
+        if ranges[k] is not None:
+            stats['range'] = ranges[k]
+        group_stats[labels[k]] = stats
+    return group_stats
@@ -0,0 +1,360 @@
+"""
+向量化特征工程 - 声明式特征变换规格与编译后的列式执行计划
+规格描述要生成哪些派生列 (乘积项 / 多项式 / 三角函数 / 行统计), 编译后每个派生列在连续缓冲区上
+按列一次计算完成; 支持分块处理, 适用于超出内存的数据流
+"""
+
+import math
+import operator
+from array import array
+from itertools import combinations_with_replacement
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ml_dataset import ColumnarDataset
+from ml_engine import HAS_NUMPY, np
+from ml_statistics import StreamingMoments
+
+TRIG_FUNCTIONS = {'sin': math.sin, 'cos': math.cos, 'tanh': math.tanh}
+ROW_AGGREGATES = ('mean', 'max', 'min', 'rms')
+
+
+def polynomial_terms(n_columns: int, degree: int = 2, limit: Optional[int] = None) -> List[Tuple[int, ...]]:
+    """前 limit 列的 2..degree 次单项式, 按 combinations_with_replacement 顺序排列"""
+    k = n_columns if limit is None else min(limit, n_columns)
+    return [term for d in range(2, degree + 1) for term in combinations_with_replacement(range(k), d)]
+
+
+class FeatureTransformSpec:
+    """
+    特征变换规格
+    输出列顺序: 原始列 (可选标准化) | product_terms | 多项式项 | trig_terms | 行统计
+    """
+
+    def __init__(self,
+                 standardize: bool = False,
+                 product_terms: Sequence[Sequence[int]] = (),
+                 polynomial_degree: int = 0,
+                 polynomial_limit: Optional[int] = None,
+                 trig_terms: Sequence[Tuple[str, int]] = (),
+                 row_aggregates: Sequence[str] = (),
+                 aggregate_limit: int = 5,
+                 aggregate_divisor: Optional[float] = None):
+        for name, _ in trig_terms:
+            if name not in TRIG_FUNCTIONS:
+                raise ValueError(f"不支持的三角函数特征: {name}")
+        for name in row_aggregates:
+            if name not in ROW_AGGREGATES:
+                raise ValueError(f"不支持的行统计特征: {name}")
+        self.standardize = standardize
+        self.product_terms = [tuple(term) for term in product_terms]
+        self.polynomial_degree = polynomial_degree
+        self.polynomial_limit = polynomial_limit
+        self.trig_terms = [(name, int(j)) for name, j in trig_terms]
+        self.row_aggregates = list(row_aggregates)
+        self.aggregate_limit = aggregate_limit
+        # 行统计的除数默认为 aggregate_limit (列数不足时仍按该值计算, 与原实现一致)
+        self.aggregate_divisor = aggregate_divisor if aggregate_divisor is not None else aggregate_limit
+
+    @classmethod
+    def advanced_default(cls) -> 'FeatureTransformSpec':
+        """DataEngineeringSuite.advanced_feature_engineering 的特征集合"""
+        return cls(standardize=True, polynomial_degree=2, polynomial_limit=5,
+                   trig_terms=[('sin', 0), ('cos', 0), ('sin', 1), ('cos', 1), ('tanh', 2)],
+                   row_aggregates=['mean', 'max', 'min', 'rms'], aggregate_limit=5)
+
+    def compile(self, n_input_columns: int) -> 'FeaturePlan':
+        """按输入列数展开为执行计划"""
+        return FeaturePlan(self, n_input_columns)
+
+    def to_dict(self) -> Dict:
+        return {
+            'standardize': self.standardize,
+            'product_terms': [list(term) for term in self.product_terms],
+            'polynomial_degree': self.polynomial_degree,
+            'polynomial_limit': self.polynomial_limit,
+            'trig_terms': [list(term) for term in self.trig_terms],
+            'row_aggregates': list(self.row_aggregates),
+            'aggregate_limit': self.aggregate_limit,
+            'aggregate_divisor': self.aggregate_divisor
+        }
+
+    @classmethod
+    def from_dict(cls, config: Dict) -> 'FeatureTransformSpec':
+        return cls(**config)
+
+
+class FeaturePlan:
+    """编译后的特征计划 - 标准化参数通过 fit 获得, transform 按列生成全部输出"""
+
+    def __init__(self, spec: FeatureTransformSpec, n_input_columns: int):
+        self.spec = spec
+        self.n_input_columns = n_input_columns
+        self.product_terms = spec.product_terms + (
+            polynomial_terms(n_input_columns, spec.polynomial_degree, spec.polynomial_limit)
+            if spec.polynomial_degree >= 2 else [])
+        self.trig_terms = spec.trig_terms
+        self.aggregate_columns = min(spec.aggregate_limit, n_input_columns)
+
+        referenced = [j for term in self.product_terms for j in term] + [j for _, j in self.trig_terms]
+        if referenced and max(referenced) >= n_input_columns:
+            raise ValueError(f"特征规格引用了第 {max(referenced)} 列, 输入只有 {n_input_columns} 列")
+
+        self.means: Optional[List[float]] = None
+        self.stds: Optional[List[float]] = None
+        self.output_names = self._output_names()
+        self.n_output_columns = len(self.output_names)
+
+    def _output_names(self) -> List[str]:
+        names = [f"x{j}" for j in range(self.n_input_columns)]
+        names += ['*'.join(f"x{j}" for j in term) for term in self.product_terms]
+        names += [f"{name}(x{j})" for name, j in self.trig_terms]
+        names += [f"row_{name}" for name in self.spec.row_aggregates]
+        return names
+
+    # ---- 标准化参数 ----
+
+    def fit(self, data) -> 'FeaturePlan':
+        """计算各输入列的均值与标准差 (方差为 0 的列标准差记为 1)"""
+        if not self.spec.standardize:
+            return self
+        dataset = data if isinstance(data, ColumnarDataset) else ColumnarDataset.from_rows(data, self.n_input_columns)
+        return self.fit_moments(StreamingMoments.from_data(dataset))
+
+    def fit_moments(self, moments: StreamingMoments) -> 'FeaturePlan':
+        """由流式矩统计设置标准化参数 (可由分块或多进程统计合并而来)"""
+        if moments.n_columns != self.n_input_columns:
+            raise ValueError(f"输入列数不匹配: 期望 {self.n_input_columns}, 实际 {moments.n_columns}")
+        self.means = list(moments.mean)
+        self.stds = [std if std > 0 else 1.0 for std in moments.std()]
+        return self
+
+    def _require_fitted(self):
+        if self.spec.standardize and self.means is None:
+            raise ValueError("特征计划尚未拟合标准化参数, 请先调用 fit")
+
+    # ---- 变换 ----
+
+    def transform(self, data, chunk_size: Optional[int] = None) -> ColumnarDataset:
+        """变换整个数据集; 指定 chunk_size 时分块计算以限制临时内存"""
+        self._require_fitted()
+        dataset = data if isinstance(data, ColumnarDataset) else ColumnarDataset.from_rows(data, self.n_input_columns)
+        if dataset.n_columns != self.n_input_columns:
+            raise ValueError(f"输入列数不匹配: 期望 {self.n_input_columns}, 实际 {dataset.n_columns}")
+        if chunk_size is None or chunk_size >= len(dataset):
+            return self._transform_block(dataset)
+
+        output = ColumnarDataset.empty(len(dataset), self.n_output_columns)
+        for start in range(0, len(dataset), chunk_size):
+            block = self._transform_block(dataset[start:start + chunk_size])
+            for j in range(self.n_output_columns):
+                output.column(j)[start:start + len(block)] = block.column(j)
+        return output
+
+    def transform_chunks(self, chunks: Iterable) -> Iterator[ColumnarDataset]:
+        """逐块变换数据流 (每块为行列表或 ColumnarDataset), 标准化参数须事先拟合"""
+        self._require_fitted()
+        for chunk in chunks:
+            yield self.transform(chunk)
+
+    def _transform_block(self, dataset: ColumnarDataset) -> ColumnarDataset:
+        if HAS_NUMPY:
+            return self._transform_numpy(dataset)
+        return self._transform_python(dataset)
+
+    def _transform_numpy(self, dataset: ColumnarDataset) -> ColumnarDataset:
+        n_rows, k = len(dataset), self.n_input_columns
+        out = np.empty((n_rows, self.n_output_columns), order='F')
+        Z = out[:, :k]
+        Z[:] = dataset.to_numpy()
+        if self.spec.standardize:
+            Z -= np.asarray(self.means)
+            Z /= np.asarray(self.stds)
+
+        column = k
+        # 按次数分组, 每组用一次索引 + 乘积完成
+        for _, indices in self._terms_by_degree():
+            out[:, column:column + len(indices)] = Z[:, indices].prod(axis=2)
+            column += len(indices)
+        for name, j in self.trig_terms:
+            getattr(np, name)(Z[:, j], out=out[:, column])
+            column += 1
+        if self.spec.row_aggregates:
+            block = Z[:, :self.aggregate_columns]
+            divisor = self.spec.aggregate_divisor
+            for name in self.spec.row_aggregates:
+                if name == 'mean':
+                    np.divide(block.sum(axis=1), divisor, out=out[:, column])
+                elif name == 'max':
+                    block.max(axis=1, out=out[:, column])
+                elif name == 'min':
+                    block.min(axis=1, out=out[:, column])
+                else:
+                    np.sqrt(np.einsum('ij,ij->i', block, block) / divisor, out=out[:, column])
+                column += 1
+        return ColumnarDataset(np.ravel(out, order='F'), n_rows, self.n_output_columns)
+
+    def _terms_by_degree(self) -> List[Tuple[int, List[Tuple[int, ...]]]]:
+        """把乘积项按连续的相同次数分段 (保持输出顺序)"""
+        groups: List[Tuple[int, List[Tuple[int, ...]]]] = []
+        for term in self.product_terms:
+            if groups and groups[-1][0] == len(term):
+                groups[-1][1].append(term)
+            else:
+                groups.append((len(term), [term]))
+        return groups
+
+    def _transform_python(self, dataset: ColumnarDataset) -> ColumnarDataset:
+        if self.spec.standardize:
+            standardized = [array('d', [(x - mean) / std for x in column])
+                            for column, mean, std in zip(dataset.columns(), self.means, self.stds)]
+        else:
+            standardized = [array('d', column) for column in dataset.columns()]
+
+        columns: List = list(standardized)
+        for term in self.product_terms:
+            product = standardized[term[0]]
+            for j in term[1:]:
+                product = array('d', map(operator.mul, product, standardized[j]))
+            columns.append(product)
+        for name, j in self.trig_terms:
+            columns.append(array('d', map(TRIG_FUNCTIONS[name], standardized[j])))
+        if self.spec.row_aggregates:
+            rows = list(zip(*standardized[:self.aggregate_columns]))
+            divisor = self.spec.aggregate_divisor
+            for name in self.spec.row_aggregates:
+                if name == 'mean':
+                    values = [sum(row) / divisor for row in rows]
+                elif name == 'max':
+                    values = [max(row) for row in rows]
+                elif name == 'min':
+                    values = [min(row) for row in rows]
+                else:
+                    values = [math.sqrt(sum(x * x for x in row) / divisor) for row in rows]
+                columns.append(array('d', values))
+        return ColumnarDataset.from_columns(columns)
+
+    def describe(self) -> Dict:
+        """计划摘要"""
+        return {
+            'n_input_columns': self.n_input_columns,
+            'n_output_columns': self.n_output_columns,
+            'n_product_terms': len(self.product_terms),
+            'n_trig_terms': len(self.trig_terms),
+            'row_aggregates': list(self.spec.row_aggregates),
+            'standardize': self.spec.standardize
+        }
+
+
+class FeatureTransformer:
+    """
+    已拟合的特征变换器 - 保存标准化参数与展开计划, 训练与在线推理使用完全相同的变换
+    可通过 to_dict / from_dict 随模型制品一起持久化
+    """
+
+    def __init__(self, spec: FeatureTransformSpec):
+        self.spec = spec
+        self.plan: Optional[FeaturePlan] = None
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.plan is not None
+
+    @property
+    def n_input_features(self) -> int:
+        self._require_fitted()
+        return self.plan.n_input_columns
+
+    @property
+    def n_output_features(self) -> int:
+        self._require_fitted()
+        return self.plan.n_output_columns
+
+    @property
+    def output_names(self) -> List[str]:
+        self._require_fitted()
+        return self.plan.output_names
+
+    def _require_fitted(self):
+        if self.plan is None:
+            raise ValueError("特征变换器尚未拟合, 请先调用 fit")
+
+    def fit(self, data) -> 'FeatureTransformer':
+        """按训练数据确定输入列数并拟合标准化参数"""
+        dataset = data if isinstance(data, ColumnarDataset) else ColumnarDataset.from_rows(data)
+        self.plan = self.spec.compile(dataset.n_columns).fit(dataset)
+        self._compile_row_path()
+        return self
+
+    def transform(self, data, chunk_size: Optional[int] = None) -> ColumnarDataset:
+        """批量变换, 返回列式数据集"""
+        self._require_fitted()
+        return self.plan.transform(data, chunk_size=chunk_size)
+
+    def fit_transform(self, data, chunk_size: Optional[int] = None) -> ColumnarDataset:
+        dataset = data if isinstance(data, ColumnarDataset) else ColumnarDataset.from_rows(data)
+        return self.fit(dataset).transform(dataset, chunk_size=chunk_size)
+
+    def _compile_row_path(self):
+        """预先展开单行路径所需的索引与参数, 避免每次请求重复解析规格"""
+        plan = self.plan
+        self._row_scale = (list(zip(plan.means, plan.stds)) if self.spec.standardize else None)
+        self._row_pairs = [term for term in plan.product_terms if len(term) == 2]
+        self._row_pairs_only = len(self._row_pairs) == len(plan.product_terms)
+        self._row_trig = [(TRIG_FUNCTIONS[name], j) for name, j in plan.trig_terms]
+
+    def transform_row(self, row: Sequence[float]) -> List[float]:
+        """单行变换 (纯 Python, 适合在线推理的单条请求)"""
+        self._require_fitted()
+        plan = self.plan
+        if len(row) != plan.n_input_columns:
+            raise ValueError(f"特征数不匹配: 期望 {plan.n_input_columns}, 实际 {len(row)}")
+        if self._row_scale is not None:
+            z = [(x - mean) / std for x, (mean, std) in zip(row, self._row_scale)]
+        else:
+            z = [float(x) for x in row]
+
+        out = z[:]
+        if self._row_pairs_only:
+            out.extend([z[a] * z[b] for a, b in self._row_pairs])
+        else:
+            for term in plan.product_terms:
+                value = 1.0
+                for j in term:
+                    value *= z[j]
+                out.append(value)
+        out.extend([function(z[j]) for function, j in self._row_trig])
+
+        if self.spec.row_aggregates:
+            head = z[:plan.aggregate_columns]
+            divisor = self.spec.aggregate_divisor
+            for name in self.spec.row_aggregates:
+                if name == 'mean':
+                    out.append(sum(head) / divisor)
+                elif name == 'max':
+                    out.append(max(head))
+                elif name == 'min':
+                    out.append(min(head))
+                else:
+                    out.append(math.sqrt(sum(x * x for x in head) / divisor))
+        return out
+
+    def to_dict(self) -> Dict:
+        """导出可 JSON 序列化的状态"""
+        self._require_fitted()
+        return {
+            'spec': self.spec.to_dict(),
+            'n_input_features': self.plan.n_input_columns,
+            'means': self.plan.means,
+            'stds': self.plan.stds
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'FeatureTransformer':
+        """从 to_dict 的结果恢复 (无需重新拟合)"""
+        transformer = cls(FeatureTransformSpec.from_dict(state['spec']))
+        transformer.plan = transformer.spec.compile(state['n_input_features'])
+        transformer.plan.means = state['means']
+        transformer.plan.stds = state['stds']
+        transformer._compile_row_path()
+        return transformer
+
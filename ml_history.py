@@ -0,0 +1,293 @@
+"""
+紧凑训练历史 - 追加写入的定长 float64 记录, 读取时 mmap 为零拷贝视图
+指标文件 (path) 每轮一条记录 [轮次, 训练损失, 验证损失, 累计用时]; 参数快照文件 (path + '.params')
+每 snapshot_every 轮一条记录 [轮次, w_1, ..., w_n, b]. 两个文件都以 64 字节头部 (魔数、记录宽度、快照间隔) 开头,
+只追加不改写, 进程中断时末尾不完整的记录在读取时被忽略; 可用于绘制损失曲线或从最近的快照恢复训练
+"""
+
+import mmap
+import os
+import struct
+import time
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ml_engine import HAS_NUMPY, np
+
+METRICS_MAGIC = b'MLHIST\x00\x01'
+PARAMS_MAGIC = b'MLPARM\x00\x01'
+PARAMS_SUFFIX = '.params'
+METRIC_FIELDS = ('epoch', 'train_loss', 'val_loss', 'time')
+_HEADER = struct.Struct('<8sQQ')
+_HEADER_SIZE = 64
+_FLOAT_BYTES = 8
+
+
+def _write_header(handle, magic: bytes, width: int, snapshot_every: int):
+    handle.write(_HEADER.pack(magic, width, snapshot_every).ljust(_HEADER_SIZE, b'\x00'))
+
+
+def _read_header(path: str, magic: bytes) -> Tuple[int, int]:
+    with open(path, 'rb') as handle:
+        raw = handle.read(_HEADER.size)
+    if len(raw) != _HEADER.size or raw[:len(magic)] != magic:
+        raise ValueError(f"{path} 不是训练历史文件")
+    _, width, snapshot_every = _HEADER.unpack(raw)
+    return width, snapshot_every
+
+
+class TrainingHistoryWriter:
+    """
+    训练历史写入器 - record() 每轮追加一条指标记录, 轮次为 snapshot_every 的整数倍时追加参数快照
+    (snapshot_every=0 时只在 close 时写入最后一次记录的参数). resume=True 且文件已存在时续写, 轮次与用时接在最后一条记录之后,
+    否则新建
+    """
+
+    def __init__(self, path: str, n_params: int, snapshot_every: int = 10, flush_every: int = 64,
+                 resume: bool = False):
+        if snapshot_every < 0:
+            raise ValueError("快照间隔不能为负")
+        self.path = path
+        self.n_params = n_params
+        self.snapshot_every = snapshot_every
+        self.flush_every = flush_every
+        self.epoch_offset = 0
+        self.elapsed_offset = 0.0
+        self.n_records = 0
+        # 最近一次非快照轮次的参数副本 (预分配, 每轮原地覆盖), 关闭时补写为快照
+        self._held = np.zeros(n_params) if HAS_NUMPY else array('d', bytes(_FLOAT_BYTES * n_params))
+        self._held_epoch: Optional[int] = None
+        self._pending = array('d')
+
+        params_path = path + PARAMS_SUFFIX
+        if resume and os.path.exists(path):
+            # 续写: 检查记录宽度, 截掉末尾不完整的记录
+            with TrainingHistory(path) as history:
+                if history.n_params is not None and history.n_params != n_params:
+                    raise ValueError(f"参数数量不匹配: 历史文件为 {history.n_params}, 当前为 {n_params}")
+                if len(history):
+                    last = history[len(history) - 1]
+                    self.epoch_offset = int(last['epoch']) + 1
+                    self.elapsed_offset = last['time']
+                n_metrics, n_snapshots = len(history), history.n_snapshots
+            for file_path, count, width in ((path, n_metrics, len(METRIC_FIELDS)),
+                                            (params_path, n_snapshots, n_params + 1)):
+                if os.path.exists(file_path):
+                    os.truncate(file_path, _HEADER_SIZE + count * width * _FLOAT_BYTES)
+            self._metrics = open(path, 'ab')
+        else:
+            self._metrics = open(path, 'wb')
+            _write_header(self._metrics, METRICS_MAGIC, len(METRIC_FIELDS), snapshot_every)
+        if resume and os.path.exists(params_path) and os.path.getsize(params_path) >= _HEADER_SIZE:
+            self._params = open(params_path, 'ab')
+        else:
+            self._params = open(params_path, 'wb')
+            _write_header(self._params, PARAMS_MAGIC, n_params + 1, snapshot_every)
+        self._start_time = time.perf_counter()
+
+    def record(self, epoch: int, train_loss: float, val_loss: float, params: Optional[Sequence[float]] = None,
+               bias: Optional[float] = None):
+        """
+        追加一轮的记录; params 为 [w_1, ..., w_n, b] (列表或数组), 或者为权重 [w_1, ..., w_n] 并单独传入 bias.
+        快照轮次直接写入; 其余轮次把参数复制到预分配的缓冲区 (调用方之后原地更新参数不影响已记录的值),
+        关闭时把最后一次记录的参数补写为该轮的快照
+        """
+        epoch += self.epoch_offset
+        elapsed = self.elapsed_offset + time.perf_counter() - self._start_time
+        self._pending.extend((epoch, train_loss, val_loss, elapsed))
+        self.n_records += 1
+        if params is not None:
+            n_params = len(params) + (bias is not None)
+            if n_params != self.n_params:
+                raise ValueError(f"参数数量不匹配: 期望 {self.n_params}, 实际 {n_params}")
+            if self.snapshot_every and epoch % self.snapshot_every == 0:
+                self._write_snapshot(epoch, params, bias)
+                self._held_epoch = None
+            else:
+                self._hold(epoch, params, bias)
+        if len(self._pending) >= self.flush_every * len(METRIC_FIELDS):
+            self.flush()
+
+    def _hold(self, epoch: int, params: Sequence[float], bias: Optional[float]):
+        n = len(params)
+        self._held[:n] = params if HAS_NUMPY else array('d', params)
+        if bias is not None:
+            self._held[n] = bias
+        self._held_epoch = epoch
+
+    def _write_snapshot(self, epoch: int, params: Sequence[float], bias: Optional[float] = None):
+        if HAS_NUMPY and isinstance(params, np.ndarray):
+            self._params.write(struct.pack('<d', epoch))
+            self._params.write(np.ascontiguousarray(params, dtype='<f8').tobytes())
+            if bias is not None:
+                self._params.write(struct.pack('<d', bias))
+        else:
+            record = array('d', [epoch])
+            record.extend(params)
+            if bias is not None:
+                record.append(bias)
+            record.tofile(self._params)
+
+    def flush(self):
+        if self._pending:
+            self._pending.tofile(self._metrics)
+            self._pending = array('d')
+        self._metrics.flush()
+        self._params.flush()
+
+    def close(self):
+        if self._metrics.closed:
+            return
+        if self._held_epoch is not None:
+            self._write_snapshot(self._held_epoch, self._held)
+            self._held_epoch = None
+        self.flush()
+        self._metrics.close()
+        self._params.close()
+
+    def __enter__(self) -> 'TrainingHistoryWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TrainingHistory:
+    """
+    映射到内存的训练历史 (只读), 可按列表使用: 每项为 {'epoch', 'train_loss', 'val_loss', 'time'},
+    有快照的轮次另含 'weights' 与 'bias'. 列数据为映射页面上的零拷贝视图 (numpy 可用时为数组)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        width, self.snapshot_every = _read_header(path, METRICS_MAGIC)
+        if width != len(METRIC_FIELDS):
+            raise ValueError(f"{path} 指标记录宽度 {width} 无效")
+        self._maps = []
+        self._metrics = self._map(path, width)
+        params_path = path + PARAMS_SUFFIX
+        if os.path.exists(params_path):
+            params_width, _ = _read_header(params_path, PARAMS_MAGIC)
+            self.n_params = params_width - 1
+            self._params = self._map(params_path, params_width)
+        else:
+            self.n_params, self._params = None, None
+        self._snapshot_index = None
+
+    def _map(self, path: str, width: int):
+        """映射一个文件的完整记录部分, 返回二维数组 (numpy) 或 (扁平 memoryview, 宽度)"""
+        n_records = (os.path.getsize(path) - _HEADER_SIZE) // (width * _FLOAT_BYTES)
+        if n_records <= 0:
+            return np.empty((0, width)) if HAS_NUMPY else (memoryview(array('d')), width)
+        with open(path, 'rb') as handle:
+            mapped = mmap.mmap(handle.fileno(), _HEADER_SIZE + n_records * width * _FLOAT_BYTES,
+                               access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        if HAS_NUMPY:
+            return np.frombuffer(mapped, dtype='<f8', offset=_HEADER_SIZE).reshape(n_records, width)
+        return memoryview(mapped)[_HEADER_SIZE:].cast('d'), width
+
+    @staticmethod
+    def _rows(table) -> int:
+        return table.shape[0] if HAS_NUMPY else len(table[0]) // table[1]
+
+    @staticmethod
+    def _column(table, j: int):
+        if HAS_NUMPY:
+            return table[:, j]
+        flat, width = table
+        return flat[j::width]
+
+    @staticmethod
+    def _row(table, i: int) -> List[float]:
+        if HAS_NUMPY:
+            return table[i].tolist()
+        flat, width = table
+        return flat[i * width:(i + 1) * width].tolist()
+
+    # ---- 指标 ----
+
+    def __len__(self) -> int:
+        return self._rows(self._metrics)
+
+    def column(self, name: str):
+        """按字段名取指标列 ('epoch' / 'train_loss' / 'val_loss' / 'time')"""
+        return self._column(self._metrics, METRIC_FIELDS.index(name))
+
+    @property
+    def epochs(self):
+        return self.column('epoch')
+
+    @property
+    def train_loss(self):
+        return self.column('train_loss')
+
+    @property
+    def val_loss(self):
+        return self.column('val_loss')
+
+    def __getitem__(self, i: int) -> Dict:
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("训练历史下标越界")
+        record = dict(zip(METRIC_FIELDS, self._row(self._metrics, i)))
+        record['epoch'] = int(record['epoch'])
+        snapshot = self._snapshots_by_epoch().get(record['epoch'])
+        if snapshot is not None:
+            record['weights'], record['bias'] = self.snapshot(snapshot)[1:]
+        return record
+
+    def __iter__(self) -> Iterator[Dict]:
+        return (self[i] for i in range(len(self)))
+
+    # ---- 参数快照 ----
+
+    @property
+    def n_snapshots(self) -> int:
+        return self._rows(self._params) if self._params is not None else 0
+
+    def _snapshots_by_epoch(self) -> Dict[int, int]:
+        if self._snapshot_index is None:
+            epochs = self._column(self._params, 0).tolist() if self._params is not None else []
+            self._snapshot_index = {int(epoch): k for k, epoch in enumerate(epochs)}
+        return self._snapshot_index
+
+    def snapshot(self, k: int) -> Tuple[int, List[float], float]:
+        """第 k 个参数快照: (轮次, 权重, 偏置); k 可为负数"""
+        if not -self.n_snapshots <= k < self.n_snapshots:
+            raise IndexError("快照下标越界")
+        row = self._row(self._params, k % self.n_snapshots)
+        return int(row[0]), row[1:-1], row[-1]
+
+    def latest_snapshot(self) -> Optional[Tuple[int, List[float], float]]:
+        """最近的参数快照, 用于恢复训练; 没有快照时返回 None"""
+        return self.snapshot(-1) if self.n_snapshots else None
+
+    def snapshot_at(self, epoch: int) -> Optional[Tuple[int, List[float], float]]:
+        """不晚于 epoch 的最近一个快照"""
+        best = None
+        for snapshot_epoch, k in self._snapshots_by_epoch().items():
+            if snapshot_epoch <= epoch and (best is None or snapshot_epoch > best[0]):
+                best = (snapshot_epoch, k)
+        return self.snapshot(best[1]) if best is not None else None
+
+    def close(self):
+        """释放映射; 仍有外部视图引用时, 映射在视图释放后由解释器回收"""
+        self._metrics = self._params = None
+        for mapped in self._maps:
+            try:
+                mapped.close()
+            except BufferError:
+                pass
+        self._maps = []
+
+    def __enter__(self) -> 'TrainingHistory':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"TrainingHistory({self.path!r}, epochs={len(self) if self._metrics is not None else 0}, snapshots={self.n_snapshots})"
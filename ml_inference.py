@@ -0,0 +1,85 @@
+"""
+低延迟推理 - 冻结的线性模型预测器
+预先把特征缩放参数 (mean/std) 折叠进连续的权重缓冲区, 在线推理时无需逐行缩放
+"""
+
+import operator
+from array import array
+from typing import Dict, List, Optional, Sequence, Union
+
+from ml_engine import HAS_NUMPY, np
+
+
+class CompiledPredictor:
+    """冻结的推理对象 - 创建后不可修改, 可安全地在多个线程间共享"""
+
+    __slots__ = ('n_features', 'bias', 'weights', '_weight_list', '_weight_vector')
+
+    def __init__(self, weights: Sequence[float], bias: float,
+                 means: Optional[Sequence[float]] = None,
+                 stds: Optional[Sequence[float]] = None):
+        n_features = len(weights)
+        folded = [float(w) for w in weights]
+        folded_bias = float(bias)
+
+        if means is not None or stds is not None:
+            means = means if means is not None else [0.0] * n_features
+            stds = stds if stds is not None else [1.0] * n_features
+            if len(means) != n_features or len(stds) != n_features:
+                raise ValueError("缩放参数长度与权重数量不一致")
+            # w * (x - mean) / std + b  =>  (w / std) * x + (b - w * mean / std)
+            for j in range(n_features):
+                folded[j] /= stds[j]
+                folded_bias -= folded[j] * means[j]
+
+        buffer = array('d', folded)
+        object.__setattr__(self, 'n_features', n_features)
+        object.__setattr__(self, 'bias', folded_bias)
+        object.__setattr__(self, 'weights', memoryview(buffer).toreadonly())
+        object.__setattr__(self, '_weight_list', tuple(folded))
+        if HAS_NUMPY:
+            vector = np.frombuffer(buffer, dtype=np.float64)
+            vector.flags.writeable = False
+            object.__setattr__(self, '_weight_vector', vector)
+        else:
+            object.__setattr__(self, '_weight_vector', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledPredictor 为只读对象")
+
+    @classmethod
+    def from_artifact(cls, model_artifact: Dict) -> 'CompiledPredictor':
+        """从 MLOpsOrchestration.model_packaging_and_signing 生成的模型制品构建预测器"""
+        parameters = model_artifact['model_parameters']
+        scaler = model_artifact.get('feature_scaler') or {}
+        return cls(parameters['weights'], parameters['bias'],
+                   scaler.get('means'), scaler.get('stds'))
+
+    def predict_single(self, row: Sequence[float]) -> float:
+        """单行预测"""
+        if len(row) != self.n_features:
+            raise ValueError(f"特征数不匹配: 期望 {self.n_features}, 实际 {len(row)}")
+        return sum(map(operator.mul, self._weight_list, row)) + self.bias
+
+    def predict_batch(self, rows, out=None) -> Union['np.ndarray', List[float]]:
+        """
+        批量预测
+        安装 numpy 时返回形状为 (n,) 的 float64 数组, 可通过 out 传入预分配的输出缓冲区; 否则返回列表.
+        空输入返回空数组 (或空列表)
+        """
+        if self._weight_vector is None:
+            weights, bias = self._weight_list, self.bias
+            return [sum(map(operator.mul, weights, row)) + bias for row in rows]
+
+        matrix = np.asarray(rows, dtype=np.float64)
+        if matrix.ndim == 1 and matrix.size == 0:  # [] 没有列维度
+            matrix = matrix.reshape(0, self.n_features)
+        if matrix.ndim != 2 or matrix.shape[1] != self.n_features:
+            raise ValueError(f"输入形状 {matrix.shape} 与特征数 {self.n_features} 不匹配")
+        result = np.matmul(matrix, self._weight_vector, out=out)
+        result += self.bias
+        return result
+
+    def to_dict(self) -> Dict:
+        """导出折叠后的参数"""
+        return {'weights': list(self._weight_list), 'bias': self.bias, 'n_features': self.n_features}
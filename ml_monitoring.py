@@ -0,0 +1,197 @@
+"""
+在线性能监控 - 固定内存的环形缓冲区与对数分桶直方图
+每次记录 O(1), 支持 p50/p95/p99 与时间窗口吞吐量查询, 长时间运行内存保持恒定
+"""
+
+import math
+import threading
+import time
+from array import array
+from typing import Dict, List, Sequence
+
+from ml_engine import HAS_NUMPY, np
+
+
+class RingBuffer:
+    """固定容量环形缓冲区 - 本身不加锁, 多线程写入时由调用方 (如 PerformanceMonitor) 串行化"""
+
+    def __init__(self, capacity: int = 4096):
+        if capacity <= 0:
+            raise ValueError("容量必须为正整数")
+        self.capacity = capacity
+        self._data = array('d', bytes(8 * capacity))
+        self._written = 0
+
+    def append(self, value: float):
+        """写入一个值, 缓冲区满时覆盖最旧的值"""
+        self._data[self._written % self.capacity] = value
+        self._written += 1
+
+    def __len__(self) -> int:
+        return min(self._written, self.capacity)
+
+    def values(self) -> List[float]:
+        """按写入顺序返回当前保留的值 (快照拷贝)"""
+        written = self._written
+        data = self._data.tolist()
+        if written <= self.capacity:
+            return data[:written]
+        start = written % self.capacity
+        return data[start:] + data[:start]
+
+
+class LogHistogram:
+    """对数分桶直方图 (HDR 风格) - 桶宽按相对精度划分, 分位数相对误差不超过 precision, 可跨进程合并"""
+
+    def __init__(self, min_value: float = 1e-6, max_value: float = 1e3, precision: float = 0.01):
+        if not 0 < min_value < max_value:
+            raise ValueError("直方图范围无效")
+        self.min_value = min_value
+        self.max_value = max_value
+        self.precision = precision
+        self._log_base = math.log1p(precision)
+        n_buckets = int(math.log(max_value / min_value) / self._log_base) + 2
+        self._counts = array('q', bytes(8 * n_buckets))
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+
+    def _bucket(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        index = int(math.log(value / self.min_value) / self._log_base) + 1
+        return min(index, len(self._counts) - 1)
+
+    def record(self, value: float, count: int = 1):
+        """记录一个值"""
+        self._counts[self._bucket(value)] += count
+        self.count += count
+        self.total += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def record_many(self, values):
+        """批量记录 (numpy 可用时按桶向量化计数)"""
+        if not HAS_NUMPY:
+            for value in values:
+                self.record(value)
+            return
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return
+        ratios = np.maximum(values, self.min_value) / self.min_value
+        indices = (np.log(ratios) / self._log_base).astype(np.int64) + 1
+        indices[values <= self.min_value] = 0
+        np.minimum(indices, len(self._counts) - 1, out=indices)
+        for index, bucket_count in zip(*np.unique(indices, return_counts=True)):
+            self._counts[int(index)] += int(bucket_count)
+        self.count += int(values.size)
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def quantile(self, q: float) -> float:
+        """返回第 q 分位数的近似值 (0 <= q <= 1)"""
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = 0
+        for index, bucket_count in enumerate(self._counts):
+            seen += bucket_count
+            if seen > rank:
+                if index == 0:
+                    return self.min
+                # 取桶的几何中点, 并限制在观测到的最小/最大值之间
+                upper = self.min_value * math.exp(index * self._log_base)
+                estimate = upper / math.sqrt(1 + self.precision)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def count_above(self, threshold: float) -> int:
+        """统计大于阈值的样本数 (按桶近似)"""
+        return sum(self._counts[self._bucket(threshold) + 1:])
+
+    def merge(self, other: 'LogHistogram'):
+        """合并另一个相同配置的直方图"""
+        if (other.min_value, other.max_value, other.precision) != (self.min_value, self.max_value, self.precision):
+            raise ValueError("只能合并相同配置的直方图")
+        for index, bucket_count in enumerate(other._counts):
+            if bucket_count:
+                self._counts[index] += bucket_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+
+class PerformanceMonitor:
+    """
+    预测性能监控 - 记录每次批量预测的延迟与行数, 查询延迟分位数和窗口吞吐量
+    线程安全: 一次记录的各字段在同一把锁下写入, 查询读到的各缓冲区始终一一对应
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self.latencies = RingBuffer(capacity)
+        self.timestamps = RingBuffer(capacity)
+        self.batch_sizes = RingBuffer(capacity)
+        self.latency_histogram = LogHistogram()
+        self.total_batches = 0
+        self.total_rows = 0
+        self._lock = threading.Lock()
+
+    def record_batch(self, latency: float, n_rows: int, timestamp: float = None):
+        """记录一次批量预测 (O(1))"""
+        timestamp = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            self.latencies.append(latency)
+            self.timestamps.append(timestamp)
+            self.batch_sizes.append(n_rows)
+            self.latency_histogram.record(latency)
+            self.total_batches += 1
+            self.total_rows += n_rows
+
+    def latency_percentiles(self, percentiles: Sequence[float] = (50, 95, 99),
+                            recent_only: bool = True) -> Dict[str, float]:
+        """
+        延迟分位数 (秒)
+        recent_only=True 时基于环形缓冲区中最近的精确样本, 否则基于全部历史的直方图近似
+        """
+        if recent_only:
+            with self._lock:
+                samples = self.latencies.values()
+            samples.sort()
+            if not samples:
+                return {f'p{p:g}': 0.0 for p in percentiles}
+            return {f'p{p:g}': samples[min(len(samples) - 1, int(p / 100 * len(samples)))]
+                    for p in percentiles}
+        with self._lock:
+            return {f'p{p:g}': self.latency_histogram.quantile(p / 100) for p in percentiles}
+
+    def throughput(self, window_seconds: float = 60.0, now: float = None) -> float:
+        """
+        最近 window_seconds 秒内的吞吐量 (行/秒)
+        窗口内的批次多于缓冲区容量时, 较早的批次已被覆盖, 改为按保留样本实际覆盖的时间跨度计算
+        """
+        now = now if now is not None else time.time()
+        cutoff = now - window_seconds
+        with self._lock:
+            timestamps, batch_sizes = self.timestamps.values(), self.batch_sizes.values()
+            evicted = self.total_batches > len(timestamps)
+        if window_seconds <= 0:
+            return 0.0
+        rows = sum(n for ts, n in zip(timestamps, batch_sizes) if ts >= cutoff)
+        span = window_seconds
+        if evicted and timestamps and min(timestamps) > cutoff:
+            span = max(now - min(timestamps), 1e-9)
+        return rows / span
+
+    def snapshot(self, window_seconds: float = 60.0) -> Dict:
+        """导出当前监控指标"""
+        return {
+            'total_batches': self.total_batches,
+            'total_rows': self.total_rows,
+            'latency_seconds': self.latency_percentiles(),
+            'latency_seconds_all_time': self.latency_percentiles(recent_only=False),
+            'throughput_rows_per_second': self.throughput(window_seconds)
+        }
@@ -0,0 +1,236 @@
+"""
+优化器组件 - 动量SGD / Adam / AdamW
+状态保存在连续数组中, 按全局步数做偏差修正, 支持检查点保存与恢复
+参数向量约定为 [w_1, ..., w_n, bias], 偏置位于最后一位
+"""
+
+import json
+import math
+from abc import ABC, abstractmethod
+from array import array
+from typing import Dict
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:  # numpy 为可选依赖, 缺失时状态使用 array('d') 并逐元素更新
+    np = None
+    HAS_NUMPY = False
+
+
+def _zeros(size: int):
+    """创建连续的零向量 (numpy 可用时为 float64 数组, 否则为 array('d'))"""
+    return np.zeros(size) if HAS_NUMPY else array('d', bytes(8 * size))
+
+
+class Optimizer(ABC):
+    """优化器基类"""
+
+    name = 'base'
+    decoupled_weight_decay = False
+
+    def __init__(self, n_params: int, learning_rate: float):
+        self.n_params = n_params
+        self.learning_rate = learning_rate
+        self.step_count = 0
+
+    def step(self, params, grads):
+        """根据梯度原地更新参数 (params 为 numpy 数组或列表), 每次调用计为一个全局步"""
+        if len(params) != self.n_params or len(grads) != self.n_params:
+            raise ValueError(f"参数数量不匹配: 优化器为 {self.n_params}, 实际为 {len(params)}")
+        self.step_count += 1
+        if not HAS_NUMPY:
+            self._step_python(params, grads)
+        elif isinstance(params, np.ndarray):
+            self._step_array(params, np.asarray(grads, dtype=np.float64))
+        else:
+            vector = np.array(params, dtype=np.float64)
+            self._step_array(vector, np.asarray(grads, dtype=np.float64))
+            params[:] = vector.tolist()
+
+    @abstractmethod
+    def _step_array(self, params, grads):
+        """numpy 路径: 原地更新 float64 参数数组"""
+
+    @abstractmethod
+    def _step_python(self, params, grads):
+        """纯 Python 路径: 逐元素原地更新参数列表"""
+
+    def _hyperparameters(self) -> Dict:
+        return {}
+
+    def _state_arrays(self) -> Dict:
+        return {}
+
+    def state_dict(self) -> Dict:
+        """导出可 JSON 序列化的优化器状态"""
+        return {
+            'type': self.name,
+            'n_params': self.n_params,
+            'learning_rate': self.learning_rate,
+            'step_count': self.step_count,
+            'hyperparameters': self._hyperparameters(),
+            'state': {key: list(values) for key, values in self._state_arrays().items()}
+        }
+
+    def load_state_dict(self, state: Dict):
+        """从 state_dict 恢复状态"""
+        if state['type'] != self.name or state['n_params'] != self.n_params:
+            raise ValueError(f"检查点 ({state['type']}, {state['n_params']}) 与优化器 ({self.name}, {self.n_params}) 不匹配")
+        self.learning_rate = state['learning_rate']
+        self.step_count = state['step_count']
+        for key, target in self._state_arrays().items():
+            target[:] = np.asarray(state['state'][key]) if HAS_NUMPY else array('d', state['state'][key])
+
+    def save(self, path: str):
+        """保存检查点"""
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(self.state_dict(), handle)
+
+    @staticmethod
+    def load(path: str) -> 'Optimizer':
+        """加载检查点并重建优化器"""
+        with open(path, encoding='utf-8') as handle:
+            return optimizer_from_state(json.load(handle))
+
+
+class MomentumSGD(Optimizer):
+    """动量SGD (momentum=0 时退化为普通SGD)"""
+
+    name = 'momentum'
+
+    def __init__(self, n_params: int, learning_rate: float = 0.01, momentum: float = 0.9):
+        super().__init__(n_params, learning_rate)
+        self.momentum = momentum
+        self.velocity = _zeros(n_params)
+
+    def _step_array(self, params, grads):
+        self.velocity *= self.momentum
+        self.velocity += grads
+        params -= self.learning_rate * self.velocity
+
+    def _step_python(self, params, grads):
+        velocity, momentum, lr = self.velocity, self.momentum, self.learning_rate
+        for j in range(self.n_params):
+            velocity[j] = momentum * velocity[j] + grads[j]
+            params[j] -= lr * velocity[j]
+
+    def _hyperparameters(self) -> Dict:
+        return {'momentum': self.momentum}
+
+    def _state_arrays(self) -> Dict:
+        return {'velocity': self.velocity}
+
+
+class SGD(MomentumSGD):
+    """普通SGD"""
+
+    name = 'sgd'
+
+    def __init__(self, n_params: int, learning_rate: float = 0.01, momentum: float = 0.0):
+        super().__init__(n_params, learning_rate, momentum)
+
+
+class Adam(Optimizer):
+    """Adam 优化器 - 偏差修正使用全局步数"""
+
+    name = 'adam'
+
+    def __init__(self, n_params: int, learning_rate: float = 0.001,
+                 beta1: float = 0.9, beta2: float = 0.999, epsilon: float = 1e-8):
+        super().__init__(n_params, learning_rate)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        self.m = _zeros(n_params)
+        self.v = _zeros(n_params)
+
+    def _step_size(self) -> float:
+        """把两项偏差修正合并进步长: lr * sqrt(1 - beta2^t) / (1 - beta1^t)"""
+        t = self.step_count
+        return self.learning_rate * math.sqrt(1 - self.beta2 ** t) / (1 - self.beta1 ** t)
+
+    def _epsilon_hat(self) -> float:
+        """与合并步长等价的 epsilon 缩放, 保证结果与标准 Adam 公式一致"""
+        return self.epsilon * math.sqrt(1 - self.beta2 ** self.step_count)
+
+    def _step_array(self, params, grads):
+        self.m *= self.beta1
+        self.m += (1 - self.beta1) * grads
+        self.v *= self.beta2
+        self.v += (1 - self.beta2) * grads * grads
+        params -= self._step_size() * self.m / (np.sqrt(self.v) + self._epsilon_hat())
+
+    def _step_python(self, params, grads):
+        m, v, beta1, beta2 = self.m, self.v, self.beta1, self.beta2
+        step_size, epsilon_hat = self._step_size(), self._epsilon_hat()
+        for j in range(self.n_params):
+            g = grads[j]
+            m[j] = beta1 * m[j] + (1 - beta1) * g
+            v[j] = beta2 * v[j] + (1 - beta2) * g * g
+            params[j] -= step_size * m[j] / (math.sqrt(v[j]) + epsilon_hat)
+
+    def _hyperparameters(self) -> Dict:
+        return {'beta1': self.beta1, 'beta2': self.beta2, 'epsilon': self.epsilon}
+
+    def _state_arrays(self) -> Dict:
+        return {'m': self.m, 'v': self.v}
+
+
+class AdamW(Adam):
+    """AdamW 优化器 - 解耦权重衰减, 默认不衰减偏置 (参数向量最后一位)"""
+
+    name = 'adamw'
+    decoupled_weight_decay = True
+
+    def __init__(self, n_params: int, learning_rate: float = 0.001,
+                 beta1: float = 0.9, beta2: float = 0.999, epsilon: float = 1e-8,
+                 weight_decay: float = 0.01, decay_bias: bool = False):
+        super().__init__(n_params, learning_rate, beta1, beta2, epsilon)
+        self.weight_decay = weight_decay
+        self.decay_bias = decay_bias
+
+    def _step_array(self, params, grads):
+        n_decay = self.n_params if self.decay_bias else self.n_params - 1
+        params[:n_decay] *= 1 - self.learning_rate * self.weight_decay
+        super()._step_array(params, grads)
+
+    def _step_python(self, params, grads):
+        n_decay = self.n_params if self.decay_bias else self.n_params - 1
+        shrink = 1 - self.learning_rate * self.weight_decay
+        for j in range(n_decay):
+            params[j] *= shrink
+        super()._step_python(params, grads)
+
+    def _hyperparameters(self) -> Dict:
+        return {**super()._hyperparameters(), 'weight_decay': self.weight_decay, 'decay_bias': self.decay_bias}
+
+
+OPTIMIZERS = {'sgd': SGD, 'momentum': MomentumSGD, 'adam': Adam, 'adamw': AdamW}
+
+
+def create_optimizer(name: str, n_params: int, learning_rate: float, **kwargs) -> Optimizer:
+    """按名称创建优化器"""
+    key = name.lower()
+    if key not in OPTIMIZERS:
+        raise ValueError(f"不支持的优化算法: {name}, 可选: {', '.join(OPTIMIZERS)}")
+    return OPTIMIZERS[key](n_params, learning_rate, **kwargs)
+
+
+def optimizer_from_state(state: Dict) -> Optimizer:
+    """根据 state_dict 重建优化器 (含超参数、矩估计与全局步数)"""
+    optimizer = create_optimizer(state['type'], state['n_params'], state['learning_rate'],
+                                 **state['hyperparameters'])
+    optimizer.load_state_dict(state)
+    return optimizer
+
+
+def optimizer_for_training(algorithm: str, n_params: int, learning_rate: float,
+                           l2_regularization: float = 0.0) -> Optimizer:
+    """
+    按训练配置创建优化器
+    AdamW 以 l2_regularization 作为解耦权重衰减系数; 其余算法仍把 L2 项加在梯度上 (由调用方处理)
+    """
+    if algorithm.lower() == 'adamw':
+        return create_optimizer(algorithm, n_params, learning_rate, weight_decay=l2_regularization)
+    return create_optimizer(algorithm, n_params, learning_rate)
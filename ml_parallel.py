@@ -0,0 +1,304 @@
+"""
+数据并行训练 - 多进程梯度计算与汇总 (all-reduce)
+训练集、参数向量和各进程的部分梯度共用一块共享内存, 常驻工作进程按行区间计算部分梯度,
+主进程汇总后由优化器统一更新参数; 每一步只通过管道传递行区间, 不复制数据
+"""
+
+import math
+import multiprocessing
+import random
+import time
+from array import array
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional
+
+from ml_engine import HAS_NUMPY, np, to_array
+from ml_optimizers import Optimizer, optimizer_for_training
+
+_FLOAT_BYTES = 8
+
+
+def _layout(n_samples: int, n_features: int, n_workers: int) -> Dict[str, tuple]:
+    """共享内存布局 (以 float64 为单位的 [起始, 结束) 区间): X 行主序 | y | 参数 | 部分梯度"""
+    sizes = [('X', n_samples * n_features), ('y', n_samples), ('params', n_features + 1),
+             ('partials', n_workers * (n_features + 2))]
+    layout, offset = {}, 0
+    for name, size in sizes:
+        layout[name] = (offset, offset + size)
+        offset += size
+    layout['total'] = (0, offset)
+    return layout
+
+
+def _attach_views(buffer, n_samples: int, n_features: int, n_workers: int) -> Dict:
+    """在共享内存上建立各区域的视图 (numpy 数组或 float64 memoryview)"""
+    layout = _layout(n_samples, n_features, n_workers)
+    if HAS_NUMPY:
+        flat = np.ndarray((layout['total'][1],), dtype=np.float64, buffer=buffer)
+        return {
+            'X': flat[slice(*layout['X'])].reshape(n_samples, n_features),
+            'y': flat[slice(*layout['y'])],
+            'params': flat[slice(*layout['params'])],
+            'partials': flat[slice(*layout['partials'])].reshape(n_workers, n_features + 2)
+        }
+    flat = buffer[:layout['total'][1] * _FLOAT_BYTES].cast('d')
+    return {name: flat[start:stop] for name, (start, stop) in layout.items() if name != 'total'}
+
+
+def _partial_gradient(views: Dict, worker_index: int, start: int, stop: int,
+                      n_features: int):
+    """计算行区间 [start, stop) 上的部分梯度, 写入本进程在 partials 中的槽位: [X^T e, sum(e), sum(e^2)]"""
+    params = views['params']
+    if HAS_NUMPY:
+        slot = views['partials'][worker_index]
+        if start >= stop:
+            slot[:] = 0.0
+            return
+        X_block = views['X'][start:stop]
+        errors = X_block @ params[:n_features] + params[n_features] - views['y'][start:stop]
+        np.matmul(X_block.T, errors, out=slot[:n_features])
+        slot[n_features] = errors.sum()
+        slot[n_features + 1] = errors @ errors
+        return
+
+    X, y = views['X'], views['y']
+    weights, bias = params[:n_features].tolist(), params[n_features]
+    gradient = [0.0] * n_features
+    error_sum = squared_sum = 0.0
+    for i in range(start, stop):
+        row = X[i * n_features:(i + 1) * n_features].tolist()
+        error = sum(w * x for w, x in zip(weights, row)) + bias - y[i]
+        for j in range(n_features):
+            gradient[j] += error * row[j]
+        error_sum += error
+        squared_sum += error * error
+    base = worker_index * (n_features + 2)
+    slot = views['partials']
+    for j in range(n_features):
+        slot[base + j] = gradient[j]
+    slot[base + n_features] = error_sum
+    slot[base + n_features + 1] = squared_sum
+
+
+def _worker_loop(shm_name: str, n_samples: int, n_features: int, n_workers: int,
+                 worker_index: int, connection):
+    """常驻工作进程: 接收行区间, 计算部分梯度后回复; 收到 None 时退出"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    views = _attach_views(shm.buf, n_samples, n_features, n_workers)
+    try:
+        while True:
+            task = connection.recv()
+            if task is None:
+                break
+            _partial_gradient(views, worker_index, task[0], task[1], n_features)
+            connection.send(worker_index)
+    finally:
+        views.clear()
+        shm.close()
+        connection.close()
+
+
+class DataParallelTrainer:
+    """数据并行线性回归训练器 - 每个训练步把批次按行均分给各工作进程, 主进程汇总部分梯度后更新参数"""
+
+    def __init__(self, X, y, n_workers: Optional[int] = None):
+        n_workers = n_workers or multiprocessing.cpu_count()
+        if n_workers < 1:
+            raise ValueError("工作进程数必须为正整数")
+        if HAS_NUMPY:
+            X = to_array(X)
+            n_samples, n_features = X.shape
+        else:
+            n_samples, n_features = len(X), len(X[0])
+        if n_samples != len(y):
+            raise ValueError(f"样本数不匹配: X 为 {n_samples}, y 为 {len(y)}")
+
+        self.n_samples = n_samples
+        self.n_features = n_features
+        self.n_workers = n_workers
+        self._connections = []
+        self._processes = []
+        total = _layout(n_samples, n_features, n_workers)['total'][1]
+        self._shm = shared_memory.SharedMemory(create=True, size=total * _FLOAT_BYTES)
+        # 写入数据或启动进程失败时 (如行长度不一致、进程无法创建), 停止已启动的进程并释放共享内存
+        try:
+            self._views = _attach_views(self._shm.buf, n_samples, n_features, n_workers)
+            self._load_data(X, y)
+            for worker_index in range(n_workers):
+                parent_end, child_end = multiprocessing.Pipe()
+                self._connections.append(parent_end)
+                try:
+                    process = multiprocessing.Process(
+                        target=_worker_loop, daemon=True,
+                        args=(self._shm.name, n_samples, n_features, n_workers, worker_index, child_end))
+                    process.start()
+                finally:
+                    child_end.close()
+                self._processes.append(process)
+        except BaseException:
+            self.close()
+            raise
+
+    def _load_data(self, X, y):
+        """把训练数据写入共享内存"""
+        if HAS_NUMPY:
+            self._views['X'][:] = X
+            self._views['y'][:] = to_array(y, ndim=1)
+            return
+        d = self.n_features
+        for i, row in enumerate(X):
+            self._views['X'][i * d:(i + 1) * d] = memoryview(array('d', row))
+        self._views['y'][:] = memoryview(array('d', y))
+
+    def __enter__(self) -> 'DataParallelTrainer':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """停止工作进程并释放共享内存"""
+        if self._shm is None:
+            return
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for connection in self._connections:
+            connection.close()
+        getattr(self, '_views', {}).clear()
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def set_params(self, params):
+        """写入当前参数向量 [w_1, ..., w_n, b]"""
+        self._views['params'][:] = params if HAS_NUMPY else memoryview(array('d', params))
+
+    def gradient(self, start: int, stop: int):
+        """
+        按当前参数计算行区间 [start, stop) 上的梯度和 (all-reduce)
+        返回 (X^T e 的和, e 的和, e^2 的和); 调用方负责除以样本数与添加正则项
+        """
+        chunk = math.ceil((stop - start) / self.n_workers)
+        for worker_index, connection in enumerate(self._connections):
+            lo = min(start + worker_index * chunk, stop)
+            connection.send((lo, min(lo + chunk, stop)))
+        for connection in self._connections:
+            connection.recv()
+
+        partials = self._views['partials']
+        n_features = self.n_features
+        if HAS_NUMPY:
+            totals = partials.sum(axis=0)
+            return totals[:n_features], float(totals[n_features]), float(totals[n_features + 1])
+        width = n_features + 2
+        totals = [sum(partials[k * width + j] for k in range(self.n_workers)) for j in range(width)]
+        return totals[:n_features], totals[n_features], totals[n_features + 1]
+
+    def shuffle(self, rng):
+        """在共享内存中原地打乱样本顺序 (rng 为 numpy Generator 或 random.Random)"""
+        if HAS_NUMPY:
+            order = rng.permutation(self.n_samples)
+            self._views['X'][:] = self._views['X'][order]
+            self._views['y'][:] = self._views['y'][order]
+            return
+        order = list(range(self.n_samples))
+        rng.shuffle(order)
+        d = self.n_features
+        rows = [self._views['X'][i * d:(i + 1) * d].tolist() for i in order]
+        targets = array('d', [self._views['y'][i] for i in order])
+        for i, row in enumerate(rows):
+            self._views['X'][i * d:(i + 1) * d] = memoryview(array('d', row))
+        self._views['y'][:] = memoryview(targets)
+
+    def train(self, weights: List[float], bias: float, X_val=None, y_val=None,
+              algorithm: str = 'sgd', learning_rate: float = 0.01, epochs: int = 100,
+              batch_size: Optional[int] = None, early_stopping_patience: int = 20,
+              l2_regularization: float = 0.0, shuffle: bool = False, seed: Optional[int] = None,
+              on_epoch: Optional[Callable[[int, float, float], None]] = None,
+              optimizer: Optional[Optimizer] = None, history=None) -> Dict:
+        """
+        数据并行训练 (batch_size=None 时为全量梯度下降)
+        梯度与正则项的计算方式与 ml_engine.minibatch_train 一致, 未打乱时结果与单进程训练相同
+        history 为 TrainingHistoryWriter 时逐轮记录损失与参数快照
+        """
+        n_features = self.n_features
+        batch_size = batch_size or self.n_samples
+        if optimizer is None:
+            optimizer = optimizer_for_training(algorithm, n_features + 1, learning_rate, l2_regularization)
+        gradient_l2 = 0.0 if optimizer.decoupled_weight_decay else l2_regularization
+        if shuffle:
+            rng = np.random.default_rng(seed) if HAS_NUMPY else random.Random(seed)
+
+        params = np.array(list(weights) + [bias], dtype=np.float64) if HAS_NUMPY else list(weights) + [bias]
+        has_validation = X_val is not None and len(X_val) > 0
+        if has_validation and HAS_NUMPY:
+            X_val, y_val = to_array(X_val), to_array(y_val, ndim=1)
+        n_batches = (self.n_samples + batch_size - 1) // batch_size
+
+        best_val_loss = float('inf')
+        patience_counter = 0
+        epoch_throughput = []
+        val_loss = float('nan')
+
+        for epoch in range(epochs):
+            epoch_start = time.perf_counter()
+            if shuffle:
+                self.shuffle(rng)
+
+            total_train_loss = 0.0
+            for start in range(0, self.n_samples, batch_size):
+                stop = min(start + batch_size, self.n_samples)
+                n_batch = stop - start
+                self.set_params(params)
+                grad_w, grad_b, squared_error = self.gradient(start, stop)
+                gradients = [(g + gradient_l2 * w) / n_batch for g, w in zip(grad_w, params[:n_features])]
+                gradients.append(grad_b / n_batch)
+                optimizer.step(params, gradients)
+                total_train_loss += squared_error / n_batch
+
+            avg_train_loss = total_train_loss / n_batches
+            epoch_throughput.append(self.n_samples / max(time.perf_counter() - epoch_start, 1e-12))
+
+            if has_validation:
+                val_loss = self._validation_loss(params, X_val, y_val)
+                if val_loss < best_val_loss:
+                    best_val_loss = val_loss
+                    patience_counter = 0
+                else:
+                    patience_counter += 1
+                if patience_counter >= early_stopping_patience:
+                    break
+
+            if on_epoch is not None:
+                on_epoch(epoch, avg_train_loss, val_loss)
+            if history is not None:
+                history.record(epoch, avg_train_loss, val_loss, params)
+
+        return {
+            'weights': [float(w) for w in params[:n_features]],
+            'bias': float(params[n_features]),
+            'epochs_run': epoch + 1,
+            'final_training_loss': avg_train_loss,
+            'best_validation_loss': best_val_loss,
+            'early_stopped': patience_counter >= early_stopping_patience,
+            'epoch_throughput': epoch_throughput,
+            'n_workers': self.n_workers,
+            'optimizer': optimizer
+        }
+
+    def _validation_loss(self, params, X_val, y_val) -> float:
+        """在主进程中计算验证集均方误差"""
+        n_features = self.n_features
+        if HAS_NUMPY:
+            errors = X_val @ params[:n_features] + params[n_features] - y_val
+            return float(errors @ errors) / errors.shape[0]
+        weights, bias = params[:n_features], params[n_features]
+        return sum((sum(w * x for w, x in zip(weights, row)) + bias - target) ** 2
+                   for row, target in zip(X_val, y_val)) / len(y_val)
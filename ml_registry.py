@@ -0,0 +1,223 @@
+"""
+持久化模型注册表 - 基于标准库 sqlite3 (WAL 模式) 的文件索引
+按 model_id、模型名、版本、签名与评估指标建立索引, "最新通过验证的版本" 查询走索引而无需扫描制品目录;
+注册在单个事务中完成 (原子), WAL 模式下多个进程/线程可在写入的同时并发读取
+"""
+
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    model_id TEXT PRIMARY KEY,
+    model_name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    version_major INTEGER NOT NULL,
+    version_minor INTEGER NOT NULL,
+    version_patch INTEGER NOT NULL,
+    signature TEXT,
+    status TEXT NOT NULL,
+    validation_passed INTEGER NOT NULL,
+    registered_at REAL NOT NULL,
+    artifact_path TEXT,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS models_latest ON models (
+    model_name, validation_passed, version_major DESC, version_minor DESC, version_patch DESC, registered_at DESC
+);
+CREATE INDEX IF NOT EXISTS models_signature ON models (signature);
+CREATE TABLE IF NOT EXISTS metrics (
+    model_id TEXT NOT NULL REFERENCES models (model_id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (model_id, name)
+);
+CREATE INDEX IF NOT EXISTS metrics_by_value ON metrics (name, value);
+"""
+
+_METRIC_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def parse_version(version: str) -> Tuple[int, int, int]:
+    """把 'major.minor.patch' 形式的版本号解析为可排序的整数三元组 (缺失或非数字部分记为 0)"""
+    parts = [int(part) for part in re.findall(r'\d+', str(version))[:3]]
+    return tuple(parts + [0] * (3 - len(parts)))
+
+
+class ModelRegistry:
+    """
+    文件支持的模型注册表, 接口兼容原先以 model_id 为键的字典 (registry[model_id] = entry)
+    path 为空时使用进程内的共享内存数据库 (不持久化, 与原字典行为一致)
+    每个线程使用独立连接; 注册条目的 artifact 须包含 model_id / model_name / version / artifact_signature
+    """
+
+    def __init__(self, path: Optional[str] = None, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        if path is None:
+            self._database, self._uri = f"file:model_registry_{uuid.uuid4().hex}?mode=memory&cache=shared", True
+        else:
+            self._database, self._uri = path, False
+        self._local = threading.local()
+        # 内存数据库在最后一个连接关闭时销毁, 保留创建连接直到注册表关闭
+        self._anchor = self._connect()
+        with self._anchor:
+            self._anchor.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self._database, timeout=self.timeout, uri=self._uri,
+                                     isolation_level=None, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        if self.path is not None:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        return connection
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    # ---- 注册 ----
+
+    def register(self, entry: Dict, metrics: Optional[Dict] = None) -> str:
+        """
+        原子地注册 (或覆盖同一 model_id 的) 模型条目; metrics 中的数值指标写入索引表
+        返回 model_id
+        """
+        artifact = entry['artifact']
+        model_id = artifact['model_id']
+        metrics = {name: float(value) for name, value in (metrics or entry.get('metrics') or {}).items()
+                   if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)}
+        entry = dict(entry, metrics=metrics)
+        major, minor, patch = parse_version(artifact['version'])
+        row = (model_id, artifact['model_name'], artifact['version'], major, minor, patch,
+               artifact.get('artifact_signature'), entry.get('status', 'registered'),
+               int(bool(entry.get('provenance', {}).get('validation_passed', False))),
+               entry.get('registered_at', time.time()), entry.get('artifact_path'),
+               json.dumps(entry, ensure_ascii=False, default=float))
+
+        connection = self._connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DELETE FROM models WHERE model_id = ?", (model_id,))
+            connection.execute("INSERT INTO models VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+            connection.executemany("INSERT INTO metrics VALUES (?, ?, ?)",
+                                   [(model_id, name, value) for name, value in metrics.items()])
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return model_id
+
+    def set_status(self, model_id: str, status: str):
+        """更新模型状态 (如 deployed / retired), 同步写回条目"""
+        connection = self._connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT entry FROM models WHERE model_id = ?", (model_id,)).fetchone()
+            if row is None:
+                raise KeyError(model_id)
+            entry = dict(json.loads(row['entry']), status=status)
+            connection.execute("UPDATE models SET status = ?, entry = ? WHERE model_id = ?",
+                               (status, json.dumps(entry, ensure_ascii=False), model_id))
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    # ---- 查询 ----
+
+    def get(self, model_id: str, default=None) -> Optional[Dict]:
+        row = self._connection.execute("SELECT entry FROM models WHERE model_id = ?", (model_id,)).fetchone()
+        return json.loads(row['entry']) if row is not None else default
+
+    def latest_passing(self, model_name: str, min_metrics: Optional[Dict[str, float]] = None,
+                       max_metrics: Optional[Dict[str, float]] = None) -> Optional[Dict]:
+        """
+        返回指定模型名下通过验证网关的最新版本 (按版本号, 其次按注册时间), 不存在时返回 None
+        可附加指标条件, 如 min_metrics={'r2': 0.9}, max_metrics={'rmse': 0.5}
+        """
+        conditions, parameters = [], [model_name]
+        for bounds, operator in ((min_metrics, '>='), (max_metrics, '<=')):
+            for name, threshold in (bounds or {}).items():
+                if not _METRIC_NAME.match(name):
+                    raise ValueError(f"无效的指标名: {name}")
+                conditions.append(f"EXISTS (SELECT 1 FROM metrics WHERE metrics.model_id = models.model_id "
+                                  f"AND name = ? AND value {operator} ?)")
+                parameters += [name, threshold]
+        query = ("SELECT entry FROM models WHERE model_name = ? AND validation_passed = 1 AND status != 'retired'"
+                 + ''.join(f" AND {condition}" for condition in conditions)
+                 + " ORDER BY version_major DESC, version_minor DESC, version_patch DESC, registered_at DESC LIMIT 1")
+        row = self._connection.execute(query, parameters).fetchone()
+        return json.loads(row['entry']) if row is not None else None
+
+    def find_by_signature(self, signature: str) -> Optional[Dict]:
+        """按制品签名查找模型条目"""
+        row = self._connection.execute("SELECT entry FROM models WHERE signature = ? LIMIT 1",
+                                       (signature,)).fetchone()
+        return json.loads(row['entry']) if row is not None else None
+
+    def versions(self, model_name: str) -> List[Dict]:
+        """列出模型名下的全部版本摘要 (不解析完整条目), 按版本号从新到旧"""
+        rows = self._connection.execute(
+            "SELECT model_id, version, signature, status, validation_passed, registered_at, artifact_path "
+            "FROM models WHERE model_name = ? "
+            "ORDER BY version_major DESC, version_minor DESC, version_patch DESC, registered_at DESC",
+            (model_name,)).fetchall()
+        return [dict(row, validation_passed=bool(row['validation_passed'])) for row in rows]
+
+    def metrics(self, model_id: str) -> Dict[str, float]:
+        rows = self._connection.execute("SELECT name, value FROM metrics WHERE model_id = ?", (model_id,))
+        return {row['name']: row['value'] for row in rows}
+
+    # ---- 字典接口 ----
+
+    def __setitem__(self, model_id: str, entry: Dict):
+        if entry['artifact']['model_id'] != model_id:
+            raise ValueError(f"条目的 model_id ({entry['artifact']['model_id']}) 与键 {model_id} 不一致")
+        self.register(entry)
+
+    def __getitem__(self, model_id: str) -> Dict:
+        entry = self.get(model_id)
+        if entry is None:
+            raise KeyError(model_id)
+        return entry
+
+    def __contains__(self, model_id) -> bool:
+        return self._connection.execute("SELECT 1 FROM models WHERE model_id = ?", (model_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM models").fetchone()[0]
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self._connection.execute("SELECT model_id FROM models ORDER BY registered_at").fetchall()
+        return iter([row['model_id'] for row in rows])
+
+    def close(self):
+        """关闭当前线程的连接与创建连接 (内存数据库随之销毁)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+        if self._anchor is not None:
+            self._anchor.close()
+            self._anchor = None
+
+    def __enter__(self) -> 'ModelRegistry':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"ModelRegistry({self.path or ':memory:'!r}, models={len(self)})"
@@ -0,0 +1,449 @@
+"""
+本地模型推理服务 - 基于 asyncio 的 HTTP 服务, 把并发的单行请求合并为批量预测
+用法: python ml_serving.py  (在本机启动服务并运行内置压测)
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+from advanced_ai_model import AdvancedMLSystem
+from ml_artifacts import ModelArtifactFile, artifact_signature, is_model_artifact_file
+from ml_features import FeatureTransformer
+from ml_monitoring import PerformanceMonitor
+from ml_registry import ModelRegistry
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                413: 'Payload Too Large', 429: 'Too Many Requests', 500: 'Internal Server Error'}
+
+
+def load_model_artifact(source: Union[str, Dict], verify_signature: bool = True) -> AdvancedMLSystem:
+    """
+    从 model_packaging_and_signing 生成的模型制品加载可推理的模型
+    source 可以是制品字典、JSON 文件路径或二进制制品文件路径 (按魔数识别, 映射加载并校验摘要)
+    """
+    if isinstance(source, str) and is_model_artifact_file(source):
+        return _load_binary_artifact(source, verify_signature)
+    if isinstance(source, str):
+        with open(source, encoding='utf-8') as handle:
+            artifact = json.load(handle)
+    else:
+        artifact = source
+
+    parameters = artifact['model_parameters']
+    n_features = artifact['model_specification']['n_features']
+    feature_transform = artifact.get('feature_transform')
+    if verify_signature:
+        _verify_artifact_signature(artifact)
+
+    return _build_ml_system(artifact['model_id'], n_features, parameters['weights'], parameters['bias'],
+                            feature_transform)
+
+
+def _verify_artifact_signature(artifact: Dict):
+    """由制品中的权重、偏置与特征变换重新计算签名, 与 artifact_signature 比对"""
+    parameters = artifact['model_parameters']
+    expected = artifact_signature(parameters['weights'], parameters['bias'],
+                                  artifact['model_specification']['n_features'], artifact.get('feature_transform'))
+    if expected != artifact['artifact_signature']:
+        raise ValueError(f"模型制品 {artifact.get('model_id')} 签名校验失败")
+
+
+def _load_binary_artifact(path: str, verify: bool) -> AdvancedMLSystem:
+    """
+    二进制制品: 参数直接取自映射的 float64 数据区
+    verify=True 时先流式校验文件摘要, 再由映射的参数重新计算制品签名 (与 JSON 制品的校验一致)
+    """
+    with ModelArtifactFile(path, verify=verify) as artifact_file:
+        if verify:
+            _verify_artifact_signature(artifact_file.to_artifact())
+        return _build_ml_system(artifact_file.metadata['model_id'], artifact_file.n_features,
+                                artifact_file.weights.tolist(), artifact_file.bias,
+                                artifact_file.feature_transform)
+
+
+def _build_ml_system(model_id: str, n_features: int, weights: List[float], bias: float,
+                     feature_transform: Optional[Dict]) -> AdvancedMLSystem:
+    ml_system = AdvancedMLSystem(n_features=n_features)
+    ml_system.weights = list(weights)
+    ml_system.bias = bias
+    ml_system.model_id = model_id
+    ml_system.is_trained = True
+    # 制品带有特征变换状态时, 服务接收原始特征并按训练时的统计量展开
+    if feature_transform is not None:
+        ml_system.feature_transformer = FeatureTransformer.from_dict(feature_transform)
+    return ml_system
+
+
+def load_latest_model(registry: Union[str, ModelRegistry], model_name: str,
+                      min_metrics: Optional[Dict[str, float]] = None) -> AdvancedMLSystem:
+    """从模型注册表 (实例或 SQLite 文件路径) 解析并加载通过验证网关的最新版本"""
+    owned = isinstance(registry, str)
+    if owned:
+        registry = ModelRegistry(registry)
+    try:
+        entry = registry.latest_passing(model_name, min_metrics=min_metrics)
+    finally:
+        if owned:
+            registry.close()
+    if entry is None:
+        raise ValueError(f"注册表中没有模型 {model_name} 通过验证的版本")
+    artifact_path = entry.get('artifact_path')
+    return load_model_artifact(artifact_path if artifact_path and os.path.exists(artifact_path) else entry['artifact'])
+
+
+def expected_input_features(ml_system: AdvancedMLSystem) -> int:
+    """请求中应携带的原始特征数"""
+    transformer = ml_system.feature_transformer
+    return transformer.n_input_features if transformer is not None else ml_system.n_features
+
+
+def parse_rate_limit(rate_limiting: str) -> float:
+    """解析部署配置中的限流描述, 如 '1000 requests per minute', 返回每分钟请求数"""
+    match = re.match(r'\s*(\d+(?:\.\d+)?)\s+requests?\s+per\s+(second|minute|hour)', rate_limiting)
+    if not match:
+        raise ValueError(f"无法解析限流配置: {rate_limiting}")
+    per_unit = {'second': 60.0, 'minute': 1.0, 'hour': 1 / 60.0}[match.group(2)]
+    return float(match.group(1)) * per_unit
+
+
+class TokenBucketRateLimiter:
+    """令牌桶限流器 - 桶容量等于每分钟配额, 令牌按恒定速率补充"""
+
+    def __init__(self, requests_per_minute: float):
+        self.capacity = requests_per_minute
+        self.refill_rate = requests_per_minute / 60.0
+        self._tokens = requests_per_minute
+        self._last_refill = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        """尝试获取一个令牌"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.refill_rate)
+        self._last_refill = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+
+class MicroBatcher:
+    """
+    微批处理器 - 在 max_batch_size / max_wait_ms 策略下合并并发的单行预测请求
+    批量预测在线程池中执行, 预测期间事件循环继续处理其他连接并收集下一批请求
+    """
+
+    def __init__(self, ml_system: AdvancedMLSystem, max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        self.ml_system = ml_system
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches_executed = 0
+        self.rows_predicted = 0
+        self._queue = None
+        self._task = None
+        self._in_flight: List[Tuple] = []
+        self._stopped = False
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._stopped = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止批处理; 正在预测和仍在排队的请求均以异常结束, 不会一直挂起"""
+        self._stopped = True
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        pending = self._in_flight
+        self._in_flight = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("推理服务已停止"))
+
+    async def submit(self, row: List[float]) -> float:
+        """提交单行特征, 等待所在批次完成后返回预测值"""
+        if self._stopped or self._queue is None:
+            raise RuntimeError("推理服务未运行")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _collect_batch(self) -> List[Tuple]:
+        """取出一个批次: 先等待第一个请求, 再在等待窗口内尽量凑满批次"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = self._in_flight = await self._collect_batch()
+            rows = [row for row, _ in batch]
+            try:
+                predictions = await loop.run_in_executor(None, self.ml_system.predict_batch, rows)
+            except Exception as e:
+                self._in_flight = []
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            # 取消 (stop) 时保留 _in_flight, 由 stop 统一结束这些请求
+            self._in_flight = []
+            self.batches_executed += 1
+            self.rows_predicted += len(rows)
+            for (_, future), prediction in zip(batch, predictions):
+                if not future.done():
+                    future.set_result(prediction)
+
+
+class InferenceServer:
+    """
+    模型推理 HTTP 服务 - 提供 /api/v1/models/{id}/predict 与 /metrics 接口
+    请求体超过 max_body_bytes 时返回 413, Content-Length 非法时返回 400 (两者均关闭连接)
+    """
+
+    def __init__(self, ml_system: AdvancedMLSystem,
+                 host: str = '127.0.0.1', port: int = 8080,
+                 rate_limiting: str = '1000 requests per minute',
+                 max_batch_size: int = 64, max_wait_ms: float = 2.0,
+                 max_body_bytes: int = 64 * 1024):
+        self.ml_system = ml_system
+        self.host = host
+        self.port = port
+        self.max_body_bytes = max_body_bytes
+        self.endpoint = f'/api/v1/models/{ml_system.model_id}/predict'
+        self.rate_limiter = TokenBucketRateLimiter(parse_rate_limit(rate_limiting))
+        self.batcher = MicroBatcher(ml_system, max_batch_size, max_wait_ms)
+        self.request_monitor = PerformanceMonitor()
+        self.status_counts = {}
+        self._server = None
+
+    async def start(self):
+        """启动服务; port=0 时由系统分配端口"""
+        await self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(f"[SERVING] 推理服务已启动: http://{self.host}:{self.port}{self.endpoint}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+        print(f"[SERVING] 推理服务已停止")
+
+    def metrics(self) -> Dict:
+        """服务端指标: 端到端请求延迟、模型批量预测延迟、批处理与状态码统计"""
+        return {
+            'model_id': self.ml_system.model_id,
+            'requests': self.request_monitor.snapshot(),
+            'model_batches': self.ml_system.performance_monitoring.snapshot(),
+            'batches_executed': self.batcher.batches_executed,
+            'avg_batch_size': (self.batcher.rows_predicted / self.batcher.batches_executed
+                               if self.batcher.batches_executed else 0),
+            'status_counts': dict(self.status_counts)
+        }
+
+    def _route(self, method: str, path: str) -> Optional[Tuple[int, Dict]]:
+        """在读取请求体之前完成路由与限流检查, 请求被拒绝时返回 (状态码, 响应)"""
+        if path == '/metrics':
+            return (200, self.metrics()) if method == 'GET' else (405, {'error': 'method not allowed'})
+        if path != self.endpoint:
+            return 404, {'error': f'unknown path {path}'}
+        if method != 'POST':
+            return 405, {'error': 'method not allowed'}
+        if not self.rate_limiter.try_acquire():
+            return 429, {'error': 'rate limit exceeded'}
+        return None
+
+    async def _predict(self, body: bytes) -> Tuple[int, Dict]:
+        try:
+            features = json.loads(body)['features']
+            n_expected = expected_input_features(self.ml_system)
+            if len(features) != n_expected:
+                raise ValueError(f"expected {n_expected} features, got {len(features)}")
+            row = [float(value) for value in features]
+            if self.ml_system.feature_transformer is not None:
+                row = self.ml_system.feature_transformer.transform_row(row)
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, {'error': str(e)}
+
+        prediction = await self.batcher.submit(row)
+        return 200, {'model_id': self.ml_system.model_id, 'prediction': prediction}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """处理一个 HTTP/1.1 连接 (支持 keep-alive)"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                # 请求体长度先于读取校验: 非法长度无法确定请求边界, 超限请求不读入内存, 两者回复后都关闭连接
+                content_length = headers.get('content-length', '0')
+                start_time = time.perf_counter()
+                close_connection = True
+                if not content_length.isdigit():
+                    status, payload = 400, {'error': f'invalid content-length: {content_length}'}
+                elif int(content_length) > self.max_body_bytes:
+                    status, payload = 413, {'error': f'request body exceeds {self.max_body_bytes} bytes'}
+                else:
+                    close_connection = False
+                    rejection = self._route(method, path)
+                    body = await reader.readexactly(int(content_length))  # 长度已受限; 被拒绝的请求体直接丢弃
+                    try:
+                        status, payload = rejection or await self._predict(body)
+                    except Exception as e:
+                        status, payload = 500, {'error': str(e)}
+                self.request_monitor.record_batch(time.perf_counter() - start_time, 1)
+                self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+                data = json.dumps(payload).encode()
+                writer.write(f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                             f"Content-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if close_connection or headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def run_load_test(host: str, port: int, path: str, n_features: int,
+                        n_requests: int = 1000, concurrency: int = 32) -> Dict:
+    """内置压测: concurrency 个 keep-alive 连接并发发送单行预测请求"""
+    latencies = []
+    status_counts = {}
+    remaining = iter(range(n_requests))
+
+    async def worker():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for _ in remaining:
+                body = json.dumps({'features': [random.gauss(0, 1) for _ in range(n_features)]}).encode()
+                start = time.perf_counter()
+                writer.write(f"POST {path} HTTP/1.1\r\nHost: {host}\r\n"
+                             f"Content-Type: application/json\r\n"
+                             f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+                await writer.drain()
+                status = int((await reader.readline()).split()[1])
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b''):
+                        break
+                    if line.lower().startswith(b'content-length:'):
+                        length = int(line.split(b':')[1])
+                await reader.readexactly(length)
+                latencies.append(time.perf_counter() - start)
+                status_counts[status] = status_counts.get(status, 0) + 1
+        finally:
+            writer.close()
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start_time
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] if latencies else 0.0
+
+    return {
+        'requests': len(latencies),
+        'elapsed_seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed if elapsed > 0 else 0,
+        'latency_p50_ms': percentile(50) * 1000,
+        'latency_p95_ms': percentile(95) * 1000,
+        'latency_p99_ms': percentile(99) * 1000,
+        'status_counts': status_counts
+    }
+
+
+def _build_demo_artifact(output_path: str) -> Dict:
+    """训练一个小模型并通过 MLOpsOrchestration 打包为二进制制品, 作为演示用制品"""
+    from ai_engineer_demo import DataEngineeringSuite, MachineLearningWorkbench, MLOpsOrchestration
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        data_suite = DataEngineeringSuite()
+        features, targets = data_suite.create_synthetic_dataset(n_samples=2000, n_features=20)
+        features = data_suite.advanced_feature_engineering(features).tolist()
+        workbench = MachineLearningWorkbench(n_features=len(features[0]))
+        workbench.feature_transformer = data_suite.feature_transformer
+        workbench.advanced_training_procedure((features[:1600], targets[:1600]),
+                                              (features[1600:], targets[1600:]), solver='cholesky')
+        return MLOpsOrchestration().model_packaging_and_signing(workbench, "demo-serving-model",
+                                                                output_path=output_path)
+
+
+async def _serve_and_load_test(artifact_path: str, n_requests: int, concurrency: int):
+    ml_system = load_model_artifact(artifact_path)
+    server = InferenceServer(ml_system, port=0)
+    await server.start()
+    try:
+        report = await run_load_test(server.host, server.port, server.endpoint,
+                                     expected_input_features(ml_system), n_requests, concurrency)
+    finally:
+        await server.stop()
+    return report, server.metrics()
+
+
+def main():
+    """在本机启动推理服务并运行内置压测"""
+    print("="*60)
+    print("模型推理服务 - 微批处理与限流演示")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        artifact_path = os.path.join(tmp_dir, 'model_artifact.mlmodel')
+        _build_demo_artifact(artifact_path)
+        # 请求数超过每分钟配额, 以演示限流
+        report, metrics = asyncio.run(_serve_and_load_test(artifact_path, n_requests=1200, concurrency=32))
+
+    print(f"\n压测结果: {report['requests']} 请求, {report['requests_per_second']:.0f} 请求/秒")
+    print(f"  客户端延迟 p50/p95/p99: {report['latency_p50_ms']:.2f}/{report['latency_p95_ms']:.2f}/"
+          f"{report['latency_p99_ms']:.2f} ms")
+    print(f"  状态码分布: {report['status_counts']}")
+    print(f"服务端指标:")
+    print(f"  批次数: {metrics['batches_executed']}, 平均批大小: {metrics['avg_batch_size']:.1f}")
+    latency = metrics['requests']['latency_seconds']
+    print(f"  请求延迟 p50/p95/p99: {latency['p50'] * 1000:.2f}/{latency['p95'] * 1000:.2f}/"
+          f"{latency['p99'] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+流式统计组件 - 单遍计算、可合并的按列矩统计与回归评估指标
+每个数据块只读取一次, 块内结果按 Chan 并行公式合并到累计量 (count, mean, M2);
+累计量可在分块、多进程之间合并, 适用于无法一次载入内存的数据
+"""
+
+import math
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+from ml_dataset import ColumnarDataset
+from ml_engine import HAS_NUMPY, np
+from ml_monitoring import LogHistogram
+
+
+class StreamingMoments:
+    """
+    按列流式矩统计: 样本数、均值、离差平方和 (M2)、最小值、最大值、非有限值 (NaN/Inf) 个数
+    非有限值只计数, 不参与均值与方差
+    """
+
+    def __init__(self, n_columns: int):
+        self.n_columns = n_columns
+        self.count = [0] * n_columns
+        self.mean = [0.0] * n_columns
+        self.m2 = [0.0] * n_columns
+        self.min = [math.inf] * n_columns
+        self.max = [-math.inf] * n_columns
+        self.n_nonfinite = [0] * n_columns
+
+    @classmethod
+    def from_data(cls, data, chunk_size: Optional[int] = None) -> 'StreamingMoments':
+        """统计按行组织的数据 (列表的列表、二维数组或 ColumnarDataset), 指定 chunk_size 时分块读取"""
+        n_columns = data.n_columns if isinstance(data, ColumnarDataset) else (len(data[0]) if len(data) else 0)
+        moments = cls(n_columns)
+        if chunk_size is None or chunk_size >= len(data):
+            return moments.update(data)
+        for start in range(0, len(data), chunk_size):
+            moments.update(data[start:start + chunk_size])
+        return moments
+
+    @classmethod
+    def from_values(cls, values: Iterable[float]) -> 'StreamingMoments':
+        """统计一维序列 (如目标变量)"""
+        return cls(1).update_columns([values])
+
+    # ---- 累计 ----
+
+    def update(self, rows) -> 'StreamingMoments':
+        """累计一个按行组织的数据块"""
+        if isinstance(rows, ColumnarDataset):
+            if HAS_NUMPY:
+                return self._update_matrix(rows.to_numpy())
+            return self.update_columns(rows.columns())
+        if not len(rows):
+            return self
+        if HAS_NUMPY:
+            return self._update_matrix(np.asarray(rows, dtype=np.float64))
+        return self.update_columns(list(zip(*rows)))
+
+    def update_columns(self, columns) -> 'StreamingMoments':
+        """累计一个按列组织的数据块 (每列为可迭代的数值序列)"""
+        columns = list(columns)
+        if len(columns) != self.n_columns:
+            raise ValueError(f"列数不匹配: 期望 {self.n_columns}, 实际 {len(columns)}")
+        if HAS_NUMPY:
+            if not columns:
+                return self
+            values = [np.asarray(column, dtype=np.float64) for column in columns]
+            return self._update_matrix(np.column_stack(values))
+        for j, column in enumerate(columns):
+            self._update_column_python(j, column)
+        return self
+
+    def _update_matrix(self, block) -> 'StreamingMoments':
+        if block.ndim != 2 or block.shape[1] != self.n_columns:
+            raise ValueError(f"数据块形状 {block.shape} 与列数 {self.n_columns} 不匹配")
+        if block.shape[0] == 0:
+            return self
+        finite = np.isfinite(block)
+        if finite.all():
+            counts = np.full(self.n_columns, block.shape[0])
+            means = block.mean(axis=0)
+            m2 = ((block - means) ** 2).sum(axis=0)
+            mins, maxs = block.min(axis=0), block.max(axis=0)
+        else:
+            counts = finite.sum(axis=0)
+            sums = np.where(finite, block, 0.0).sum(axis=0)
+            means = np.divide(sums, counts, out=np.zeros(self.n_columns), where=counts > 0)
+            m2 = (np.where(finite, block - means, 0.0) ** 2).sum(axis=0)
+            mins = np.where(finite, block, math.inf).min(axis=0)
+            maxs = np.where(finite, block, -math.inf).max(axis=0)
+        nonfinite = block.shape[0] - counts
+        for j in range(self.n_columns):
+            self._merge_column(j, int(counts[j]), float(means[j]), float(m2[j]),
+                               float(mins[j]), float(maxs[j]), int(nonfinite[j]))
+        return self
+
+    def _update_column_python(self, j: int, column):
+        values = column if isinstance(column, (list, tuple)) else list(column)
+        total = sum(values)
+        # 和为有限值时块内没有 NaN/Inf, 无需逐个检查
+        n_nonfinite = 0
+        if not math.isfinite(total):
+            finite = [x for x in values if math.isfinite(x)]
+            n_nonfinite = len(values) - len(finite)
+            values, total = finite, sum(finite)
+        n = len(values)
+        if n == 0:
+            self.n_nonfinite[j] += n_nonfinite
+            return
+        mean = total / n
+        m2 = sum((x - mean) ** 2 for x in values)
+        self._merge_column(j, n, mean, m2, min(values), max(values), n_nonfinite)
+
+    def _merge_column(self, j: int, n_b: int, mean_b: float, m2_b: float,
+                      min_b: float, max_b: float, nonfinite_b: int):
+        """按 Chan 等人的并行公式合并一列的块统计量"""
+        self.n_nonfinite[j] += nonfinite_b
+        if n_b == 0:
+            return
+        n_a = self.count[j]
+        if n_a == 0:
+            self.count[j], self.mean[j], self.m2[j] = n_b, mean_b, m2_b
+        else:
+            n = n_a + n_b
+            delta = mean_b - self.mean[j]
+            self.mean[j] += delta * n_b / n
+            self.m2[j] += m2_b + delta * delta * n_a * n_b / n
+            self.count[j] = n
+        self.min[j] = min(self.min[j], min_b)
+        self.max[j] = max(self.max[j], max_b)
+
+    def merge(self, other: 'StreamingMoments') -> 'StreamingMoments':
+        """合并另一个累计量 (如其他分块或工作进程的结果)"""
+        if other.n_columns != self.n_columns:
+            raise ValueError(f"列数不匹配: {self.n_columns} vs {other.n_columns}")
+        for j in range(self.n_columns):
+            self._merge_column(j, other.count[j], other.mean[j], other.m2[j],
+                               other.min[j], other.max[j], other.n_nonfinite[j])
+        return self
+
+    # ---- 结果 ----
+
+    def variance(self, ddof: int = 0) -> List[float]:
+        """各列方差 (默认为总体方差)"""
+        return [m2 / (n - ddof) if n > ddof else 0.0 for n, m2 in zip(self.count, self.m2)]
+
+    def std(self, ddof: int = 0) -> List[float]:
+        """各列标准差"""
+        return [math.sqrt(variance) for variance in self.variance(ddof)]
+
+    @property
+    def total_nonfinite(self) -> int:
+        return sum(self.n_nonfinite)
+
+    def to_dict(self) -> Dict:
+        """导出可 JSON 序列化的状态 (便于跨进程传递后合并)"""
+        return {key: list(getattr(self, key)) for key in ('count', 'mean', 'm2', 'min', 'max', 'n_nonfinite')}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'StreamingMoments':
+        moments = cls(len(state['count']))
+        for key, values in state.items():
+            setattr(moments, key, list(values))
+        return moments
+
+    def __repr__(self) -> str:
+        return f"StreamingMoments(columns={self.n_columns}, count={max(self.count, default=0)})"
+
+
+class RegressionMetrics:
+    """
+    流式回归评估指标 - 按 (预测, 目标) 数据块单遍累计, 可合并
+    MSE / MAE / R² / MAPE / 残差均值与标准差为精确值; 异常值检测所需的绝对残差分位数
+    在样本数不超过 exact_limit 时精确计算, 超过后转为对数分桶直方图 (相对误差不超过 precision)
+    """
+
+    def __init__(self, exact_limit: int = 100_000, precision: float = 0.005):
+        self.exact_limit = exact_limit
+        self.precision = precision
+        self.n = 0
+        self.sum_squared_error = 0.0
+        self.sum_absolute_error = 0.0
+        self.sum_percentage_error = 0.0  # 仅累计目标非零的样本, 与原 MAPE 定义一致 (除以总样本数)
+        self.targets = StreamingMoments(1)
+        self.residuals = StreamingMoments(1)
+        self._abs_residuals: Optional[array] = array('d')
+        self._histogram: Optional[LogHistogram] = None
+
+    def update(self, predictions, targets) -> 'RegressionMetrics':
+        """累计一个数据块"""
+        if len(predictions) != len(targets):
+            raise ValueError(f"预测数 {len(predictions)} 与目标数 {len(targets)} 不一致")
+        if not len(targets):
+            return self
+        if HAS_NUMPY:
+            predictions = np.asarray(predictions, dtype=np.float64)
+            targets = np.asarray(targets, dtype=np.float64)
+            residuals = predictions - targets
+            abs_residuals = np.abs(residuals)
+            nonzero = targets != 0
+            self.sum_squared_error += float(residuals @ residuals)
+            self.sum_absolute_error += float(abs_residuals.sum())
+            self.sum_percentage_error += float((abs_residuals[nonzero] / np.abs(targets[nonzero])).sum())
+        else:
+            residuals = [p - t for p, t in zip(predictions, targets)]
+            abs_residuals = [abs(r) for r in residuals]
+            self.sum_squared_error += sum(r * r for r in residuals)
+            self.sum_absolute_error += sum(abs_residuals)
+            self.sum_percentage_error += sum(a / abs(t) for a, t in zip(abs_residuals, targets) if t != 0)
+        self.n += len(targets)
+        self.targets.update_columns([targets])
+        self.residuals.update_columns([residuals])
+        self._record_abs_residuals(abs_residuals)
+        return self
+
+    def _record_abs_residuals(self, values):
+        if self._histogram is None and len(self._abs_residuals) + len(values) <= self.exact_limit:
+            if HAS_NUMPY:
+                self._abs_residuals.frombytes(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+            else:
+                self._abs_residuals.extend(values)
+            return
+        if self._histogram is None:
+            self._histogram = LogHistogram(min_value=1e-9, max_value=1e9, precision=self.precision)
+            self._histogram.record_many(self._abs_residuals)
+            self._abs_residuals = None
+        self._histogram.record_many(values)
+
+    def merge(self, other: 'RegressionMetrics') -> 'RegressionMetrics':
+        """合并另一个累计量 (如其他分块或工作进程的结果)"""
+        self.n += other.n
+        self.sum_squared_error += other.sum_squared_error
+        self.sum_absolute_error += other.sum_absolute_error
+        self.sum_percentage_error += other.sum_percentage_error
+        self.targets.merge(other.targets)
+        self.residuals.merge(other.residuals)
+        if other._histogram is None:
+            self._record_abs_residuals(other._abs_residuals)
+        else:
+            if self._histogram is None:
+                self._histogram = LogHistogram(min_value=1e-9, max_value=1e9, precision=self.precision)
+                self._histogram.record_many(self._abs_residuals)
+                self._abs_residuals = None
+            self._histogram.merge(other._histogram)
+        return self
+
+    @property
+    def is_exact(self) -> bool:
+        """分位数与异常值计数是否为精确值"""
+        return self._histogram is None
+
+    def _abs_residual_quartiles(self):
+        """绝对残差的 Q1 / Q3 (精确模式下取排序后第 n//4 与 3n//4 个值, 使用部分选择而非全排序)"""
+        if self._histogram is not None:
+            return self._histogram.quantile(0.25), self._histogram.quantile(0.75)
+        n = len(self._abs_residuals)
+        if n == 0:
+            return 0.0, 0.0
+        q1_idx, q3_idx = n // 4, 3 * n // 4
+        if HAS_NUMPY:
+            values = np.frombuffer(self._abs_residuals, dtype=np.float64)
+            selected = np.partition(values, (q1_idx, q3_idx))
+            return float(selected[q1_idx]), float(selected[q3_idx])
+        ordered = sorted(self._abs_residuals)
+        return ordered[q1_idx], ordered[q3_idx]
+
+    def _count_above(self, threshold: float) -> int:
+        if self._histogram is not None:
+            return self._histogram.count_above(threshold)
+        if HAS_NUMPY:
+            return int(np.count_nonzero(np.frombuffer(self._abs_residuals, dtype=np.float64) > threshold))
+        return sum(1 for value in self._abs_residuals if value > threshold)
+
+    def result(self, n_features: Optional[int] = None) -> Dict:
+        """计算汇总指标; 给定 n_features 时附带调整 R²"""
+        n = self.n
+        if n == 0:
+            raise ValueError("没有可评估的样本")
+        mse = self.sum_squared_error / n
+        ss_tot = self.targets.m2[0]
+        r2 = 1 - (self.sum_squared_error / ss_tot) if ss_tot != 0 else 0
+        q1, q3 = self._abs_residual_quartiles()
+        iqr = q3 - q1
+        outlier_threshold = q3 + 1.5 * iqr if iqr > 0 else float('inf')
+        n_outliers = self._count_above(outlier_threshold)
+        metrics = {
+            'mse': mse,
+            'rmse': math.sqrt(mse),
+            'mae': self.sum_absolute_error / n,
+            'r2': r2,
+            'mape': self.sum_percentage_error / n * 100,
+            'residual_mean': self.residuals.mean[0],
+            'residual_std': self.residuals.std()[0],
+            'outliers_count': n_outliers,
+            'outlier_percentage': n_outliers / n * 100,
+            'n_samples': n,
+            'exact_quantiles': self.is_exact
+        }
+        if n_features is not None:
+            dof = n - n_features - 1
+            metrics['adjusted_r2'] = 1 - (1 - r2) * (n - 1) / dof if dof > 0 else r2
+        return metrics
+
+
+def evaluate_in_chunks(predict, features, targets, chunk_size: int = 65536,
+                       metrics: Optional[RegressionMetrics] = None) -> RegressionMetrics:
+    """按块预测并累计评估指标, 不保留完整的预测列表; predict 接收特征块并返回预测"""
+    metrics = metrics or RegressionMetrics()
+    for start in range(0, len(targets), chunk_size):
+        stop = start + chunk_size
+        metrics.update(predict(features[start:stop]), targets[start:stop])
+    return metrics
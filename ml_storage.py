@@ -0,0 +1,250 @@
+"""
+列式二进制数据文件 - 可直接 mmap 的 float64 列主序格式
+文件布局: 魔数 (8 字节) | 头部长度 (8 字节, 小端) | JSON 头部 (含预留空间) | 数据区
+数据区与每一列均按 64 字节对齐, 第 j 列位于 data_offset + j * column_stride * 8
+头部记录形状、数据类型、列名、目标列与各列统计量 (可作为标准化参数); 读取时映射文件,
+数据集为页面上的零拷贝视图, 打开多 GB 的文件无需读入内存, 多个进程映射同一文件时共享页缓存
+"""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+from ml_dataset import ColumnarDataset
+from ml_statistics import StreamingMoments
+
+MAGIC = b'MLCOLS\x00\x01'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_FLOAT_BYTES = 8
+_PREAMBLE = struct.Struct('<8sQ')
+# 每列为头部预留的字节数, 供写入完成后补充统计量
+_HEADER_RESERVE_PER_COLUMN = 192
+
+
+def _align(size: int, alignment: int = ALIGNMENT) -> int:
+    return (size + alignment - 1) // alignment * alignment
+
+
+def _encode_header(header: Dict) -> bytes:
+    return json.dumps(header, ensure_ascii=False).encode('utf-8')
+
+
+def create_columnar_file(path: str, n_rows: int, column_names: Sequence[str],
+                         metadata: Optional[Dict] = None, target_column: Optional[str] = None) -> Dict:
+    """
+    创建列式数据文件并预分配数据区 (内容为零, 文件系统支持时为稀疏文件)
+    返回头部; 数据随后可通过 ColumnarFile(path, writable=True) 按块写入, 统计量由 update_header 补充
+    """
+    column_names = list(column_names)
+    if target_column is not None and target_column not in column_names:
+        raise ValueError(f"目标列 {target_column} 不在列名中")
+    column_stride = _align(n_rows * _FLOAT_BYTES) // _FLOAT_BYTES
+    header = {
+        'format_version': FORMAT_VERSION,
+        'dtype': '<f8',
+        'layout': 'column_major',
+        'n_rows': n_rows,
+        'n_columns': len(column_names),
+        'column_names': column_names,
+        'target_column': target_column,
+        'column_stride': column_stride,
+        'data_offset': 0,
+        'statistics': None,
+        'metadata': metadata or {}
+    }
+    reserve = _HEADER_RESERVE_PER_COLUMN * len(column_names) + ALIGNMENT
+    header['data_offset'] = _align(_PREAMBLE.size + len(_encode_header(header)) + reserve)
+
+    with open(path, 'wb') as handle:
+        _write_header(handle, header)
+        handle.truncate(header['data_offset'] + len(column_names) * column_stride * _FLOAT_BYTES)
+    return header
+
+
+def _write_header(handle, header: Dict):
+    header_bytes = _encode_header(header)
+    if _PREAMBLE.size + len(header_bytes) > header['data_offset']:
+        raise ValueError(f"头部 ({len(header_bytes)} 字节) 超出预留空间")
+    handle.seek(0)
+    handle.write(_PREAMBLE.pack(MAGIC, len(header_bytes)))
+    handle.write(header_bytes)
+
+
+def update_header(path: str, **fields) -> Dict:
+    """原地更新头部字段 (如 statistics / metadata), 不移动数据区"""
+    header = read_header(path)
+    header.update(fields)
+    with open(path, 'r+b') as handle:
+        _write_header(handle, header)
+    return header
+
+
+def read_header(path: str) -> Dict:
+    """读取并校验文件头部"""
+    with open(path, 'rb') as handle:
+        preamble = handle.read(_PREAMBLE.size)
+        if len(preamble) != _PREAMBLE.size:
+            raise ValueError(f"{path} 不是列式数据文件: 文件过短")
+        magic, header_length = _PREAMBLE.unpack(preamble)
+        if magic != MAGIC:
+            raise ValueError(f"{path} 不是列式数据文件: 魔数不匹配")
+        header = json.loads(handle.read(header_length).decode('utf-8'))
+    if header.get('format_version') != FORMAT_VERSION or header.get('dtype') != '<f8':
+        raise ValueError(f"不支持的列式文件版本或数据类型: {header.get('format_version')}, {header.get('dtype')}")
+    expected_size = header['data_offset'] + header['n_columns'] * header['column_stride'] * _FLOAT_BYTES
+    if os.path.getsize(path) < expected_size:
+        raise ValueError(f"{path} 数据区不完整: 期望至少 {expected_size} 字节")
+    return header
+
+
+def write_dataset(path: str, features, targets=None, column_names: Optional[Sequence[str]] = None,
+                  metadata: Optional[Dict] = None, chunk_size: int = 65536) -> Dict:
+    """
+    把内存中的数据集 (按行数据或 ColumnarDataset) 与可选的目标写入列式数据文件
+    同时按块累计各列统计量写入头部; 返回头部
+    """
+    dataset = features if isinstance(features, ColumnarDataset) else ColumnarDataset.from_rows(features)
+    n_rows, n_features = dataset.shape
+    columns = dataset.columns()
+    names = list(column_names) if column_names is not None else [f'feature_{j}' for j in range(n_features)]
+    target_column = None
+    if targets is not None:
+        if len(targets) != n_rows:
+            raise ValueError(f"样本数不匹配: 特征为 {n_rows}, 目标为 {len(targets)}")
+        target_values = targets if isinstance(targets, memoryview) else array('d', targets)
+        columns.append(memoryview(target_values).cast('B').cast('d'))
+        if len(names) == n_features:
+            names.append('target')
+        target_column = names[-1]
+    if len(names) != len(columns):
+        raise ValueError(f"列名数量 ({len(names)}) 与列数 ({len(columns)}) 不一致")
+
+    create_columnar_file(path, n_rows, names, metadata, target_column)
+    moments = StreamingMoments(len(columns))
+    with ColumnarFile(path, writable=True) as output:
+        for start in range(0, n_rows, chunk_size):
+            block = [column[start:start + chunk_size] for column in columns]
+            output.write_columns(start, block)
+            moments.update_columns(block)
+    return update_header(path, statistics=moments.to_dict())
+
+
+class ColumnarFile:
+    """
+    映射到内存的列式数据文件
+    dataset 为全部列的零拷贝视图; 文件包含目标列时, features 为特征列的零拷贝视图, targets 为目标列
+    """
+
+    def __init__(self, path: str, writable: bool = False):
+        self.path = path
+        self.header = read_header(path)
+        self.writable = writable
+        with open(path, 'r+b' if writable else 'rb') as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0,
+                                   access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        start = self.header['data_offset']
+        stop = start + self.n_columns * self.header['column_stride'] * _FLOAT_BYTES
+        # 只读映射的视图序列化时只传递路径, 接收进程重新映射同一文件
+        stat = os.stat(path)
+        mapped_file = None if writable else (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        self.dataset = ColumnarDataset(memoryview(self._mmap)[start:stop], self.n_rows, self.n_columns,
+                                       column_stride=self.header['column_stride'], mapped_file=mapped_file)
+
+    @property
+    def n_rows(self) -> int:
+        return self.header['n_rows']
+
+    @property
+    def n_columns(self) -> int:
+        return self.header['n_columns']
+
+    @property
+    def column_names(self) -> List[str]:
+        return self.header['column_names']
+
+    @property
+    def target_index(self) -> Optional[int]:
+        target = self.header.get('target_column')
+        return self.column_names.index(target) if target is not None else None
+
+    @property
+    def feature_names(self) -> List[str]:
+        return [name for j, name in enumerate(self.column_names) if j != self.target_index]
+
+    @property
+    def features(self) -> ColumnarDataset:
+        """特征列的零拷贝视图 (目标列须为最后一列, 由 write_dataset 与合成数据生成器保证)"""
+        target_index = self.target_index
+        if target_index is None:
+            return self.dataset
+        if target_index != self.n_columns - 1:
+            raise ValueError("目标列不是最后一列, 无法构建连续的特征视图")
+        dataset = self.dataset
+        return ColumnarDataset(dataset._data, self.n_rows, self.n_columns - 1, dataset._stride,
+                               base=dataset, mapped_file=dataset._mapped_file)
+
+    @property
+    def targets(self) -> Optional[array]:
+        """目标列, 复制为 array('d') 以便序列化与按列表使用 (只占数据量的 1/n_columns); 零拷贝访问请用 column()"""
+        target_index = self.target_index
+        if target_index is None:
+            return None
+        targets = array('d')
+        targets.frombytes(self.dataset.column(target_index).cast('B'))
+        return targets
+
+    def column(self, name: str) -> memoryview:
+        """按列名取列的零拷贝视图"""
+        return self.dataset.column(self.column_names.index(name))
+
+    @property
+    def statistics(self) -> Optional[StreamingMoments]:
+        """头部记录的各列统计量"""
+        state = self.header.get('statistics')
+        return StreamingMoments.from_dict(state) if state else None
+
+    def feature_scalers(self) -> List[Dict[str, float]]:
+        """由头部统计量得到特征列的标准化参数 (与预处理阶段相同, 标准差下限为 1e-4)"""
+        moments = self.statistics
+        if moments is None:
+            raise ValueError(f"{self.path} 头部没有统计量")
+        target_index = self.target_index
+        return [{'mean': mean, 'std': max(std, 1e-4)}
+                for j, (mean, std) in enumerate(zip(moments.mean, moments.std())) if j != target_index]
+
+    def write_columns(self, start: int, columns: Sequence):
+        """把一个按列组织的数据块写入行区间 [start, start + len(columns[0]))"""
+        if len(columns) != self.n_columns:
+            raise ValueError(f"列数不匹配: 期望 {self.n_columns}, 实际 {len(columns)}")
+        for j, values in enumerate(columns):
+            target = self.dataset.column(j)[start:start + len(values)]
+            target[:] = values if isinstance(values, memoryview) else memoryview(values).cast('B').cast('d')
+
+    def flush(self):
+        if self.writable and self._mmap is not None:
+            self._mmap.flush()
+
+    def close(self):
+        """解除映射; 仍有外部视图引用数据区时, 映射在最后一个视图释放后由解释器回收"""
+        if self._mmap is None:
+            return
+        self.flush()
+        self.dataset = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+        self._mmap = None
+
+    def __enter__(self) -> 'ColumnarFile':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"ColumnarFile({self.path!r}, rows={self.n_rows}, columns={self.n_columns})"
@@ -1,7 +1,10 @@
 import random
-import math
 from typing import List, Tuple
 
+import ml_engine
+from ml_statistics import RegressionMetrics, StreamingMoments
+from ml_synthetic import SyntheticDataGenerator
+
 class SimpleMLModel:
     """
     一个简单的机器学习模型示例，演示从数据预处理到模型训练的基本流程
@@ -14,23 +17,16 @@ class SimpleMLModel:
         self.feature_stds = []
         self.is_trained = False
     
-    def generate_sample_data(self, n_samples=1000):
+    def generate_sample_data(self, n_samples=1000, seed=None):
         """
-        生成示例数据集
+        生成示例数据集 (指定 seed 时结果可复现)
         """
         print("正在生成示例数据...")
         
-        # 生成特征变量
-        features = []
-        for i in range(n_samples):
-            row = [random.gauss(0, 1) for _ in range(3)]  # 3个特征
-            features.append(row)
-        
-        # 创建目标变量，基于特征的线性组合加上一些噪声
-        targets = []
-        for i in range(n_samples):
-            target = 3 * features[i][0] + 2 * features[i][1] - features[i][2] + 0.5 * random.gauss(0, 1)
-            targets.append(target)
+        # 3个标准正态特征, 目标为特征的线性组合 3*x0 + 2*x1 - x2 加上一些噪声
+        generator = SyntheticDataGenerator(n_samples, 3, 'linear', seed=seed)
+        features, targets = generator.to_dataset()
+        features, targets = features.tolist(), targets.tolist()
         
         print(f"数据集大小: 特征矩阵 {n_samples}x3, 目标向量 {n_samples}x1")
         print(f"特征数量: 3")
@@ -44,19 +40,11 @@ class SimpleMLModel:
         """
         print("正在进行数据标准化...")
         
-        # 计算每个特征的均值和标准差
+        # 单遍计算每个特征的均值和标准差
         n_features = len(features[0])
-        means = []
-        stds = []
-        
-        for j in range(n_features):
-            col_values = [features[i][j] for i in range(len(features))]
-            mean_val = sum(col_values) / len(col_values)
-            variance = sum((x - mean_val)**2 for x in col_values) / len(col_values)
-            std_val = math.sqrt(variance) if variance > 0 else 1  # 避免除零
-            
-            means.append(mean_val)
-            stds.append(std_val)
+        moments = StreamingMoments.from_data(features)
+        means = moments.mean
+        stds = [std if std > 0 else 1 for std in moments.std()]  # 避免除零
         
         # 保存用于后续预测
         self.feature_means = means
@@ -101,22 +89,89 @@ class SimpleMLModel:
         
         return train_features, test_features, train_targets, test_targets
     
-    def train_model(self, X_train: List[List[float]], y_train: List[float]):
+    def train_model(self, X_train: List[List[float]], y_train: List[float],
+                    learning_rate: float = 0.01, epochs: int = 1000, engine: str = 'python',
+                    solver: str = 'gd'):
         """
         使用梯度下降法训练线性回归模型
+        engine='numpy' 时使用向量化引擎 (需安装numpy), 结果与纯Python实现在浮点误差内一致
+        solver 为 'normal' / 'cholesky' / 'qr' 时直接闭式求解最小二乘, 不再迭代
         """
-        print("\n正在训练模型 (使用梯度下降法)...")
+        if engine not in ('python', 'numpy'):
+            raise ValueError(f"不支持的训练引擎: {engine}")
+        ml_engine.validate_solver(solver)
+        
+        if solver != 'gd':
+            return self._fit_closed_form(X_train, y_train, solver)
+        
+        print(f"\n正在训练模型 (使用梯度下降法, 引擎: {engine})...")
         
         n_features = len(X_train[0])
-        n_samples = len(X_train)
         
         # 初始化权重和偏置
         weights = [random.uniform(-0.01, 0.01) for _ in range(n_features)]
         bias = 0.0
-        learning_rate = 0.01
-        epochs = 1000
         
-        # 梯度下降
+        if engine == 'numpy':
+            weights, bias = ml_engine.batch_gradient_descent(
+                X_train, y_train, weights, bias, learning_rate, epochs)
+        else:
+            weights, bias = self._python_gradient_descent(
+                X_train, y_train, weights, bias, learning_rate, epochs)
+        
+        # 保存训练好的参数
+        self.weights = weights
+        self.bias = bias
+        self.is_trained = True
+        
+        print(f"训练完成! 经过 {epochs} 轮迭代")
+        print(f"学习率: {learning_rate}")
+        print(f"最终权重: {[round(w, 4) for w in weights]}")
+        print(f"最终偏置: {round(bias, 4)}")
+        
+        return self
+    
+    def train_streaming(self, batch_source, learning_rate: float = 0.01, epochs: int = 1,
+                        algorithm: str = 'sgd'):
+        """
+        流式训练: 从批次迭代器 (或返回迭代器的可调用对象) 逐批增量更新权重
+        批次数据需已标准化, 峰值内存只与批大小有关
+        """
+        print(f"\n正在流式训练模型 (算法: {algorithm}, 轮数: {epochs})...")
+        
+        trainer = ml_engine.StreamingLinearTrainer(
+            self.weights if self.is_trained else None, self.bias,
+            learning_rate=learning_rate, algorithm=algorithm)
+        summary = trainer.fit(batch_source, epochs=epochs)
+        
+        self.weights = trainer.weights
+        self.bias = trainer.bias
+        self.is_trained = True
+        
+        print(f"训练完成! 共 {summary['steps']} 个批次, {summary['samples_seen']} 个样本")
+        print(f"最终权重: {[round(w, 4) for w in self.weights]}")
+        print(f"最终偏置: {round(self.bias, 4)}")
+        
+        return self
+    
+    def _fit_closed_form(self, X_train, y_train, solver):
+        """闭式求解线性回归"""
+        print(f"\n正在训练模型 (闭式求解, 方法: {solver})...")
+        
+        self.weights, self.bias = ml_engine.solve_least_squares(X_train, y_train, method=solver)
+        self.is_trained = True
+        
+        print(f"训练完成! 闭式解一次求得")
+        print(f"最终权重: {[round(w, 4) for w in self.weights]}")
+        print(f"最终偏置: {round(self.bias, 4)}")
+        
+        return self
+    
+    def _python_gradient_descent(self, X_train, y_train, weights, bias, learning_rate, epochs):
+        """纯Python梯度下降"""
+        n_features = len(X_train[0])
+        n_samples = len(X_train)
+        
         for epoch in range(epochs):
             total_error = 0
             
@@ -143,17 +198,7 @@ class SimpleMLModel:
                 weights[j] -= learning_rate * (weight_gradients[j] / n_samples)
             bias -= learning_rate * (bias_gradient / n_samples)
         
-        # 保存训练好的参数
-        self.weights = weights
-        self.bias = bias
-        self.is_trained = True
-        
-        print(f"训练完成! 经过 {epochs} 轮迭代")
-        print(f"学习率: {learning_rate}")
-        print(f"最终权重: {[round(w, 4) for w in weights]}")
-        print(f"最终偏置: {round(bias, 4)}")
-        
-        return self
+        return weights, bias
     
     def evaluate_model(self, X_test: List[List[float]], y_test: List[float]):
         """
@@ -167,16 +212,9 @@ class SimpleMLModel:
         # 预测
         y_pred = self.predict(X_test)
         
-        # 计算评估指标
-        n = len(y_test)
-        mse = sum((y_pred[i] - y_test[i])**2 for i in range(n)) / n
-        rmse = math.sqrt(mse)
-        
-        # 计算R²
-        mean_y = sum(y_test) / len(y_test)
-        ss_tot = sum((y_test[i] - mean_y)**2 for i in range(n))
-        ss_res = sum((y_test[i] - y_pred[i])**2 for i in range(n))
-        r2 = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0
+        # 单遍累计评估指标
+        metrics = RegressionMetrics().update(y_pred, y_test).result()
+        mse, rmse, r2 = metrics['mse'], metrics['rmse'], metrics['r2']
         
         print(f"均方误差 (MSE): {mse:.4f}")
         print(f"均方根误差 (RMSE): {rmse:.4f}")
@@ -0,0 +1,78 @@
+"""
+二进制模型制品的往返测试: 写出 -> 映射加载 -> 与原制品及 JSON 加载路径的预测一致
+运行: python -m unittest test_ml_artifacts
+"""
+
+import contextlib
+import io
+import os
+import random
+import tempfile
+import unittest
+
+from ml_artifacts import ModelArtifactFile, artifact_signature, write_model_artifact
+from ml_features import FeatureTransformer, FeatureTransformSpec
+from ml_serving import load_model_artifact
+
+
+def _make_artifact(spec: FeatureTransformSpec, n_inputs: int = 3, seed: int = 7):
+    rng = random.Random(seed)
+    rows = [[rng.gauss(0, 2) for _ in range(n_inputs)] for _ in range(50)]
+    transformer = FeatureTransformer(spec).fit(rows)
+    n_features = transformer.n_output_features
+    weights = [rng.uniform(-1, 1) for _ in range(n_features)]
+    bias = rng.uniform(-1, 1)
+    feature_transform = transformer.to_dict()
+    artifact = {
+        'model_id': 'model_roundtrip',
+        'model_name': 'roundtrip',
+        'version': '1.0.0',
+        'model_specification': {'n_features': n_features},
+        'model_parameters': {'weights': weights, 'bias': bias},
+        'feature_transform': feature_transform,
+        'artifact_signature': artifact_signature(weights, bias, n_features, feature_transform)
+    }
+    return artifact, rows
+
+
+class BinaryArtifactRoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.mlmodel')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def _assert_round_trip(self, spec: FeatureTransformSpec):
+        artifact, rows = _make_artifact(spec)
+        write_model_artifact(self.path, artifact)
+
+        with ModelArtifactFile(self.path) as artifact_file:
+            self.assertEqual(artifact_file.to_artifact(), artifact)
+            self.assertEqual(artifact_file.feature_transform, artifact['feature_transform'])
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            from_binary = load_model_artifact(self.path)
+            from_json = load_model_artifact(artifact)
+        self.assertEqual(list(from_binary.predict_raw(rows)), list(from_json.predict_raw(rows)))
+
+    def test_round_trip_with_standardization(self):
+        self._assert_round_trip(FeatureTransformSpec(standardize=True, product_terms=[(0, 1)]))
+
+    def test_round_trip_without_standardization(self):
+        # standardize=False 时 means/stds 为 None, 不写入数据区
+        self._assert_round_trip(FeatureTransformSpec(standardize=False, product_terms=[(0, 1)], polynomial_degree=2))
+
+    def test_tampered_parameters_fail_signature(self):
+        artifact, _ = _make_artifact(FeatureTransformSpec(standardize=True))
+        artifact['model_parameters']['weights'][0] += 1.0
+        write_model_artifact(self.path, artifact)  # 文件摘要有效, 但制品签名不再匹配参数
+        with self.assertRaises(ValueError):
+            load_model_artifact(self.path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            load_model_artifact(self.path, verify_signature=False)
+
+
+if __name__ == '__main__':
+    unittest.main()